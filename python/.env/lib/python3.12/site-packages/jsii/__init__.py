@@ -14,6 +14,12 @@ from ._runtime import (
     kernel,
     proxy_for,
 )
+from ._publication import publish
+from ._reference_map import JSIIStruct
+from ._submodules import lazy_submodules
+from ._kernel.tracing import trace
+from ._kernel.providers.node_options import configure_node
+from ._type_checking import check_type, configure_type_checking, type_hints
 from . import python
 
 
@@ -28,13 +34,20 @@ load = kernel.load
 create = kernel.create
 delete = kernel.delete
 get = kernel.get
+get_async = kernel.get_async
 set = kernel.set
 sget = kernel.sget
+sget_async = kernel.sget_async
 sset = kernel.sset
 invoke = kernel.invoke
+invoke_async = kernel.invoke_async
 ainvoke = kernel.ainvoke
 sinvoke = kernel.sinvoke
+sinvoke_async = kernel.sinvoke_async
 stats = kernel.stats
+pipelined = kernel.pipelined
+flush = kernel.flush
+release_scope = kernel.release_scope
 
 
 if sys.version_info < (3, 8):
@@ -52,6 +65,7 @@ __all__ = [
     "JSIIAssembly",
     "JSIIMeta",
     "JSIIAbstractClass",
+    "JSIIStruct",
     "Number",
     "enum",
     "data_type",
@@ -60,16 +74,30 @@ __all__ = [
     "member",
     "kernel",
     "proxy_for",
+    "publish",
+    "lazy_submodules",
+    "check_type",
+    "configure_type_checking",
+    "configure_node",
+    "type_hints",
     "load",
     "create",
     "delete",
     "get",
+    "get_async",
     "set",
     "sget",
+    "sget_async",
     "sset",
     "invoke",
+    "invoke_async",
     "ainvoke",
     "sinvoke",
+    "sinvoke_async",
     "stats",
+    "pipelined",
+    "flush",
+    "release_scope",
+    "trace",
     "python",
 ]
@@ -0,0 +1,183 @@
+# Opt-in cache of assembly tarballs prepared for faster loading by the kernel.
+#
+# Large assemblies (such as aws-cdk-lib) ship their .jsii file gzipped inside of the
+# tarball, behind a redirect. The kernel already caches the extraction of tarballs,
+# but still has to gunzip the assembly on every load. Here we build a snapshot of the
+# tarball where the redirect is replaced by the uncompressed assembly, keyed by the
+# assembly name, version and the digest of the original tarball, and have the kernel
+# load that instead.
+#
+# Hashing the tarball (tens of MB for aws-cdk-lib) on every load would cost most of
+# what the snapshot saves, so each load looks the snapshot up by the tarball's path,
+# size and modification time instead, in a small reference file. Only when that
+# changes (e.g. the package was reinstalled) is the tarball hashed, which tells
+# whether an existing snapshot still matches its content. The reference also records
+# the snapshot's size, so that a truncated snapshot is made again.
+import gzip
+import hashlib
+import io
+import json
+import os
+import pathlib
+import tarfile
+import tempfile
+
+from typing import Any, Dict, Optional, Tuple
+
+from ._utils import default_cache_root
+
+
+_ASSEMBLY_FILE = "package/.jsii"
+_REDIRECT_SCHEMA = "jsii/file-redirect"
+
+
+def enabled() -> bool:
+    return os.environ.get("JSII_ASSEMBLY_CACHE", "disabled").lower() == "enabled"
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _uncompressed_assembly(src: tarfile.TarFile) -> Optional[Tuple[bytes, str]]:
+    # Returns the uncompressed assembly, and the name of the member it was read from,
+    # if the tarball's .jsii file is a gzip redirect.
+    assembly = src.extractfile(_ASSEMBLY_FILE)
+    if assembly is None:
+        return None
+    redirect = json.loads(assembly.read())
+    if (
+        redirect.get("schema") != _REDIRECT_SCHEMA
+        or redirect.get("compression") != "gzip"
+    ):
+        return None
+
+    target = f"package/{redirect['filename']}"
+    compressed = src.extractfile(target)
+    if compressed is None:
+        return None
+    return gzip.decompress(compressed.read()), target
+
+
+def _write_snapshot(tarball: str, snapshot: str) -> bool:
+    with tarfile.open(tarball, "r:gz") as src:
+        uncompressed = _uncompressed_assembly(src)
+        if uncompressed is None:
+            return False
+        data, target = uncompressed
+
+        # The snapshot is written next to its final location, and renamed in place
+        # once complete, so concurrent loads never see a partial file.
+        fd, staging = tempfile.mkstemp(
+            prefix=".staging-", dir=os.path.dirname(snapshot)
+        )
+        try:
+            with os.fdopen(fd, "wb") as fp, tarfile.open(fileobj=fp, mode="w") as dst:
+                for member in src:
+                    if member.name == target:
+                        continue
+                    if member.name == _ASSEMBLY_FILE:
+                        member.size = len(data)
+                        dst.addfile(member, io.BytesIO(data))
+                    elif member.isfile():
+                        dst.addfile(member, src.extractfile(member))
+                    else:
+                        dst.addfile(member)
+            os.replace(staging, snapshot)
+        except BaseException:
+            os.unlink(staging)
+            raise
+    return True
+
+
+def _stat_key(tarball: str) -> str:
+    stat = os.stat(tarball)
+    data = f"{os.path.abspath(tarball)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_reference(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as fp:
+            reference = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reference, dict) or not isinstance(reference.get("key"), str):
+        return None
+    return reference
+
+
+def _write_reference(path: str, key: str, size: Optional[int]) -> None:
+    fd, staging = tempfile.mkstemp(prefix=".staging-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump({"key": key, "size": size}, fp)
+        os.replace(staging, path)
+    except BaseException:
+        os.unlink(staging)
+        raise
+
+
+def _is_valid_snapshot(snapshot: str) -> bool:
+    try:
+        with tarfile.open(snapshot, "r:") as tar:
+            tar.getmember(_ASSEMBLY_FILE)
+    except (OSError, tarfile.TarError, KeyError):
+        return False
+    return True
+
+
+def snapshot(name: str, version: str, tarball: str) -> str:
+    """Returns the path of the tarball the kernel should load for this assembly."""
+    root = os.environ.get("JSII_ASSEMBLY_CACHE_ROOT") or default_cache_root(
+        "assembly-cache"
+    )
+    prefix = name.replace("/", "__") + f"@{version}"
+
+    try:
+        reference = os.path.join(root, f"{prefix}-{_stat_key(tarball)}.ref")
+    except OSError:
+        return tarball
+    known = _read_reference(reference)
+    if known is not None:
+        if known["size"] is None:
+            # Not compressed, see below
+            return tarball
+        snapshot = os.path.join(root, f"{known['key']}.tar")
+        try:
+            if os.path.getsize(snapshot) == known["size"]:
+                return snapshot
+        except OSError:
+            pass
+        # The snapshot is gone, or was damaged: it is made again.
+
+    key = f"{prefix}-{_digest(tarball)[:16]}"
+    snapshot = os.path.join(root, f"{key}.tar")
+    # Assemblies that aren't compressed have nothing to gain from a snapshot, which we
+    # record with a marker so we don't inspect the tarball again next time.
+    marker = os.path.join(root, f"{key}.skip")
+    try:
+        pathlib.Path(root).mkdir(parents=True, exist_ok=True)
+        if os.path.isfile(marker):
+            _write_reference(reference, key, None)
+            return tarball
+        # A snapshot of the same content may have been made from another copy of the
+        # tarball, unless it is the one found damaged above.
+        damaged = known is not None and known["key"] == key
+        if not damaged and _is_valid_snapshot(snapshot):
+            _write_reference(reference, key, os.path.getsize(snapshot))
+            return snapshot
+        if _write_snapshot(tarball, snapshot):
+            _write_reference(reference, key, os.path.getsize(snapshot))
+            return snapshot
+        pathlib.Path(marker).touch()
+        _write_reference(reference, key, None)
+    except OSError:
+        # The cache is not usable (e.g: read-only home directory), the kernel can
+        # still load the original tarball.
+        pass
+    return tarball
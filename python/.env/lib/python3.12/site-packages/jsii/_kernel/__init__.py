@@ -1,9 +1,22 @@
+import contextlib
 import datetime
 import inspect
 import itertools
+import os
 from types import FunctionType, MethodType, BuiltinFunctionType, LambdaType
 
-from typing import Callable, cast, Any, List, Optional, Sequence, Type
+from typing import (
+    Callable,
+    cast,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 import functools
 
@@ -11,7 +24,8 @@ import attr
 import enum
 
 from ..errors import JSIIError
-from .. import _reference_map
+from .. import _reference_map, _type_checking
+from . import tracing
 from .._utils import Singleton
 from .providers import BaseProvider, ProcessProvider
 from .types import (
@@ -37,6 +51,7 @@ from .types import (
     GetScriptCommandResponse,
     InvokeScriptRequest,
     InvokeScriptResponse,
+    KernelRequest,
     KernelResponse,
     LoadRequest,
     ObjRef,
@@ -58,34 +73,60 @@ class Object:
     __jsii_type__ = "Object"
 
 
+# The overrides only depend on the classes involved, so they are discovered once per
+# (jsii type, Python class) pair. Classes whose metaclass reports mutations (see
+# JSIIMeta) clear this table when mutated; any other class is never cached, since we
+# would not know when it changes.
+_overrides_cache: Dict[Tuple[Type, Type], List[Override]] = {}
+
+
+def _invalidate_overrides() -> None:
+    _overrides_cache.clear()
+
+
 def _get_overides(klass: Type, obj: Any) -> List[Override]:
+    key = (klass, type(obj))
+    try:
+        overrides = _overrides_cache[key]
+    except KeyError:
+        overrides, cacheable = _find_overrides(klass, type(obj))
+        if cacheable:
+            _overrides_cache[key] = overrides
+
+    # Callers get their own list, so they can't corrupt the cache.
+    return list(overrides)
+
+
+def _find_overrides(klass: Type, obj_class: Type) -> Tuple[List[Override], bool]:
     overrides: List[Override] = []
+    cacheable = True
 
     # We need to inspect each item in the MRO, until we get to our Type, at that
     # point we'll bail, because those methods are not the overriden methods, but the
     # "real" methods.
     jsii_name = getattr(klass, "__jsii_type__", "Object")
+    mro = obj_class.mro()
     jsii_classes = [
         next(
             (
                 m
-                for m in type(obj).mro()
+                for m in mro
                 if getattr(m, "__jsii_declared_type__", None) == jsii_name
             ),
             Object,
         )
     ] + list(
-        itertools.chain.from_iterable(
-            (getattr(m, "__jsii_ifaces__", []) for m in type(obj).mro())
-        )
+        itertools.chain.from_iterable((getattr(m, "__jsii_ifaces__", []) for m in mro))
     )
-    for mro_klass in type(obj).mro():
+    for mro_klass in mro:
         if getattr(mro_klass, "__jsii_declared_type__", None) is not None:
             # There is a jsii declared type, so we reached a "well known" object,
             # and nothing from now on is an override.
             break
         if mro_klass is Object or mro_klass is object:
             break
+        if not getattr(type(mro_klass), "__jsii_reports_mutations__", False):
+            cacheable = False
 
         for name, item in mro_klass.__dict__.items():
             # Ignore all "special" members (name starting with __)...
@@ -127,7 +168,21 @@ def _get_overides(klass: Type, obj: Any) -> List[Override]:
                         )
                         break
 
-    return overrides
+    return overrides, cacheable
+
+
+@functools.lru_cache(maxsize=None)
+def _is_void_member(klass: Type, jsii_name: str) -> bool:
+    # Generated bindings declare "-> None" on methods that do not return anything,
+    # which is what tells us that nobody will ever read the result of invoking them.
+    for mro_klass in klass.mro():
+        for item in mro_klass.__dict__.values():
+            if (
+                inspect.isfunction(item)
+                and getattr(item, "__jsii_name__", None) == jsii_name
+            ):
+                return item.__annotations__.get("return", _nothing) in (None, "None")
+    return False
 
 
 def _recursize_dereference(kernel: "Kernel", d: Any) -> Any:
@@ -151,60 +206,210 @@ def _dereferenced(fn: Callable) -> Callable:
     return wrapped
 
 
-# We need to recurse through our data structure and look for anything that the JSII
-# doesn't natively handle. These items will be created as "Object" types in the JSII.
-def _make_reference_for_native(kernel: "Kernel", d: Any) -> Any:
-    if isinstance(d, dict):
-        return {
-            "$jsii.map": {
-                k: _make_reference_for_native(kernel, v) for k, v in d.items()
+# Values of these exact types are sent to the JSII as they are.
+_NATIVE_TYPES = frozenset([int, type(None), str, float, bool, datetime.datetime])
+
+
+def _native_value(kernel: "Kernel", d: Any) -> Any:
+    return d
+
+
+def _native_map(kernel: "Kernel", d: Any) -> Any:
+    for v in d.values():
+        if type(v) not in _NATIVE_TYPES:
+            return {
+                "$jsii.map": {
+                    k: _make_reference_for_native(kernel, v) for k, v in d.items()
+                }
             }
-        }
+    return {"$jsii.map": d}
+
+
+def _native_list(kernel: "Kernel", d: Any) -> Any:
+    # Lists of primitives (the common case) are passed on without copying them.
+    if type(d) is list:
+        for i in d:
+            if type(i) not in _NATIVE_TYPES:
+                break
+        else:
+            return d
+    return [_make_reference_for_native(kernel, i) for i in d]
+
+
+def _native_enum(kernel: "Kernel", d: Any) -> Any:
+    return {"$jsii.enum": f"{d.__jsii_type__}/{d.value}"}
 
-    elif isinstance(d, list):
-        return [_make_reference_for_native(kernel, i) for i in d]
 
-    if getattr(d, "__jsii_type__", None) is not None:
-        typeFqn = getattr(d, "__jsii_type__")
+def _reads_values(klass: Type, fields: Sequence[Tuple[str, str]]) -> bool:
+    # Whether the fields of klass are its _values, as opposed to properties that a
+    # subclass of a data type may have overridden.
+    if not issubclass(klass, _reference_map.JSIIStruct):
+        return False
+    for python_name, _ in fields:
+        owner = next((c for c in klass.__mro__ if python_name in vars(c)), None)
+        if owner is None or "__jsii_name_mapping__" not in vars(owner):
+            return False
+    return True
 
-        if isinstance(d, enum.Enum):
-            return {"$jsii.enum": f"{typeFqn}/{d.value}"}
 
-        # Ugly delayed import here because I can't solve the cyclic
-        # package dependency right now :(.
-        from .._runtime import python_jsii_mapping
+def _native_struct_of(klass: Type) -> Callable[["Kernel", Any], Any]:
+    fqn = klass.__jsii_type__
+    fields = tuple(klass.__jsii_name_mapping__.items())
 
-        mapping = python_jsii_mapping(d)
-        if mapping is not None:  # This means we are handling a data_type (aka Struct)
+    if _reads_values(klass, fields):
+
+        def _native_struct(kernel: "Kernel", d: Any) -> Any:
+            values = d._values
             return {
                 "$jsii.struct": {
-                    "fqn": typeFqn,
+                    "fqn": fqn,
                     "data": {
                         jsii_name: _make_reference_for_native(
-                            kernel, getattr(d, python_name)
+                            kernel, values.get(python_name)
                         )
-                        for python_name, jsii_name in mapping.items()
+                        for python_name, jsii_name in fields
                     },
                 }
             }
-        return d
 
-    elif isinstance(d, (int, type(None), str, float, bool, datetime.datetime)):
-        return d
+        return _native_struct
 
-    elif isinstance(d, (FunctionType, MethodType, BuiltinFunctionType, LambdaType)):
-        # Whether a given object is a function-like object.
-        # We won't use iscallable() since objects may implement __call__()
-        # but we still want to serialize them as normal.
-        raise JSIIError(
-            "Cannot pass function as argument here (did you mean to call this function?): %r"
-            % d
-        )
+    def _native_struct_properties(kernel: "Kernel", d: Any) -> Any:
+        return {
+            "$jsii.struct": {
+                "fqn": fqn,
+                "data": {
+                    jsii_name: _make_reference_for_native(
+                        kernel, getattr(d, python_name)
+                    )
+                    for python_name, jsii_name in fields
+                },
+            }
+        }
+
+    return _native_struct_properties
+
+
+def _native_function(kernel: "Kernel", d: Any) -> Any:
+    # Whether a given object is a function-like object.
+    # We won't use iscallable() since objects may implement __call__()
+    # but we still want to serialize them as normal.
+    raise JSIIError(
+        "Cannot pass function as argument here (did you mean to call this function?): %r"
+        % d
+    )
+
+
+def _native_object(kernel: "Kernel", d: Any) -> Any:
+    kernel.create(d.__class__, d)
+    _reference_map.register_reference(d)
+    return d
+
+
+def _native_handler_for(klass: Type) -> Callable[["Kernel", Any], Any]:
+    if issubclass(klass, dict):
+        return _native_map
+    elif issubclass(klass, list):
+        return _native_list
+    elif issubclass(klass, _reference_map.InterfaceDynamicProxy):
+        # Its __jsii_type__ is that of its delegates, which the class doesn't show.
+        return _native_value
+
+    if getattr(klass, "__jsii_type__", None) is not None:
+        if issubclass(klass, enum.Enum):
+            return _native_enum
+        if getattr(klass, "__jsii_name_mapping__", None) is not None:
+            # This means we are handling a data_type (aka Struct)
+            return _native_struct_of(klass)
+        return _native_value
+
+    elif issubclass(klass, (int, type(None), str, float, bool, datetime.datetime)):
+        return _native_value
+
+    elif issubclass(klass, (FunctionType, MethodType, BuiltinFunctionType, LambdaType)):
+        return _native_function
 
     else:
-        kernel.create(d.__class__, d)
-        _reference_map.register_reference(d)
-        return d
+        return _native_object
+
+
+# How values of each type are translated, see _native_handler_for.
+_native_handlers: Dict[Type, Callable[["Kernel", Any], Any]] = {
+    klass: _native_value for klass in _NATIVE_TYPES
+}
+_native_handlers[dict] = _native_map
+_native_handlers[list] = _native_list
+
+
+# We need to recurse through our data structure and look for anything that the JSII
+# doesn't natively handle. These items will be created as "Object" types in the JSII.
+def _make_reference_for_native(kernel: "Kernel", d: Any) -> Any:
+    klass = type(d)
+    try:
+        handler = _native_handlers[klass]
+    except KeyError:
+        handler = _native_handlers[klass] = _native_handler_for(klass)
+    return handler(kernel, d)
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class _CallbackPlan:
+    # The function the plan was made for, to tell when a method has been replaced.
+    function: Any
+    # The method's keyword-only parameters, which a trailing struct argument is
+    # expanded into.
+    keywords: Tuple[str, ...]
+    # How many arguments the method takes positionally.
+    positional: int
+    # The keywords each type of struct provides, see _struct_kwargs.
+    struct_keywords: Dict[Type, Tuple[str, ...]]
+
+
+_callback_plans: Dict[Tuple[Type, str], _CallbackPlan] = {}
+
+
+def _callback_plan(obj: Any, cookie: str, method: Any) -> _CallbackPlan:
+    key = (type(obj), cookie)
+    function = getattr(method, "__func__", method)
+    plan = _callback_plans.get(key)
+    if plan is None or plan.function is not function:
+        params = inspect.signature(method).parameters.values()
+        plan = _callback_plans[key] = _CallbackPlan(
+            function=function,
+            keywords=tuple(
+                param.name
+                for param in params
+                if param.kind == inspect.Parameter.KEYWORD_ONLY
+            ),
+            positional=sum(
+                1
+                for param in params
+                if param.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD
+                or param.kind == inspect.Parameter.POSITIONAL_ONLY
+            ),
+            struct_keywords={},
+        )
+    return plan
+
+
+def _struct_kwargs(plan: _CallbackPlan, struct: Any) -> Dict[str, Any]:
+    if not isinstance(struct, _reference_map.JSIIStruct):
+        return {
+            name: getattr(struct, name)
+            for name in plan.keywords
+            if hasattr(struct, name)
+        }
+
+    # The fields of data types are properties, so which of them a struct provides
+    # only depends on its class.
+    klass = type(struct)
+    try:
+        names = plan.struct_keywords[klass]
+    except KeyError:
+        names = plan.struct_keywords[klass] = tuple(
+            name for name in plan.keywords if hasattr(klass, name)
+        )
+    return {name: getattr(struct, name) for name in names}
 
 
 def _handle_callback(kernel: "Kernel", callback: Callback) -> Any:
@@ -212,36 +417,18 @@ def _handle_callback(kernel: "Kernel", callback: Callback) -> Any:
     if callback.invoke:
         obj = _reference_map.resolve_id(callback.invoke.objref.ref)
         method = getattr(obj, callback.cookie)
+        plan = _callback_plan(obj, callback.cookie, method)
         hydrated_args = [
-            _recursize_dereference(kernel, a) for a in callback.invoke.args or []
+            a if type(a) in _NATIVE_TYPES else _recursize_dereference(kernel, a)
+            for a in callback.invoke.args or []
         ]
 
         # If keyword arguments are accepted, we may need to turn a struct into keywords...
-        kwargs = {}  # No keyword arguments by default
-        params = inspect.signature(method).parameters
-        params_kwargs = [
-            name
-            for (name, param) in params.items()
-            if param.kind == inspect.Parameter.KEYWORD_ONLY
-        ]
-        if len(params_kwargs) > 0:
-            params_pos_count = len(
-                [
-                    param
-                    for param in params.values()
-                    if param.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD
-                    or param.kind == inspect.Parameter.POSITIONAL_ONLY
-                ]
-            )
-            if len(hydrated_args) > params_pos_count:
-                struct = hydrated_args.pop()
-                kwargs = {
-                    name: getattr(struct, name)
-                    for name in params_kwargs
-                    if hasattr(struct, name)
-                }
+        if plan.keywords and len(hydrated_args) > plan.positional:
+            struct = hydrated_args.pop()
+            return method(*hydrated_args, **_struct_kwargs(plan, struct))
 
-        return method(*hydrated_args, **kwargs)
+        return method(*hydrated_args)
     elif callback.get:
         obj = _reference_map.resolve_id(callback.get.objref.ref)
         return getattr(obj, callback.cookie)
@@ -257,6 +444,7 @@ def _callback_till_result(
     kernel: "Kernel", response: Callback, response_type: Type[KernelResponse]
 ) -> Any:
     while isinstance(response, Callback):
+        kernel._callbacks += 1
         try:
             result = _handle_callback(kernel, response)
         except Exception as exc:
@@ -277,6 +465,18 @@ def _callback_till_result(
 @attr.s(auto_attribs=True, frozen=True, slots=True)
 class Statistics:
     object_count: int
+    round_trips: int = 0
+    # Calls from the kernel into Python, and the round-trips spent completing them
+    callbacks: int = 0
+    callback_round_trips: int = 0
+    # Validation of the arguments passed to the generated bindings
+    type_checks: int = 0
+    type_checks_skipped: int = 0
+    type_checking_seconds: float = 0.0
+    # The kernel's console output relayed to our stderr and stdout, and dropped for
+    # not fitting in JSII_CONSOLE_BUFFER
+    console_bytes: int = 0
+    console_dropped_bytes: int = 0
 
 
 class Kernel(metaclass=Singleton):
@@ -291,8 +491,74 @@ class Kernel(metaclass=Singleton):
     #       on what the provider layer looks like.
 
     def __init__(self, provider_class: Type[BaseProvider] = ProcessProvider) -> None:
+        if (
+            provider_class is ProcessProvider
+            and os.environ.get("JSII_PROVIDER") == "asyncio"
+        ):
+            from .providers.aio import AsyncioProvider
+
+            provider_class = AsyncioProvider
         self.provider = provider_class()
 
+        # When pipelining, requests whose result is never read (property sets, and
+        # invocations of methods that return nothing) are queued by the provider and
+        # sent in batches, instead of costing a full round-trip each.
+        self._pipelining = os.environ.get("JSII_PIPELINE", "0") not in ("", "0")
+
+        # Once an object with overrides exists, any request may trigger a callback,
+        # which can't be served while other requests are queued behind it.
+        self._has_overrides = False
+
+        # See Statistics
+        self._callbacks = 0
+        self._callback_round_trips = 0
+
+        trace_path = os.environ.get("JSII_TRACE")
+        if trace_path:
+            tracing.start(trace_path)
+
+    def _can_defer(self) -> bool:
+        return (
+            self._pipelining
+            and self.provider.supports_pipelining
+            and not self._has_overrides
+        )
+
+    @contextlib.contextmanager
+    def pipelined(self) -> Iterator[None]:
+        previous = self._pipelining
+        self._pipelining = True
+        try:
+            yield
+        finally:
+            self._pipelining = previous
+            self.provider.flush()
+
+    def flush(self) -> None:
+        self.provider.flush()
+
+    @contextlib.contextmanager
+    def release_scope(self) -> Iterator[None]:
+        """Releases the objects the kernel handed out within this scope, on exit.
+
+        Objects are normally kept alive forever on both sides, as there is no telling
+        whether the other side still uses them. Within a release scope, the caller
+        promises that objects the kernel handed out during the scope are not going to
+        be handed out again after it (for example, when synthesizing many stacks one
+        after the other). On exit, those that are not reachable from Python anymore,
+        and that do not have overrides, are deleted from the kernel in batches.
+        """
+        _reference_map.open_release_scope()
+        try:
+            yield
+        finally:
+            released = _reference_map.close_release_scope()
+            # Deleting an object never triggers a callback, so these can always be
+            # batched.
+            for ref in released:
+                self.provider.delete_deferred(DeleteRequest(objref=ref))
+            self.provider.flush()
+
     # TODO: Do we want to return anything from this method? Is the return value useful
     #       to anyone?
     def load(self, name: str, version: str, tarball: str) -> None:
@@ -331,11 +597,15 @@ class Kernel(metaclass=Singleton):
         if args is None:
             args = []
 
+        overrides = _get_overides(klass, obj)
+        if overrides:
+            self._has_overrides = True
+
         response = self.provider.create(
             CreateRequest(
                 fqn=klass.__jsii_type__ or "Object",
                 args=_make_reference_for_native(self, args),
-                overrides=_get_overides(klass, obj),
+                overrides=overrides,
                 interfaces=[
                     iface.__jsii_type__
                     for iface in getattr(klass, "__jsii_ifaces__", [])
@@ -349,6 +619,9 @@ class Kernel(metaclass=Singleton):
 
         # Register this to the reference map already (so it's available within the rest of the __init__)
         _reference_map.register_reference(obj)
+        if overrides:
+            # The kernel may call back into this object at any time
+            _reference_map.pin_reference(obj.__jsii_ref__)
 
         return obj.__jsii_ref__
 
@@ -365,14 +638,27 @@ class Kernel(metaclass=Singleton):
         else:
             return response.value
 
+    def get_many(self, obj: Any, properties: Sequence[str]) -> List[Any]:
+        # Property reads are batched when nothing can call back into Python.
+        if self._has_overrides:
+            return [self.get(obj, property) for property in properties]
+
+        responses = self.provider.get_many(
+            [GetRequest(objref=obj.__jsii_ref__, property=p) for p in properties]
+        )
+        return [_recursize_dereference(self, r.value) for r in responses]
+
     def set(self, obj: Any, property: str, value: Any) -> None:
-        response = self.provider.set(
-            SetRequest(
-                objref=obj.__jsii_ref__,
-                property=property,
-                value=_make_reference_for_native(self, value),
-            )
+        request = SetRequest(
+            objref=obj.__jsii_ref__,
+            property=property,
+            value=_make_reference_for_native(self, value),
         )
+        if self._can_defer():
+            self.provider.set_deferred(request)
+            return
+
+        response = self.provider.set(request)
         if isinstance(response, Callback):
             _callback_till_result(self, response, SetResponse)
 
@@ -396,13 +682,16 @@ class Kernel(metaclass=Singleton):
         if args is None:
             args = []
 
-        response = self.provider.invoke(
-            InvokeRequest(
-                objref=obj.__jsii_ref__,
-                method=method,
-                args=_make_reference_for_native(self, args),
-            )
+        request = InvokeRequest(
+            objref=obj.__jsii_ref__,
+            method=method,
+            args=_make_reference_for_native(self, args),
         )
+        if self._can_defer() and _is_void_member(type(obj), method):
+            self.provider.invoke_deferred(request)
+            return None
+
+        response = self.provider.invoke(request)
         if isinstance(response, Callback):
             return _callback_till_result(self, response, InvokeResponse)
         else:
@@ -427,6 +716,82 @@ class Kernel(metaclass=Singleton):
         else:
             return response.result
 
+    async def _request_async(
+        self, request: KernelRequest, response_type: Type[KernelResponse]
+    ) -> Any:
+        import asyncio
+
+        # Requests are only in flight together when none of them can call back.
+        submit = getattr(self.provider, "submit")
+        response = await asyncio.wrap_future(
+            submit(request, response_type, exclusive=self._has_overrides)
+        )
+        if isinstance(response, Callback):
+            return _callback_till_result(self, response, response_type)
+        elif isinstance(response, InvokeResponse):
+            return response.result
+        else:
+            return response.value
+
+    def _can_submit(self) -> bool:
+        return hasattr(self.provider, "submit")
+
+    async def invoke_async(
+        self, obj: Any, method: str, args: Optional[List[Any]] = None
+    ) -> Any:
+        """Like invoke, but other tasks can run while the kernel works on it.
+
+        With the asyncio provider (JSII_PROVIDER=asyncio), requests that can't call back
+        into Python are in flight together. Other providers serve them synchronously.
+        """
+        if not self._can_submit():
+            return self.invoke(obj, method, args)
+
+        request = InvokeRequest(
+            objref=obj.__jsii_ref__,
+            method=method,
+            args=_make_reference_for_native(self, args or []),
+        )
+        return _recursize_dereference(
+            self, await self._request_async(request, InvokeResponse)
+        )
+
+    async def sinvoke_async(
+        self, klass: Type, method: str, args: Optional[List[Any]] = None
+    ) -> Any:
+        """Like sinvoke, see invoke_async."""
+        if not self._can_submit():
+            return self.sinvoke(klass, method, args)
+
+        request = StaticInvokeRequest(
+            fqn=klass.__jsii_type__,
+            method=method,
+            args=_make_reference_for_native(self, args or []),
+        )
+        return _recursize_dereference(
+            self, await self._request_async(request, InvokeResponse)
+        )
+
+    async def get_async(self, obj: Any, property: str) -> Any:
+        """Like get, see invoke_async."""
+        if not self._can_submit():
+            return self.get(obj, property)
+
+        request = GetRequest(objref=obj.__jsii_ref__, property=property)
+        return _recursize_dereference(
+            self, await self._request_async(request, GetResponse)
+        )
+
+    async def sget_async(self, klass: Type, property: str) -> Any:
+        """Like sget, see invoke_async."""
+        if not self._can_submit():
+            return self.sget(klass, property)
+
+        request = StaticGetRequest(fqn=klass.__jsii_type__, property=property)
+        return _recursize_dereference(
+            self, await self._request_async(request, GetResponse)
+        )
+
     @_dereferenced
     def complete(self, cbid: str, err: Optional[str], result: Any) -> Any:
         return self.provider.complete(
@@ -442,12 +807,39 @@ class Kernel(metaclass=Singleton):
         result: Any,
         response_type: Type[KernelResponse],
     ) -> Any:
-        return self.provider.sync_complete(
-            CompleteRequest(
-                cbid=cbid, err=err, result=_make_reference_for_native(self, result)
-            ),
-            response_type=response_type,
+        request = CompleteRequest(
+            cbid=cbid, err=err, result=_make_reference_for_native(self, result)
         )
+        round_trips = self.provider.round_trips
+        try:
+            return self.provider.sync_complete(request, response_type=response_type)
+        finally:
+            self._callback_round_trips += self.provider.round_trips - round_trips
+
+    def _complete_callbacks(self, callbacks: Sequence[Callback]) -> None:
+        # Each async callback is completed before the next one is served, so the
+        # kernel sees them, and the requests they make, in the same order as before.
+        # The completions are deferred though, so those of callbacks that don't call
+        # into the kernel themselves are sent together.
+        for callback in callbacks:
+            self._callbacks += 1
+            try:
+                result = _handle_callback(self, callback)
+            except Exception as exc:
+                # TODO: Maybe we want to print the whole traceback here?
+                request = CompleteRequest(cbid=callback.cbid, err=str(exc))
+            else:
+                request = CompleteRequest(
+                    cbid=callback.cbid,
+                    result=_make_reference_for_native(self, result),
+                )
+            self.provider.complete_deferred(request)
+
+        round_trips = self.provider.round_trips
+        try:
+            self.provider.flush()
+        finally:
+            self._callback_round_trips += self.provider.round_trips - round_trips
 
     @_dereferenced
     def ainvoke(self, obj: Any, method: str, args: Optional[List[Any]] = None) -> Any:
@@ -466,21 +858,7 @@ class Kernel(metaclass=Singleton):
 
         callbacks = self.provider.callbacks(CallbacksRequest()).callbacks
         while callbacks:
-            for callback in callbacks:
-                try:
-                    result = _handle_callback(self, callback)
-                except Exception as exc:
-                    # TODO: Maybe we want to print the whole traceback here?
-                    complete = self.provider.complete(
-                        CompleteRequest(cbid=callback.cbid, err=str(exc))
-                    )
-                else:
-                    complete = self.provider.complete(
-                        CompleteRequest(cbid=callback.cbid, result=result)
-                    )
-
-                assert complete.cbid == callback.cbid
-
+            self._complete_callbacks(callbacks)
             callbacks = self.provider.callbacks(CallbacksRequest()).callbacks
 
         return self.provider.end(EndRequest(promiseid=promise.promiseid)).result
@@ -488,4 +866,17 @@ class Kernel(metaclass=Singleton):
     def stats(self):
         resp = self.provider.stats(StatsRequest())
 
-        return Statistics(object_count=resp.objectCount)
+        checked, skipped, seconds = _type_checking.type_checking_stats()
+        console = self.provider.console
+
+        return Statistics(
+            object_count=resp.objectCount,
+            round_trips=self.provider.round_trips,
+            callbacks=self._callbacks,
+            callback_round_trips=self._callback_round_trips,
+            type_checks=checked,
+            type_checks_skipped=skipped,
+            type_checking_seconds=seconds,
+            console_bytes=console.relayed_bytes if console is not None else 0,
+            console_dropped_bytes=console.dropped_bytes if console is not None else 0,
+        )
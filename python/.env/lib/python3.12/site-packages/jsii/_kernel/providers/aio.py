@@ -0,0 +1,481 @@
+# A kernel provider driving the node process with asyncio.
+#
+# The kernel reads its requests from stdin one after the other, and answers each of
+# them in turn. ProcessProvider waits for each response before sending the next
+# request. This provider instead writes requests as soon as they are submitted, gives
+# each of them an id, and matches the responses back to them as they come in, from an
+# event loop running in a thread of its own. Requests that can't call back into Python
+# can so be in flight together, and awaited (see Kernel.invoke_async) while Python
+# carries on with other work.
+#
+# Responses carry no id: the kernel answers requests strictly in the order it reads
+# them, so they are matched to their requests first-in first-out. Every request is
+# written in the same step (with nothing awaited in between) as the future of its
+# response is queued in _awaiting, and every line the kernel writes is one response.
+#
+# A callback blocks the kernel until it is completed. While it waits, the kernel
+# serves any other request it reads, and the completion must be the first line it
+# reads that isn't one. Requests that may call back are therefore sent exclusively:
+# once every request in flight has been answered, and holding back any other request
+# until they (and their callbacks) are done. The requests that the thread serving one
+# of these callbacks makes in the meantime are written on the same exchange, as the
+# kernel reads them while it waits for the completion. Should a request that was sent
+# along with others call back anyway, the callback is completed with an error right
+# away, behind those others, and the request's own response is then awaited.
+#
+# Select it with JSII_PROVIDER=asyncio.
+import asyncio
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import itertools
+import os
+import platform
+import subprocess
+import threading
+
+from typing import Any, Deque, List, Optional, Sequence, Tuple, Type, Union, cast
+
+from ...errors import JSIIError
+from .base import BaseProvider
+from .console import ConsoleRelay
+from .node_options import (
+    NodeOptions,
+    node_options,
+    read_peak_rss,
+    report_peak_rss,
+)
+from .process import (
+    _CompleteRequest,
+    _ENCODERS,
+    _check_hello,
+    _decode,
+    _node_command,
+    _response_serializer,
+    _select_codec,
+)
+from ..types import (
+    LoadRequest,
+    LoadResponse,
+    CreateRequest,
+    CreateResponse,
+    GetRequest,
+    GetResponse,
+    InvokeRequest,
+    InvokeResponse,
+    GetScriptCommandRequest,
+    GetScriptCommandResponse,
+    InvokeScriptRequest,
+    InvokeScriptResponse,
+    DeleteRequest,
+    DeleteResponse,
+    SetRequest,
+    SetResponse,
+    StaticGetRequest,
+    StaticInvokeRequest,
+    StaticSetRequest,
+    BeginRequest,
+    BeginResponse,
+    EndRequest,
+    EndResponse,
+    CallbacksRequest,
+    CallbacksResponse,
+    CompleteRequest,
+    CompleteResponse,
+    StatsRequest,
+    StatsResponse,
+    Callback,
+    KernelRequest,
+    KernelResponse,
+)
+
+
+# Responses can be arbitrarily large (e.g. synthesized templates), while asyncio
+# streams only buffer 64KiB lines by default.
+_LINE_LIMIT = 1 << 30
+
+
+class _Exchange:
+    """A request (and its callbacks) that the kernel has yet to finish with."""
+
+    def __init__(self, exclusive: bool, thread: int) -> None:
+        self.id = next(_exchange_ids)
+        self.exclusive = exclusive
+        # The thread that made the request, and serves its callbacks
+        self.thread = thread
+        # The requests written on this exchange that have yet to be answered: the one
+        # that began it, and those made from its callbacks
+        self.depth = 1
+        # Whether the kernel is waiting for a callback to be completed
+        self.in_callback = False
+
+
+_exchange_ids = itertools.count()
+
+
+class AsyncioProvider(BaseProvider):
+    supports_pipelining = True
+
+    def __init__(self) -> None:
+        self._serializer = _response_serializer()
+        self._codec = _select_codec()
+        self._ctx_stack = contextlib.ExitStack()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._process: Any = None
+
+        # The responses we are waiting for, in the order the kernel is going to send
+        # them
+        self._awaiting: Deque[Tuple[int, "asyncio.Future[Any]"]] = collections.deque()
+        # The exchanges in flight, and the exclusive one, if any
+        self._in_flight = 0
+        self._exclusive: Optional[_Exchange] = None
+        # Notified when an exchange ends, for those waiting to begin one
+        self._turn: Optional[asyncio.Condition] = None
+        self._waiting = 0
+
+        # Deferred requests whose response we are not waiting for
+        self._deferred: List["concurrent.futures.Future[Any]"] = []
+        self._round_trips = 0
+
+        self._console = ConsoleRelay()
+        self._node_options = NodeOptions()
+        self.peak_rss: Optional[int] = None
+        self._console_sink: Optional["asyncio.Future[None]"] = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    name="jsii.asyncio_provider", target=loop.run_forever, daemon=True
+                )
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+                self._loop = loop
+                atexit.register(self.stop)
+        return self._loop
+
+    async def _start(self) -> None:
+        environ = os.environ.copy()
+        environ["JSII_AGENT"] = f"Python/{platform.python_version()}"
+
+        self._turn = asyncio.Condition()
+        self._node_options = node_options(environ)
+        self._process = await asyncio.create_subprocess_exec(
+            *_node_command(environ, self._ctx_stack, self._node_options),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=environ,
+            limit=_LINE_LIMIT,
+        )
+
+        hello = self._codec.loads(await self._process.stdout.readline())
+        _check_hello(hello["hello"])
+
+        asyncio.ensure_future(self._read_responses())
+        self._console_sink = asyncio.ensure_future(self._relay_console())
+
+    async def _read_responses(self) -> None:
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                break
+            _, future = self._awaiting.popleft()
+            if not future.cancelled():
+                future.set_result(self._codec.loads(line))
+
+        error = JSIIError("The kernel process exited")
+        while self._awaiting:
+            _, future = self._awaiting.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def _relay_console(self) -> None:
+        while True:
+            line = await self._process.stderr.readline()
+            if not line:
+                break
+            self._console.relay(line)
+
+    def stop(self) -> None:
+        atexit.unregister(self.stop)
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            self.flush()
+        finally:
+            asyncio.run_coroutine_threadsafe(self._stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._console.close()
+            self._ctx_stack.close()
+
+    async def _stop(self) -> None:
+        self.peak_rss = read_peak_rss(self._process.pid)
+        stdin = self._process.stdin
+        stdin.write(b'{"exit":0}\n')
+        with contextlib.suppress(ConnectionError):
+            await stdin.drain()
+        stdin.close()
+        try:
+            # Profiles are written out as node exits, which takes a while.
+            timeout = 60 if self._node_options.profiling else 5
+            await asyncio.wait_for(self._process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._process.terminate()
+        if self._node_options.report_rss:
+            report_peak_rss(self.peak_rss)
+        if self._console_sink is not None:
+            # Relay whatever the kernel wrote before exiting.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._console_sink, timeout=5)
+
+    def _may_begin(self, exclusive: bool) -> bool:
+        return self._exclusive is None and (not exclusive or self._in_flight == 0)
+
+    async def _begin(self, exclusive: bool, thread: int) -> _Exchange:
+        assert self._turn is not None
+        if not self._may_begin(exclusive):
+            async with self._turn:
+                self._waiting += 1
+                try:
+                    await self._turn.wait_for(lambda: self._may_begin(exclusive))
+                finally:
+                    self._waiting -= 1
+
+        # Nothing is awaited from here on, so no other exchange can begin meanwhile.
+        exchange = _Exchange(exclusive, thread)
+        self._in_flight += 1
+        if exclusive:
+            self._exclusive = exchange
+        return exchange
+
+    async def _end(self, exchange: _Exchange) -> None:
+        assert self._turn is not None
+        self._in_flight -= 1
+        if self._exclusive is exchange:
+            self._exclusive = None
+        if self._waiting:
+            async with self._turn:
+                self._turn.notify_all()
+
+    async def _finish(self, exchange: _Exchange) -> None:
+        """Records that the kernel answered the innermost request of exchange."""
+        exchange.depth -= 1
+        if exchange.depth == 0:
+            await self._end(exchange)
+        else:
+            # Back to the callback that made the request
+            exchange.in_callback = True
+
+    async def _send(
+        self,
+        exchange: _Exchange,
+        request: KernelRequest,
+        response_type: Type[KernelResponse],
+    ) -> KernelResponse:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Requests written while others are in flight share their round-trip.
+        if not self._awaiting:
+            self._round_trips += 1
+        # Responses come back in the order the requests were written, and nothing
+        # is awaited between queuing the future and writing the request.
+        self._awaiting.append((exchange.id, future))
+        self._process.stdin.write(
+            b"%b\n" % self._codec.dumps(_ENCODERS[type(request)](request))
+        )
+        await self._process.stdin.drain()
+
+        try:
+            response = _decode(self._serializer, await future, response_type)
+        except BaseException:
+            await self._finish(exchange)
+            raise
+
+        if isinstance(response, Callback):
+            if not exchange.exclusive:
+                message = (
+                    "A concurrent request triggered a callback (%s), "
+                    "this is not supported"
+                    % response.cookie
+                )
+                complete = CompleteRequest(cbid=response.cbid, err=message)
+                with contextlib.suppress(Exception):
+                    # Fails the request, unless it calls back again.
+                    await self._send(
+                        exchange, _CompleteRequest(complete=complete), response_type
+                    )
+                raise JSIIError(message)
+            # The exchange goes on with the completion of the callback, see
+            # sync_complete
+            exchange.in_callback = True
+        else:
+            await self._finish(exchange)
+        return response
+
+    async def _request(
+        self,
+        request: KernelRequest,
+        response_type: Type[KernelResponse],
+        exclusive: bool,
+        thread: int,
+    ) -> KernelResponse:
+        exchange = self._exclusive
+        if exchange is not None and exchange.in_callback and exchange.thread == thread:
+            # Made while serving a callback, which the kernel waits for: it must be
+            # written now, on the same exchange, rather than wait for the next turn.
+            exchange.in_callback = False
+            exchange.depth += 1
+        else:
+            exchange = await self._begin(exclusive, thread)
+        return await self._send(exchange, request, response_type)
+
+    async def _complete(
+        self, request: CompleteRequest, response_type: Type[KernelResponse]
+    ) -> KernelResponse:
+        exchange = self._exclusive
+        if exchange is None or not exchange.in_callback:
+            raise JSIIError("There is no callback to complete (%s)" % request.cbid)
+        exchange.in_callback = False
+        return await self._send(
+            exchange, _CompleteRequest(complete=request), response_type
+        )
+
+    def submit(
+        self,
+        request: KernelRequest,
+        response_type: Type[KernelResponse],
+        exclusive: bool = True,
+    ) -> "concurrent.futures.Future[Any]":
+        """Sends request to the kernel, and returns the future of its response.
+
+        Requests that can't call back into Python may be sent with exclusive=False,
+        so that they are in flight together with other such requests.
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(
+            self._request(request, response_type, exclusive, threading.get_ident()),
+            loop,
+        )
+
+    def _call(
+        self, request: KernelRequest, response_type: Type[KernelResponse]
+    ) -> Any:
+        response = self.submit(request, response_type).result()
+        self._raise_deferred_error()
+        return response
+
+    def _raise_deferred_error(self) -> None:
+        done = [future for future in self._deferred if future.done()]
+        if not done:
+            return
+        self._deferred = [future for future in self._deferred if not future.done()]
+        for future in done:
+            error = future.exception()
+            if error is not None:
+                raise error
+
+    def load(self, request: LoadRequest) -> LoadResponse:
+        return self._call(request, LoadResponse)
+
+    def getScriptCommand(
+        self, request: GetScriptCommandRequest
+    ) -> GetScriptCommandResponse:
+        return self._call(request, GetScriptCommandResponse)
+
+    def invokeBinScript(self, request: InvokeScriptRequest) -> InvokeScriptResponse:
+        return self._call(request, InvokeScriptResponse)
+
+    def create(self, request: CreateRequest) -> CreateResponse:
+        return self._call(request, CreateResponse)
+
+    def get(self, request: GetRequest) -> GetResponse:
+        return self._call(request, GetResponse)
+
+    def set(self, request: SetRequest) -> SetResponse:
+        return self._call(request, SetResponse)
+
+    def get_many(self, requests: Sequence[GetRequest]) -> List[GetResponse]:
+        futures = [self.submit(r, GetResponse, exclusive=False) for r in requests]
+        return [future.result() for future in futures]
+
+    def sget(self, request: StaticGetRequest) -> GetResponse:
+        return self._call(request, GetResponse)
+
+    def sset(self, request: StaticSetRequest) -> SetResponse:
+        return self._call(request, SetResponse)
+
+    def invoke(self, request: InvokeRequest) -> Union[InvokeResponse, Callback]:
+        return self._call(request, InvokeResponse)
+
+    def sinvoke(self, request: StaticInvokeRequest) -> InvokeResponse:
+        return self._call(request, InvokeResponse)
+
+    def delete(self, request: DeleteRequest) -> DeleteResponse:
+        return self._call(request, DeleteResponse)
+
+    def begin(self, request: BeginRequest) -> BeginResponse:
+        return self._call(request, BeginResponse)
+
+    def end(self, request: EndRequest) -> EndResponse:
+        return self._call(request, EndResponse)
+
+    def callbacks(self, request: CallbacksRequest) -> CallbacksResponse:
+        return self._call(request, CallbacksResponse)
+
+    def complete(self, request: CompleteRequest) -> CompleteResponse:
+        return self._call(request, CompleteResponse)
+
+    def _defer(
+        self, request: KernelRequest, response_type: Type[KernelResponse]
+    ) -> None:
+        self._deferred.append(self.submit(request, response_type, exclusive=False))
+
+    def invoke_deferred(self, request: InvokeRequest) -> None:
+        self._defer(request, InvokeResponse)
+
+    def set_deferred(self, request: SetRequest) -> None:
+        self._defer(request, SetResponse)
+
+    def delete_deferred(self, request: DeleteRequest) -> None:
+        self._defer(request, DeleteResponse)
+
+    def complete_deferred(self, request: CompleteRequest) -> None:
+        # Completing an async callback can't call back into Python.
+        self._defer(request, CompleteResponse)
+
+    def flush(self) -> None:
+        deferred, self._deferred = self._deferred, []
+        concurrent.futures.wait(deferred)
+        for future in deferred:
+            error = future.exception()
+            if error is not None:
+                raise error
+
+    @property
+    def round_trips(self) -> int:
+        return self._round_trips
+
+    @property
+    def console(self) -> Optional[ConsoleRelay]:
+        return self._console
+
+    def sync_complete(
+        self, request: CompleteRequest, response_type: Type[KernelResponse]
+    ) -> Union[InvokeResponse, GetResponse]:
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(
+            self._complete(request, response_type), loop
+        )
+        return cast(Union[InvokeResponse, GetResponse], future.result())
+
+    def stats(self, request: Optional[StatsRequest] = None) -> StatsResponse:
+        if request is None:
+            request = StatsRequest()
+        return self._call(request, StatsResponse)
@@ -1,7 +1,9 @@
 import abc
 
-from typing import Optional, Union, Type
+from typing import Any, List, Optional, Sequence, Union, Type
 
+from .console import ConsoleRelay
+from ...errors import JSIIError
 from ..types import (
     LoadRequest,
     LoadResponse,
@@ -44,6 +46,10 @@ class BaseProvider(metaclass=abc.ABCMeta):
     # that layer ontop of the Provider will provide a translation layer that make this
     # much more Pythonic.
 
+    # Whether this provider can queue requests whose response is not needed, and send
+    # them in batches. The Kernel only defers requests when this is True.
+    supports_pipelining = False
+
     @abc.abstractmethod
     def load(self, request: LoadRequest) -> LoadResponse: ...
 
@@ -98,3 +104,54 @@ class BaseProvider(metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
     def stats(self, request: Optional[StatsRequest] = None) -> StatsResponse: ...
+
+    # Providers that can't queue or batch requests send them one at a time. Like
+    # those that do, they fail the callbacks that these requests trigger, as nothing
+    # would serve them.
+
+    def invoke_deferred(self, request: InvokeRequest) -> None:
+        self._fail_callbacks(self.invoke(request), InvokeResponse)
+
+    def set_deferred(self, request: SetRequest) -> None:
+        self._fail_callbacks(self.set(request), SetResponse)
+
+    def delete_deferred(self, request: DeleteRequest) -> None:
+        self.delete(request)
+
+    def get_many(self, requests: Sequence[GetRequest]) -> List[GetResponse]:
+        return [self._fail_callbacks(self.get(r), GetResponse) for r in requests]
+
+    def complete_deferred(self, request: CompleteRequest) -> None:
+        self.complete(request)
+
+    def _fail_callbacks(
+        self, response: Any, response_type: Type[KernelResponse]
+    ) -> Any:
+        if not isinstance(response, Callback):
+            return response
+
+        message = (
+            "A deferred request triggered a callback (%s), this is not supported"
+            % response.cookie
+        )
+        while isinstance(response, Callback):
+            complete = CompleteRequest(cbid=response.cbid, err=message)
+            try:
+                response = self.sync_complete(complete, response_type)
+            except Exception:
+                # The request fails along with its callback.
+                break
+        raise JSIIError(message)
+
+    def flush(self) -> None:
+        # Nothing to do for providers that never defer requests.
+        pass
+
+    @property
+    def round_trips(self) -> int:
+        return 0
+
+    @property
+    def console(self) -> Optional[ConsoleRelay]:
+        # The relay of the kernel's console output, for providers that have one.
+        return None
@@ -0,0 +1,164 @@
+# The kernel writes the console output of the JavaScript code it runs to its stderr,
+# one JSON object per line, e.g. {"stderr":"<base64>"} or {"stdout":"<base64>"}. It
+# is relayed to our own stderr and stdout from here.
+#
+# Lines are decoded by whoever reads them from the kernel, then written out in batches
+# by a separate thread, so that a slow terminal or log collector never keeps us from
+# draining the kernel's stderr (node would otherwise block writing to it, and with it
+# the synth). Output is buffered without limit, unless JSII_CONSOLE_BUFFER is set to a
+# number of bytes: output that doesn't fit in the buffer then is dropped, and a note
+# says how much was.
+import base64
+import itertools
+import json
+import os
+import sys
+import threading
+import warnings
+
+from typing import Any, List, Optional, Tuple
+
+_STDERR = b'{"stderr":"'
+_STDOUT = b'{"stdout":"'
+
+
+def _max_buffer() -> Optional[int]:
+    setting = os.environ.get("JSII_CONSOLE_BUFFER", "")
+    if not setting:
+        return None
+    try:
+        max_buffer = int(setting)
+    except ValueError:
+        max_buffer = -1
+    if max_buffer < 0:
+        warnings.warn(
+            f"Invalid JSII_CONSOLE_BUFFER: {setting!r} (expected a number of bytes), "
+            "console output is buffered without limit"
+        )
+        return None
+    return max_buffer
+
+
+def _decode(line: bytes) -> Tuple[str, bytes]:
+    """Returns the stream the line is for ("stderr" or "stdout"), and its data."""
+    line = line.rstrip(b"\r\n")
+    # The kernel always writes its lines the same way, which spares parsing them.
+    if line.endswith(b'"}'):
+        if line.startswith(_STDERR):
+            return "stderr", base64.b64decode(line[len(_STDERR) : -2])
+        if line.startswith(_STDOUT):
+            return "stdout", base64.b64decode(line[len(_STDOUT) : -2])
+    try:
+        console = json.loads(line)
+        if console.get("stderr") is not None:
+            return "stderr", base64.b64decode(console["stderr"])
+        if console.get("stdout") is not None:
+            return "stdout", base64.b64decode(console["stdout"])
+    except Exception:
+        pass
+    # Not console output, e.g. something node itself printed.
+    return "stderr", line + b"\n"
+
+
+def _write(stream: Any, data: bytes) -> None:
+    # sys.stdout and sys.stderr may have been replaced, e.g. by pytest's capture.
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None:
+        buffer.write(data)
+    else:
+        stream.write(data.decode("utf-8", "replace"))
+
+
+def _write_flushed(stream: Any, data: bytes) -> bool:
+    try:
+        _write(stream, data)
+        stream.flush()
+    except Exception:
+        return False
+    return True
+
+
+class ConsoleRelay:
+    def __init__(self, max_buffer: Optional[int] = None) -> None:
+        self.max_buffer = max_buffer if max_buffer is not None else _max_buffer()
+
+        # Output that was read and decoded, and not written out yet, with the name of
+        # its stream ("stderr" or "stdout")
+        self._chunks: List[Tuple[str, bytes]] = []
+        self._buffered = 0
+        self._ready = threading.Condition()
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+        self.lines = 0
+        self.stderr_bytes = 0
+        self.stdout_bytes = 0
+        self.dropped_bytes = 0
+        # Dropped since the last note about it was written out
+        self._unreported_drops = 0
+
+    @property
+    def relayed_bytes(self) -> int:
+        return self.stderr_bytes + self.stdout_bytes
+
+    def relay(self, line: bytes) -> None:
+        """Queues a line of the kernel's stderr to be written out."""
+        stream, data = _decode(line)
+        with self._ready:
+            self.lines += 1
+            limit = self.max_buffer
+            if limit is not None and self._buffered + len(data) > limit:
+                self.dropped_bytes += len(data)
+                self._unreported_drops += len(data)
+            else:
+                self._chunks.append((stream, data))
+                self._buffered += len(data)
+            # Either way, there is something to write out, if only the note about
+            # the dropped output.
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    name="jsii.console_relay", target=self._write_out, daemon=True
+                )
+                self._writer.start()
+            self._ready.notify()
+
+    def close(self, timeout: Optional[float] = 5) -> None:
+        """Writes out what is left of the output, and stops the writer thread."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+            writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout)
+
+    def _write_out(self) -> None:
+        while True:
+            with self._ready:
+                while not (self._chunks or self._unreported_drops or self._closed):
+                    self._ready.wait()
+                chunks, self._chunks = self._chunks, []
+                self._buffered = 0
+                dropped, self._unreported_drops = self._unreported_drops, 0
+                closed = self._closed
+
+            self._write_chunks(chunks)
+            if dropped:
+                note = (
+                    f"[jsii] {dropped} bytes of console output were dropped, as they "
+                    f"did not fit in JSII_CONSOLE_BUFFER ({self.max_buffer} bytes)\n"
+                )
+                _write_flushed(sys.stderr, note.encode())
+
+            if closed and not chunks and not dropped:
+                return
+
+    def _write_chunks(self, chunks: List[Tuple[str, bytes]]) -> None:
+        # Consecutive chunks of the same stream get a single write, so that both
+        # streams stay interleaved as the kernel wrote them.
+        for name, run in itertools.groupby(chunks, key=lambda chunk: chunk[0]):
+            data = b"".join(chunk for _, chunk in run)
+            if name == "stderr":
+                if _write_flushed(sys.stderr, data):
+                    self.stderr_bytes += len(data)
+            elif _write_flushed(sys.stdout, data):
+                self.stdout_bytes += len(data)
@@ -0,0 +1,340 @@
+# A long-lived daemon handing out pre-warmed kernel processes over a Unix socket.
+#
+# Starting the kernel costs a node process start-up, and loading every assembly the
+# program uses (which for aws-cdk-lib is most of the start-up time). The daemon keeps
+# a spare kernel process per kind of client (same node command, environment and
+# working directory), with the assemblies those clients loaded in the past already
+# loaded. When a client connects, it receives the pipes of that spare process, and
+# then talks to it directly, exactly as if it had spawned it. Each session gets its
+# own node process, so sessions are fully isolated from each other. Once the client is
+# done with the process, the daemon reaps it, and tells the client its exit status.
+#
+# Start the daemon with:
+#
+#     python -m jsii._kernel.providers.daemon /path/to/jsii.sock
+#
+# and set JSII_KERNEL_DAEMON=/path/to/jsii.sock for the programs that should use it.
+import argparse
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import select
+import socket
+import subprocess
+import threading
+
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Sequence
+
+
+# Environment variables that change all the time, without having any incidence on
+# the kernel, and must not prevent clients from sharing spare processes.
+_VOLATILE_ENV = frozenset(["PYTEST_CURRENT_TEST"])
+
+# How many spare processes are kept around at most (one per kind of client).
+_MAX_SPARES = 4
+
+
+def _session_key(spec: Mapping[str, Any]) -> str:
+    env = {k: v for k, v in spec["env"].items() if k not in _VOLATILE_ENV}
+    data = json.dumps([spec["argv"], spec["cwd"], env], sort_keys=True)
+    return hashlib.sha256(data.encode("utf8")).hexdigest()
+
+
+class DaemonSession:
+    """A kernel process obtained from the daemon.
+
+    This offers the subset of the subprocess.Popen interface that _NodeProcess uses.
+    The daemon owns the process, and reaps it once we are done with it.
+    """
+
+    def __init__(
+        self, path: str, argv: Sequence[str], env: Mapping[str, str], cwd: str
+    ) -> None:
+        self.args = list(argv)
+        # Set by wait(), unless the daemon (an older one) doesn't tell.
+        self.returncode: Optional[int] = None
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        fds: List[int] = []
+        try:
+            self._socket.connect(path)
+            spec = {"argv": list(argv), "env": dict(env), "cwd": cwd}
+            self._socket.sendall(json.dumps(spec).encode("utf8") + b"\n")
+
+            data, fds, _, _ = socket.recv_fds(self._socket, 64 * 1024, 3)
+            try:
+                response = json.loads(data)
+                if "error" in response:
+                    raise OSError(f"jsii kernel daemon: {response['error']}")
+                self.pid: int = response["pid"]
+                # The daemon already consumed the runtime's greeting
+                self.hello: str = response["hello"]
+                if len(fds) != 3:
+                    raise ValueError(f"received {len(fds)} file descriptors")
+            except (ValueError, KeyError, TypeError) as e:
+                # A daemon that closed the connection, or that we don't understand:
+                # an OSError lets the caller start a kernel of its own instead.
+                raise OSError(f"jsii kernel daemon: invalid reply ({e!r})") from e
+        except BaseException:
+            for fd in fds:
+                os.close(fd)
+            self._socket.close()
+            raise
+
+        self.stdin = os.fdopen(fds[0], "wb")
+        self.stdout = os.fdopen(fds[1], "rb")
+        self.stderr = os.fdopen(fds[2], "rb")
+
+    def loaded(self, name: str, version: str, tarball: str) -> None:
+        # Lets the daemon know which assemblies to pre-load for our next session.
+        message = {"load": {"name": name, "version": version, "tarball": tarball}}
+        try:
+            self._socket.sendall(json.dumps(message).encode("utf8") + b"\n")
+        except OSError:
+            # This is only an optimization for future sessions.
+            pass
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        if self._socket.fileno() == -1:
+            return self.returncode
+
+        # Once we stop writing, the daemon reaps the process, and replies with its
+        # exit status before closing the connection.
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.shutdown(socket.SHUT_WR)
+            with self._socket.makefile("rb") as reader:
+                for line in reader:
+                    message = json.loads(line)
+                    if "exit" in message:
+                        self.returncode = message["exit"]
+        except socket.timeout:
+            raise subprocess.TimeoutExpired(self.args, timeout or 0) from None
+        except (OSError, ValueError):
+            pass
+        self._socket.close()
+        return self.returncode
+
+    def terminate(self) -> None:
+        self._socket.close()
+
+
+class _WarmKernel:
+    def __init__(self, spec: Mapping[str, Any], loads: Sequence[Mapping[str, str]]):
+        # Unbuffered, so that we never read past the responses we are waiting for;
+        # anything else the process writes belongs to the client.
+        self.process = subprocess.Popen(
+            spec["argv"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=spec["env"],
+            cwd=spec["cwd"],
+            bufsize=0,
+        )
+        # What the process writes to its stderr until it is handed over (such as
+        # node's warnings) is discarded, so that it neither fills the pipe, which
+        # would block the process, nor reaches a client it wasn't meant for.
+        self._handed_over = threading.Event()
+        self._stderr_drain = threading.Thread(
+            name="daemon.stderr_drain", target=self._drain_stderr, daemon=True
+        )
+        self._stderr_drain.start()
+        try:
+            self.hello: str = self._read()["hello"]
+            self.loads: List[Mapping[str, str]] = []
+            for load in loads:
+                self._load(load)
+        except BaseException:
+            self.discard()
+            raise
+
+    def _drain_stderr(self) -> None:
+        assert self.process.stderr is not None
+        fd = self.process.stderr.fileno()
+        while not self._handed_over.is_set():
+            readable, _, _ = select.select([fd], [], [], 0.1)
+            if readable and not os.read(fd, 64 * 1024):
+                # The process exited
+                return
+
+    def _read(self) -> Dict[str, Any]:
+        assert self.process.stdout is not None
+        line = self.process.stdout.readline()
+        if not line:
+            raise OSError("the kernel process exited unexpectedly")
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise OSError(f"the kernel process wrote {line!r}") from e
+
+    def _load(self, load: Mapping[str, str]) -> None:
+        assert self.process.stdin is not None
+        request = {"api": "load", **load}
+        self.process.stdin.write(json.dumps(request).encode("utf8") + b"\n")
+        response = self._read()
+        ok = response.get("ok")
+        if isinstance(ok, dict) and ok.get("assembly") == load["name"]:
+            self.loads.append(load)
+        elif "error" not in response:
+            # Not the response to our request, so the process can't be trusted.
+            raise OSError(f"unexpected response to loading {load['name']}: {response}")
+        # Otherwise, the client will get the same error when loading it itself.
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def hand_over(self, conn: socket.socket) -> None:
+        assert self.process.stdin is not None
+        assert self.process.stdout is not None
+        assert self.process.stderr is not None
+
+        # Anything written to stderr from now on is for the client.
+        self._handed_over.set()
+        self._stderr_drain.join()
+        fd = self.process.stderr.fileno()
+        while select.select([fd], [], [], 0)[0] and os.read(fd, 64 * 1024):
+            pass
+
+        response = {"pid": self.process.pid, "hello": self.hello}
+        socket.send_fds(
+            conn,
+            [json.dumps(response).encode("utf8")],
+            [
+                self.process.stdin.fileno(),
+                self.process.stdout.fileno(),
+                self.process.stderr.fileno(),
+            ],
+        )
+
+        # The client has its own copies of the pipes now
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+    def reap(self) -> int:
+        try:
+            return self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            return self.discard()
+
+    def discard(self) -> int:
+        self._handed_over.set()
+        self.process.kill()
+        return self.process.wait()
+
+
+class _Daemon:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._spares: MutableMapping[str, _WarmKernel] = collections.OrderedDict()
+        # The assemblies each kind of client loaded in previous sessions, in order.
+        self._loads: Dict[str, List[Mapping[str, str]]] = {}
+
+    def serve(self, path: str) -> None:
+        if os.path.exists(path):
+            os.unlink(path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        os.chmod(path, 0o600)
+        server.listen()
+
+        try:
+            while True:
+                conn, _ = server.accept()
+                threading.Thread(
+                    name="daemon.session",
+                    target=self._session,
+                    args=(conn,),
+                    daemon=True,
+                ).start()
+        finally:
+            server.close()
+            os.unlink(path)
+            with self._lock:
+                for spare in self._spares.values():
+                    spare.discard()
+                self._spares.clear()
+
+    def _session(self, conn: socket.socket) -> None:
+        with conn, conn.makefile("rb") as reader:
+            spec = json.loads(reader.readline())
+            key = _session_key(spec)
+
+            with self._lock:
+                kernel = self._spares.pop(key, None)
+                loads = list(self._loads.get(key, []))
+            if kernel is None or not kernel.alive():
+                try:
+                    kernel = _WarmKernel(spec, loads)
+                except OSError as exc:
+                    conn.sendall(json.dumps({"error": str(exc)}).encode("utf8"))
+                    return
+
+            kernel.hand_over(conn)
+
+            # Until the client is done, it tells us which assemblies it loads.
+            for line in reader:
+                load = json.loads(line).get("load")
+                if load is not None:
+                    self._learn(key, load)
+
+            returncode = kernel.reap()
+            with contextlib.suppress(OSError):
+                conn.sendall(json.dumps({"exit": returncode}).encode("utf8") + b"\n")
+
+        # The replacement spare is only prepared once the session is over, so it does
+        # not compete with the client for CPU time.
+        self._prepare_spare(key, spec)
+
+    def _learn(self, key: str, load: Mapping[str, str]) -> None:
+        with self._lock:
+            loads = self._loads.setdefault(key, [])
+            if not any(known["name"] == load["name"] for known in loads):
+                loads.append(load)
+
+    def _prepare_spare(self, key: str, spec: Mapping[str, Any]) -> None:
+        threading.Thread(
+            name="daemon.prepare_spare",
+            target=self._spawn_spare,
+            args=(key, spec),
+            daemon=True,
+        ).start()
+
+    def _spawn_spare(self, key: str, spec: Mapping[str, Any]) -> None:
+        with self._lock:
+            loads = list(self._loads.get(key, []))
+        try:
+            spare = _WarmKernel(spec, loads)
+        except OSError:
+            return
+
+        with self._lock:
+            previous = self._spares.pop(key, None)
+            self._spares[key] = spare
+            evicted = [previous] if previous is not None else []
+            while len(self._spares) > _MAX_SPARES:
+                _, oldest = self._spares.popitem(last=False)  # type: ignore
+                evicted.append(oldest)
+        for kernel in evicted:
+            kernel.discard()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m jsii._kernel.providers.daemon",
+        description="Serve pre-warmed jsii kernel processes over a Unix socket.",
+    )
+    parser.add_argument("socket", help="path of the Unix socket to listen on")
+    args = parser.parse_args(argv)
+
+    try:
+        _Daemon().serve(args.socket)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# How the node process that runs the kernel is started.
+#
+# Each option can be set from the environment, or with jsii.configure_node() before
+# the kernel starts (which takes precedence over the environment):
+#
+#   JSII_NODE_MAX_OLD_SPACE_SIZE   heap limit in MB (--max-old-space-size), 4069 by
+#                                  default
+#   JSII_NODE_MAX_SEMI_SPACE_SIZE  young generation semi-space size in MB
+#   JSII_NODE_STACK_SIZE           stack size in KB (--stack-size)
+#   JSII_NODE_COMPILE_CACHE        directory of V8's compile cache (NODE_COMPILE_CACHE,
+#                                  which node 22.1 and later use)
+#   JSII_NODE_CPU_PROF             directory to write a CPU profile of the kernel to
+#   JSII_NODE_HEAP_PROF            directory to write heap profiles to (--heap-prof)
+#   JSII_NODE_FLAGS                any other flags, split the way a shell would
+#   JSII_NODE_REPORT_RSS           set to 1 to report the kernel's peak RSS on stderr
+#                                  when it stops (on Linux)
+import contextlib
+import json
+import os
+import shlex
+import sys
+import tempfile
+
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple
+
+import attr
+
+
+# The jsii runtime runs the kernel in a child node process, started with the same
+# flags, and forwards every signal it gets to it. That includes the SIGPROF signals
+# --cpu-prof relies on, which kills it. So the kernel profiles itself instead, from
+# this script, which both processes load with --require.
+_CPU_PROFILER = """\
+if (process.argv[1] && process.argv[1].endsWith("program.js")) {
+  const fs = require("fs");
+  const inspector = require("inspector");
+  const path = require("path");
+  const session = new inspector.Session();
+  session.connect();
+  session.post("Profiler.enable");
+  session.post("Profiler.start");
+  process.on("exit", () => {
+    session.post("Profiler.stop", (err, result) => {
+      if (!err) {
+        const name = `CPU.${Date.now()}.${process.pid}.cpuprofile`;
+        fs.writeFileSync(path.join(%s, name), JSON.stringify(result.profile));
+      }
+    });
+  });
+}
+"""
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class NodeOptions:
+    max_old_space_size: Optional[int] = 4069
+    max_semi_space_size: Optional[int] = None
+    stack_size: Optional[int] = None
+    compile_cache: Optional[str] = None
+    cpu_prof: Optional[str] = None
+    heap_prof: Optional[str] = None
+    flags: Tuple[str, ...] = ()
+    report_rss: bool = False
+
+    @property
+    def profiling(self) -> bool:
+        return self.cpu_prof is not None or self.heap_prof is not None
+
+    def apply(
+        self, environ: MutableMapping[str, str], ctx_stack: contextlib.ExitStack
+    ) -> List[str]:
+        """Returns the flags to start node with, and sets its environment up."""
+        flags = []
+        if self.max_old_space_size is not None:
+            flags.append(f"--max-old-space-size={self.max_old_space_size}")
+        if self.max_semi_space_size is not None:
+            flags.append(f"--max-semi-space-size={self.max_semi_space_size}")
+        if self.stack_size is not None:
+            flags.append(f"--stack-size={self.stack_size}")
+        if self.cpu_prof is not None:
+            os.makedirs(self.cpu_prof, exist_ok=True)
+            tmpdir = ctx_stack.enter_context(tempfile.TemporaryDirectory())
+            profiler = os.path.join(tmpdir, "cpu-profiler.js")
+            with open(profiler, "w", encoding="utf-8") as fp:
+                fp.write(_CPU_PROFILER % json.dumps(os.path.abspath(self.cpu_prof)))
+            flags += ["--require", profiler]
+        if self.heap_prof is not None:
+            flags += ["--heap-prof", f"--heap-prof-dir={self.heap_prof}"]
+        flags += self.flags
+
+        if self.compile_cache is not None:
+            os.makedirs(self.compile_cache, exist_ok=True)
+            environ["NODE_COMPILE_CACHE"] = self.compile_cache
+        return flags
+
+
+def _size(name: str, value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if size <= 0:
+        raise ValueError(f"Invalid {name}: {value!r} (expected a positive integer)")
+    return size
+
+
+def _from_environ(environ: Mapping[str, str]) -> NodeOptions:
+    return NodeOptions(
+        max_old_space_size=_size(
+            "JSII_NODE_MAX_OLD_SPACE_SIZE",
+            environ.get("JSII_NODE_MAX_OLD_SPACE_SIZE", "4069"),
+        ),
+        max_semi_space_size=_size(
+            "JSII_NODE_MAX_SEMI_SPACE_SIZE",
+            environ.get("JSII_NODE_MAX_SEMI_SPACE_SIZE"),
+        ),
+        stack_size=_size(
+            "JSII_NODE_STACK_SIZE",
+            environ.get("JSII_NODE_STACK_SIZE"),
+        ),
+        compile_cache=environ.get("JSII_NODE_COMPILE_CACHE") or None,
+        cpu_prof=environ.get("JSII_NODE_CPU_PROF") or None,
+        heap_prof=environ.get("JSII_NODE_HEAP_PROF") or None,
+        flags=tuple(shlex.split(environ.get("JSII_NODE_FLAGS", ""))),
+        report_rss=environ.get("JSII_NODE_REPORT_RSS", "0") not in ("", "0"),
+    )
+
+
+_configured: Optional[NodeOptions] = None
+
+
+def configure_node(**options: Any) -> None:
+    """Sets how the node process running the kernel is started, when it starts next.
+
+    Accepts the fields of NodeOptions (max_old_space_size and max_semi_space_size in
+    MB, stack_size in KB, compile_cache, cpu_prof and heap_prof directories, extra
+    flags, and report_rss). Those not given are read from the environment.
+    """
+    global _configured
+    defaults = attr.asdict(_from_environ(os.environ), recurse=False)
+    if "flags" in options:
+        options["flags"] = tuple(options["flags"])
+    _configured = NodeOptions(**{**defaults, **options})
+
+
+def node_options(environ: Mapping[str, str]) -> NodeOptions:
+    return _configured if _configured is not None else _from_environ(environ)
+
+
+# Where processes are described, on Linux
+_PROC = "/proc"
+
+
+def _kernel_pid(pid: int) -> int:
+    # The jsii runtime started as pid runs the kernel in a child process, see
+    # _CPU_PROFILER. A runtime that has no such child serves the kernel itself.
+    try:
+        with open(f"{_PROC}/{pid}/task/{pid}/children", "rb") as fp:
+            children = [int(child) for child in fp.read().split()]
+    except (OSError, ValueError):
+        return pid
+    for child in children:
+        try:
+            with open(f"{_PROC}/{child}/cmdline", "rb") as fp:
+                argv = fp.read().split(b"\0")
+        except OSError:
+            continue
+        if any(arg.endswith(b"program.js") for arg in argv):
+            return child
+    return pid
+
+
+def read_peak_rss(pid: int) -> Optional[int]:
+    """The peak resident memory of the running kernel, in bytes, where /proc tells.
+
+    pid is the process of the jsii runtime. Only the kernel is measured, not the
+    processes it starts itself (e.g. to bundle assets).
+    """
+    try:
+        with open(f"{_PROC}/{_kernel_pid(pid)}/status", "rb") as fp:
+            for line in fp:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def report_peak_rss(peak_rss: Optional[int]) -> None:
+    if peak_rss is None:
+        message = "unknown (only measured where /proc is available)"
+    else:
+        message = f"{peak_rss / 2**20:.0f} MB"
+    print(f"[jsii] kernel process peak RSS: {message}", file=sys.stderr)
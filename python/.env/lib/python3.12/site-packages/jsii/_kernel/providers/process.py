@@ -1,30 +1,55 @@
 import atexit
-import base64
 import datetime
 import contextlib
 import enum
+import functools
+import hashlib
 import json
 import os
 import os.path
 import pathlib
 import platform
+import shutil
+import socket
 import subprocess
 import sys
 import tempfile
 import threading
-
-from typing import TYPE_CHECKING, Type, Union, Mapping, IO, Any, AnyStr, Optional
+import time
+
+from typing import (
+    TYPE_CHECKING,
+    Type,
+    Union,
+    Mapping,
+    MutableMapping,
+    IO,
+    Any,
+    AnyStr,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
 import attr
 import cattr  # type: ignore
-import dateutil.parser
 
 import jsii._embedded.jsii
 
 from ...__meta__ import __jsii_runtime_version__
 from ..._compat import importlib_resources
-from ..._utils import memoized_property
+from ..._utils import default_cache_root, memoized_property
 from .base import BaseProvider
+from .console import ConsoleRelay
+from .node_options import (
+    NodeOptions,
+    node_options,
+    read_peak_rss,
+    report_peak_rss,
+)
+from .. import tracing
 from ..types import (
     ObjRef,
     EnumRef,
@@ -102,14 +127,9 @@ class _CompleteRequest:
 _ProcessResponse = Union[_OkayResponse, _ErrorResponse, _CallbackResponse]
 
 
-def _with_api_key(api_name, asdict):
-    def unstructurer(value):
-        unstructured = asdict(value)
-        unstructured["api"] = api_name
-
-        return unstructured
-
-    return unstructurer
+# Bounds for the queue of deferred requests, see _NodeProcess.send_deferred
+_MAX_PENDING_REQUESTS = 64
+_MAX_PENDING_BYTES = 16 * 1024
 
 
 def _with_reference(data, type_):
@@ -126,22 +146,139 @@ def _unstructure_enum(member):
     return {"$jsii.enum": f"{member.__class__.__jsii_type__}/{member.value}"}
 
 
+def _unstructure_override(value):
+    return {"method": value.method, "property": value.property, "cookie": value.cookie}
+
+
+def _compile_encoder(request_type: Type[Any], api_name: Optional[str] = None):
+    # Generates a function turning an instance of request_type into the dictionary
+    # that is sent over the wire, with one expression per attribute, so that encoding
+    # a request does not go through any generic dispatch. Values of type Any are left
+    # as-is, and handled by jdefault when the dictionary is serialized.
+    namespace: dict = {
+        "_unstructure_override": _unstructure_override,
+    }
+    items = []
+    for field in attr.fields(request_type):
+        value = f"value.{field.name}"
+        if field.type is ObjRef:
+            expr = '{"$jsii.byref": %s.ref}' % value
+        elif field.type == List[Override]:
+            expr = f"[_unstructure_override(o) for o in {value}]"
+        elif attr.has(field.type):
+            # Such as the request a _CompleteRequest wraps, which names its API too.
+            namespace[f"_encode_{field.name}"] = _compile_encoder(
+                field.type, _API_NAMES.get(field.type)
+            )
+            expr = f"_encode_{field.name}({value})"
+        else:
+            expr = value
+        items.append(f"{field.name!r}: {expr}")
+    if api_name is not None:
+        items.append(f'"api": {api_name!r}')
+
+    source = "def encode(value):\n    return {%s}\n" % ", ".join(items)
+    code = compile(source, f"<jsii encoder for {request_type.__name__}>", "exec")
+    exec(code, namespace)
+    return namespace["encode"]
+
+
+# The API each request is sent to
+_API_NAMES: Mapping[Type[Any], str] = {
+    LoadRequest: "load",
+    GetScriptCommandRequest: "getBinScriptCommand",
+    InvokeScriptRequest: "invokeBinScript",
+    CreateRequest: "create",
+    DeleteRequest: "del",
+    GetRequest: "get",
+    StaticGetRequest: "sget",
+    SetRequest: "set",
+    StaticSetRequest: "sset",
+    InvokeRequest: "invoke",
+    StaticInvokeRequest: "sinvoke",
+    BeginRequest: "begin",
+    EndRequest: "end",
+    CallbacksRequest: "callbacks",
+    CompleteRequest: "complete",
+    StatsRequest: "stats",
+}
+
+_ENCODERS = {
+    request_type: _compile_encoder(request_type, _API_NAMES.get(request_type))
+    for request_type in (*_API_NAMES, _CompleteRequest)
+}
+
+
+# The responses of the hottest requests are built directly, anything else is
+# structured by the cattrs converter.
+_DECODERS = {
+    GetResponse: lambda ok: GetResponse(value=ok.get("value")),
+    SetResponse: lambda ok: SetResponse(),
+    InvokeResponse: lambda ok: InvokeResponse(result=ok.get("result")),
+    CreateResponse: lambda ok: CreateResponse(ref=ok.ref),
+}
+
+
+def _decode_ref(d):
+    return ObjRef(ref=d["$jsii.byref"], interfaces=d.get("$jsii.interfaces"))
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_date(value: str) -> datetime.datetime:
+    # The kernel writes dates with Date.prototype.toISOString, e.g.
+    # 2024-01-02T03:04:05.678Z, which fromisoformat parses once the Z is spelled
+    # out (it only accepts it as of Python 3.11).
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        # Any other ISO 8601 date, such as one with an expanded year
+        import dateutil.parser
+
+        return dateutil.parser.isoparse(value)
+
+
+def _decode_date(d):
+    return _parse_date(d["$jsii.date"])
+
+
+def _decode_enum(d):
+    ref, member = d["$jsii.enum"].rsplit("/", 1)
+    return EnumRef(ref=ObjRef(ref=ref + "@"), member=member)
+
+
+def _decode_map(d):
+    return d["$jsii.map"]
+
+
+_WRAPPER_DECODERS = {
+    "$jsii.byref": _decode_ref,
+    "$jsii.date": _decode_date,
+    "$jsii.enum": _decode_enum,
+    "$jsii.map": _decode_map,
+}
+
+
 def ohook(d):
-    if d.keys() == {"$jsii.byref"} or d.keys() == {"$jsii.byref", "$jsii.interfaces"}:
-        return ObjRef(ref=d["$jsii.byref"], interfaces=d.get("$jsii.interfaces"))
-    if d.keys() == {"$jsii.date"}:
-        return dateutil.parser.isoparse(d["$jsii.date"])
-    if d.keys() == {"$jsii.enum"}:
-        ref, member = d["$jsii.enum"].rsplit("/", 1)
-        return EnumRef(ref=ObjRef(ref=ref + "@"), member=member)
-    if d.keys() == {"$jsii.map"}:
-        return d["$jsii.map"]
+    # Wrappers have a single key (except for by-ref values that also list their
+    # interfaces), so any other dictionary is returned after a length check.
+    if len(d) == 1:
+        decoder = _WRAPPER_DECODERS.get(next(iter(d)))
+        if decoder is not None:
+            return decoder(d)
+    elif len(d) == 2 and "$jsii.byref" in d and "$jsii.interfaces" in d:
+        return _decode_ref(d)
     return d
 
 
 def jdefault(obj):
     if hasattr(obj, "__jsii_ref__"):
         return _unstructure_ref(obj.__jsii_ref__)
+    if isinstance(obj, ObjRef):
+        return _unstructure_ref(obj)
+    if isinstance(obj, enum.Enum):
+        return _unstructure_enum(obj)
     if isinstance(obj, datetime.datetime) and obj.tzinfo is not None:
         return {"$jsii.date": obj.isoformat()}
     elif isinstance(obj, datetime.datetime):
@@ -149,131 +286,255 @@ def jdefault(obj):
     raise TypeError("Don't know how to convert object to JSON: %r" % obj)
 
 
+def _rehydrate(value):
+    # Applies ohook bottom-up, for decoders that don't support an object hook.
+    if type(value) is dict:
+        return ohook({k: _rehydrate(v) for k, v in value.items()})
+    if type(value) is list:
+        return [_rehydrate(v) for v in value]
+    return value
+
+
+class _StdlibCodec:
+    name = "json"
+
+    def __init__(self) -> None:
+        # json.dumps and json.loads build a new encoder/decoder on every call when
+        # given custom hooks, so we keep our own instances around instead.
+        self._encoder = json.JSONEncoder(default=jdefault)
+        self._decoder = json.JSONDecoder(object_hook=ohook)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf8")
+
+    def loads(self, data: bytes) -> Any:
+        return self._decoder.decode(data.decode("utf8"))
+
+
+class _OrjsonCodec:
+    name = "orjson"
+
+    def __init__(self, orjson: Any) -> None:
+        self._orjson = orjson
+        # orjson would otherwise write datetimes as plain strings, these must go
+        # through jdefault so they are wrapped as $jsii.date values.
+        self._option = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj, default=jdefault, option=self._option)
+
+    def loads(self, data: bytes) -> Any:
+        return _rehydrate(self._orjson.loads(data))
+
+
+def _select_codec() -> Union[_StdlibCodec, _OrjsonCodec]:
+    # JSII_JSON_CODEC can be "json" to force the standard library, or "orjson" to
+    # require orjson. By default, orjson is used whenever it is installed.
+    name = os.environ.get("JSII_JSON_CODEC", "auto")
+    if name in ("auto", "orjson"):
+        try:
+            import orjson  # type: ignore
+        except ImportError:
+            if name == "orjson":
+                raise
+        else:
+            return _OrjsonCodec(orjson)
+    return _StdlibCodec()
+
+
+def _write_runtime(directory: str, contents: Mapping[str, bytes]) -> None:
+    for filename, content in contents.items():
+        path = os.path.join(directory, filename.replace("/", os.sep))
+        pathlib.Path(os.path.dirname(path)).mkdir(exist_ok=True)
+        with open(path, "wb") as fp:
+            fp.write(content)
+
+
+def _cached_runtime_directory(contents: Mapping[str, bytes]) -> str:
+    digest = hashlib.sha256()
+    for filename in sorted(contents):
+        digest.update(filename.encode("utf8") + b"\0")
+        digest.update(contents[filename])
+
+    root = os.environ.get("JSII_RUNTIME_CACHE_ROOT") or default_cache_root(
+        "runtime-cache"
+    )
+    directory = os.path.join(
+        root, f"{__jsii_runtime_version__}-{digest.hexdigest()[:16]}"
+    )
+    if os.path.isdir(directory):
+        return directory
+
+    # The entry is populated in a staging directory that is then renamed in place, so
+    # other processes never observe a partially written runtime. If another process
+    # was faster than us, our rename fails, and we use their copy instead.
+    pathlib.Path(root).mkdir(parents=True, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+    try:
+        _write_runtime(staging, contents)
+        os.rename(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(directory):
+            raise
+
+    return directory
+
+
+def _jsii_runtime(ctx_stack: contextlib.ExitStack) -> str:
+    # Source maps are only useful to make sense of traces when debugging, and
+    # account for more than half of the runtime's size.
+    debug = bool(os.environ.get("JSII_DEBUG"))
+    contents = {
+        filename: importlib_resources.files(jsii._embedded.jsii)
+        .joinpath(resname)
+        .read_bytes()
+        for resname, filename in jsii._embedded.jsii.EMBEDDED_FILES.items()
+        if debug or not resname.endswith(".map")
+    }
+    entrypoint = jsii._embedded.jsii.EMBEDDED_FILES[jsii._embedded.jsii.ENTRYPOINT]
+
+    cache = os.environ.get("JSII_RUNTIME_CACHE", "enabled").lower()
+    if cache == "enabled":
+        try:
+            directory = _cached_runtime_directory(contents)
+        except OSError:
+            # The cache can't be used (e.g: read-only home directory), so we'll
+            # fall back to extracting the runtime for this process only.
+            pass
+        else:
+            return os.path.join(directory, entrypoint.replace("/", os.sep))
+
+    tmpdir = ctx_stack.enter_context(tempfile.TemporaryDirectory())
+    _write_runtime(tmpdir, contents)
+
+    return os.path.join(tmpdir, entrypoint.replace("/", os.sep))
+
+
+def _node_command(
+    environ: MutableMapping[str, str],
+    ctx_stack: contextlib.ExitStack,
+    options: NodeOptions,
+) -> List[str]:
+    """The command that starts the kernel process, which may need environ set up."""
+    jsii_node = environ.get("JSII_NODE", "node")
+    jsii_runtime = environ.get("JSII_RUNTIME") or _jsii_runtime(ctx_stack)
+
+    return [jsii_node, *options.apply(environ, ctx_stack), jsii_runtime]
+
+
+def _check_hello(hello: str) -> None:
+    # TODO: Replace with proper error.
+    assert (
+        hello == f"@jsii/runtime@{__jsii_runtime_version__}"
+        # Transparently allow development versions of the runtime to be used.
+        or hello == f"@jsii/runtime@0.0.0"
+    ), f"Invalid JSII Runtime Version: {hello!r}"
+
+
+def _response_serializer() -> cattr.Converter:
+    # Requests are encoded by the functions in _ENCODERS, this converter is only used
+    # to structure the less common responses.
+    serializer = cattr.Converter()
+    serializer.register_structure_hook(ObjRef, _with_reference)
+    return serializer
+
+
+def _decode(
+    serializer: cattr.Converter,
+    message: Mapping[Any, Any],
+    response_type: Type[KernelResponse],
+) -> KernelResponse:
+    # The top-level key tells us which kind of response this is, so there is no
+    # need for cattrs to disambiguate the members of _ProcessResponse.
+    if "ok" in message:
+        ok = message["ok"]
+        decoder = _DECODERS.get(response_type)
+        if decoder is not None:
+            return decoder(ok)
+        return serializer.structure(ok, response_type)
+    elif "callback" in message:
+        return serializer.structure(message["callback"], Callback)
+    else:
+        resp = serializer.structure(message, _ErrorResponse)
+        if resp.name == ErrorType.JSII_FAULT.value:
+            raise JSIIError(resp.error) from JavaScriptError(resp.stack)
+        raise RuntimeError(resp.error) from JavaScriptError(resp.stack)
+
+
 class _NodeProcess:
     def __init__(self):
-        self._serializer = cattr.Converter()
-        self._serializer.register_unstructure_hook(enum.Enum, _unstructure_enum)
-        self._serializer.register_unstructure_hook(
-            LoadRequest,
-            _with_api_key("load", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            GetScriptCommandRequest,
-            _with_api_key(
-                "getBinScriptCommand", self._serializer.unstructure_attrs_asdict
-            ),
-        )
-        self._serializer.register_unstructure_hook(
-            InvokeScriptRequest,
-            _with_api_key("invokeBinScript", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            CreateRequest,
-            _with_api_key("create", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            DeleteRequest,
-            _with_api_key("del", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            GetRequest, _with_api_key("get", self._serializer.unstructure_attrs_asdict)
-        )
-        self._serializer.register_unstructure_hook(
-            StaticGetRequest,
-            _with_api_key("sget", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            SetRequest, _with_api_key("set", self._serializer.unstructure_attrs_asdict)
-        )
-        self._serializer.register_unstructure_hook(
-            StaticSetRequest,
-            _with_api_key("sset", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            InvokeRequest,
-            _with_api_key("invoke", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            StaticInvokeRequest,
-            _with_api_key("sinvoke", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            BeginRequest,
-            _with_api_key("begin", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            EndRequest, _with_api_key("end", self._serializer.unstructure_attrs_asdict)
-        )
-        self._serializer.register_unstructure_hook(
-            CallbacksRequest,
-            _with_api_key("callbacks", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            CompleteRequest,
-            _with_api_key("complete", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            StatsRequest,
-            _with_api_key("stats", self._serializer.unstructure_attrs_asdict),
-        )
-        self._serializer.register_unstructure_hook(
-            Override, self._serializer.unstructure_attrs_asdict
-        )
-        self._serializer.register_unstructure_hook(ObjRef, _unstructure_ref)
-        self._serializer.register_structure_hook(ObjRef, _with_reference)
+        self._serializer = _response_serializer()
+
+        self._codec = _select_codec()
 
         self._ctx_stack = contextlib.ExitStack()
 
-    def __del__(self):
-        self.stop()
+        # Requests that were queued by send_deferred, and have not been written to the
+        # child process yet, together with their expected response type.
+        self._pending: List[Tuple[bytes, Type[KernelResponse]]] = []
+        self._pending_size = 0
 
-    def _jsii_runtime(self) -> str:
-        tmpdir = self._ctx_stack.enter_context(tempfile.TemporaryDirectory())
-        resources = {
-            resname: os.path.join(tmpdir, filename.replace("/", os.sep))
-            for resname, filename in jsii._embedded.jsii.EMBEDDED_FILES.items()
-        }
-
-        for resname, filename in resources.items():
-            pathlib.Path(os.path.dirname(filename)).mkdir(exist_ok=True)
-            with open(filename, "wb") as fp:
-                fp.write(
-                    importlib_resources.files(jsii._embedded.jsii)
-                    .joinpath(resname)
-                    .read_bytes()
-                )
+        # Number of request frames written to the child process, that we then had to
+        # block on reading the response(s) of.
+        self.round_trips = 0
+
+        # Callbacks that were triggered by queued requests, which the kernel waits for
+        # the completion of (innermost last), with the number of callbacks that were
+        # being served in Python when they were received.
+        self._unsettled: List[Tuple[Callback, Type[KernelResponse], int]] = []
+        self._callback_depth = 0
 
-        # Return our first path, which should be the path for jsii-runtime.js
-        return resources[jsii._embedded.jsii.ENTRYPOINT]
+        self._node_options: Optional[NodeOptions] = None
+        # The peak resident memory of the kernel in bytes, once it was stopped (if
+        # the platform tells).
+        self.peak_rss: Optional[int] = None
+
+    def __del__(self):
+        self.stop()
 
     def _next_message(self) -> Mapping[Any, Any]:
         assert self._process.stdout is not None
-        return json.loads(self._process.stdout.readline(), object_hook=ohook)
+        return self._codec.loads(self._process.stdout.readline())
 
     def start(self):
         environ = os.environ.copy()
         environ["JSII_AGENT"] = f"Python/{platform.python_version()}"
 
-        jsii_node = environ.get("JSII_NODE", "node")
-        jsii_runtime = environ.get("JSII_RUNTIME", self._jsii_runtime())
-
-        self._process = subprocess.Popen(
-            [
-                jsii_node,
-                "--max-old-space-size=4069",
-                jsii_runtime,
-            ],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=environ,
-        )
+        self._node_options = node_options(environ)
+        argv = _node_command(environ, self._ctx_stack, self._node_options)
+
+        # Set when the kernel process was obtained from a daemon, see .daemon
+        self._session = None
+        daemon_socket = environ.get("JSII_KERNEL_DAEMON")
+        if daemon_socket and hasattr(socket, "send_fds"):
+            from .daemon import DaemonSession
 
+            try:
+                self._session = DaemonSession(
+                    daemon_socket, argv, environ, os.getcwd()
+                )
+            except OSError:
+                # The daemon is not running (or not working), so we'll just spawn our
+                # own kernel process.
+                pass
+
+        process: Any = self._session
+        if process is None:
+            process = subprocess.Popen(
+                argv,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=environ,
+            )
+        self._process = process
+
+        self.console = ConsoleRelay()
         self.sink_thread = threading.Thread(
             name="process.stderr_sink",
             target=stderr_sink,
-            # Trailing comma here is important (this is a 1-value tuple, not a value between parentheses)
-            args=(self._process.stderr,),
+            args=(self._process.stderr, self.console),
             # Thread is a daemon so it does not hold the VM from shutting down
             daemon=True,
         )
@@ -289,60 +550,249 @@ class _NodeProcess:
         atexit.unregister(self.stop)
 
         assert self._process.stdin is not None
-        if not self._process.stdin.closed:
-            self._process.stdin.write(b'{"exit":0}\n')
-            # Close the process' STDIN, singaling we are done with it
-            self._process.stdin.close()
-
+        stopping = not self._process.stdin.closed
+        if stopping:
+            # Read while it's still running, as it can't be once it has exited.
+            self.peak_rss = read_peak_rss(self._process.pid)
+            try:
+                # Anything still queued must reach the kernel before we ask it to exit.
+                self.flush()
+            finally:
+                self._process.stdin.write(b'{"exit":0}\n')
+                # Close the process' STDIN, singaling we are done with it
+                self._process.stdin.close()
+
+        options = self._node_options or NodeOptions()
         try:
-            self._process.wait(timeout=5)
+            # Profiles are written out as node exits, which takes a while.
+            self._process.wait(timeout=60 if options.profiling else 5)
         except subprocess.TimeoutExpired:
             self._process.terminate()
 
+        if stopping and options.report_rss:
+            report_peak_rss(self.peak_rss)
+
         if self.sink_thread.is_alive():
             self.sink_thread.join(timeout=5)
+        self.console.close()
 
         self._ctx_stack.close()
 
     def handshake(self) -> None:
         # Get the version of the runtime that we're using.
-        resp: _HelloResponse = self._serializer.structure(
-            self._next_message(), _HelloResponse
-        )
+        if self._session is not None:
+            resp = _HelloResponse(hello=self._session.hello)
+        else:
+            resp = self._serializer.structure(self._next_message(), _HelloResponse)
+
+        _check_hello(resp.hello)
+
+    def loaded(self, request: LoadRequest) -> None:
+        if self._session is not None:
+            self._session.loaded(request.name, request.version, request.tarball)
+
+    def _encode(self, request: KernelRequest) -> bytes:
+        data = self._codec.dumps(_ENCODERS[type(request)](request))
+
+        # Ensure that the request is framed with a trailing \n
+        return b"%b\n" % (data,)
+
+    def _receive(self, response_type: Type[KernelResponse]) -> KernelResponse:
+        return _decode(self._serializer, self._next_message(), response_type)
 
-        # TODO: Replace with proper error.
-        assert (
-            resp.hello == f"@jsii/runtime@{__jsii_runtime_version__}"
-            # Transparently allow development versions of the runtime to be used.
-            or resp.hello == f"@jsii/runtime@0.0.0"
-        ), f"Invalid JSII Runtime Version: {resp.hello!r}"
+    def _write_frame(self, data: bytes) -> List[Tuple[bytes, Type[KernelResponse]]]:
+        # Anything that was queued is written ahead of data, in the same frame, so the
+        # kernel observes requests in the order they were issued.
+        pending, self._pending = self._pending, []
+        self._pending_size = 0
+
+        assert self._process.stdin is not None
+        self._process.stdin.write(b"".join([*(req for req, _ in pending), data]))
+        self._process.stdin.flush()
+        self.round_trips += 1
+
+        return pending
+
+    def _drain(
+        self,
+        pending: List[Tuple[bytes, Type[KernelResponse]]],
+        responses: Optional[List[KernelResponse]] = None,
+    ) -> Optional[Exception]:
+        error: Optional[Exception] = None
+        for _, response_type in pending:
+            try:
+                response = self._receive(response_type)
+            except Exception as exc:
+                # Keep draining, so the responses stay in sync with our requests, and
+                # report the first failure once we are done.
+                if error is None:
+                    error = exc
+                continue
+
+            if isinstance(response, Callback):
+                # Queued requests can't be called back for. The kernel serves the
+                # requests that follow in the frame while it waits for the completion,
+                # so it is only sent once their responses are read, see _settle.
+                self._unsettled.append(
+                    (response, response_type, self._callback_depth)
+                )
+                continue
+            if responses is not None:
+                responses.append(response)
+
+        return error
+
+    def _settle(self) -> Optional[Exception]:
+        # Fails the callbacks that queued requests triggered at the current depth,
+        # now that the kernel waits for their completion, innermost first. Their
+        # requests fail, as they would have if they had not been queued.
+        error: Optional[Exception] = None
+        while self._unsettled and self._unsettled[-1][2] == self._callback_depth:
+            callback, response_type, _ = self._unsettled.pop()
+            message = (
+                "A deferred request triggered a callback (%s), this is not supported"
+                % callback.cookie
+            )
+            if error is None:
+                error = JSIIError(message)
+            complete = CompleteRequest(cbid=callback.cbid, err=message)
+            self._write_frame(self._encode(_CompleteRequest(complete=complete)))
+            # The request's own response, or another callback
+            self._drain([(b"", response_type)])
+        return error
+
+    def _trace(
+        self,
+        tracer: tracing.Tracer,
+        request: KernelRequest,
+        size: int,
+        start: float,
+        end: float,
+        deferred: bool = False,
+    ) -> None:
+        api = _API_NAMES.get(type(request), "complete")
+        tracer.record(api, request, size, start, end, deferred)
 
     def send(
         self, request: KernelRequest, response_type: Type[KernelResponse]
     ) -> KernelResponse:
-        req_dict = self._serializer.unstructure(request)
-        data = json.dumps(req_dict, default=jdefault).encode("utf8")
+        data = self._encode(request)
+        tracer = tracing.current()
+        completes = isinstance(request, _CompleteRequest)
+        if tracer is None:
+            return self._send(data, response_type, completes)
 
-        # Send our data, ensure that it is framed with a trailing \n
-        assert self._process.stdin is not None
-        self._process.stdin.write(b"%b\n" % (data,))
-        self._process.stdin.flush()
+        start = time.perf_counter()
+        try:
+            return self._send(data, response_type, completes)
+        finally:
+            self._trace(tracer, request, len(data), start, time.perf_counter())
 
-        resp: _ProcessResponse = self._serializer.structure(
-            self._next_message(), _ProcessResponse
-        )
+    def _send(
+        self, data: bytes, response_type: Type[KernelResponse], completes: bool
+    ) -> KernelResponse:
+        pending = self._write_frame(data)
 
-        if isinstance(resp, _OkayResponse):
-            return self._serializer.structure(resp.ok, response_type)
-        elif isinstance(resp, _CallbackResponse):
-            return resp.callback
+        # A failed deferred request is reported by the first request that follows it,
+        # in preference to any failure of that request itself.
+        error = self._drain(pending)
+        failure: Optional[Exception] = None
+        try:
+            response = self._receive(response_type)
+        except Exception as exc:
+            failure = exc
+
+        if failure is None and isinstance(response, Callback):
+            # Served in Python, then completed with a _CompleteRequest.
+            if not completes:
+                self._callback_depth += 1
         else:
-            if resp.name == ErrorType.JSII_FAULT.value:
-                raise JSIIError(resp.error) from JavaScriptError(resp.stack)
-            raise RuntimeError(resp.error) from JavaScriptError(resp.stack)
+            if completes:
+                self._callback_depth -= 1
+            settle_error = self._settle()
+            if error is None:
+                error = settle_error
+
+        if error is not None:
+            raise error
+        if failure is not None:
+            raise failure
+        return response
+
+    def send_many(
+        self, requests: Sequence[KernelRequest], response_type: Type[KernelResponse]
+    ) -> List[KernelResponse]:
+        # Requests that can't trigger callbacks are written in batches, each in a
+        # single frame (behind anything already queued), and their responses are read
+        # back in order.
+        tracer = tracing.current()
+        responses: List[KernelResponse] = []
+        error: Optional[Exception] = None
+        for start in range(0, len(requests), _MAX_PENDING_REQUESTS):
+            batch = requests[start : start + _MAX_PENDING_REQUESTS]
+            sizes = []
+            for request in batch:
+                data = self._encode(request)
+                sizes.append(len(data))
+                self._pending.append((data, response_type))
+
+            began = time.perf_counter()
+            drained: List[KernelResponse] = []
+            batch_error = self._drain(self._write_frame(b""), drained)
+            settle_error = self._settle()
+            if error is None:
+                error = batch_error or settle_error
+            responses.extend(drained[len(drained) - len(batch) :])
+
+            if tracer is not None:
+                # The kernel serves the requests of the frame one after the other.
+                share = (time.perf_counter() - began) / len(batch)
+                for i, (request, size) in enumerate(zip(batch, sizes)):
+                    at = began + i * share
+                    self._trace(tracer, request, size, at, at + share)
+
+        if error is not None:
+            raise error
+        return responses
+
+    def send_deferred(
+        self, request: KernelRequest, response_type: Type[KernelResponse]
+    ) -> None:
+        # The request is only written to the child process together with the next
+        # request that needs a response, or when the queue is full or flushed.
+        data = self._encode(request)
+        self._pending.append((data, response_type))
+        self._pending_size += len(data)
+
+        tracer = tracing.current()
+        if tracer is not None:
+            now = time.perf_counter()
+            self._trace(tracer, request, len(data), now, now, deferred=True)
+
+        # The queue is bounded so that a whole batch frame (and the responses it
+        # produces) always fit in the pipe buffers, and neither side can block the
+        # other while we are still writing.
+        if (
+            len(self._pending) >= _MAX_PENDING_REQUESTS
+            or self._pending_size >= _MAX_PENDING_BYTES
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+
+        error = self._drain(self._write_frame(b""))
+        settle_error = self._settle()
+        if error is None:
+            error = settle_error
+        if error is not None:
+            raise error
 
 
 class ProcessProvider(BaseProvider):
+    supports_pipelining = True
+
     @memoized_property
     def _process(self) -> _NodeProcess:
         process = _NodeProcess()
@@ -351,7 +801,9 @@ class ProcessProvider(BaseProvider):
         return process
 
     def load(self, request: LoadRequest) -> LoadResponse:
-        return self._process.send(request, LoadResponse)
+        response = self._process.send(request, LoadResponse)
+        self._process.loaded(request)
+        return response
 
     def getScriptCommand(
         self, request: GetScriptCommandRequest
@@ -370,6 +822,9 @@ class ProcessProvider(BaseProvider):
     def set(self, request: SetRequest) -> SetResponse:
         return self._process.send(request, SetResponse)
 
+    def get_many(self, requests: Sequence[GetRequest]) -> List[GetResponse]:
+        return cast(List[GetResponse], self._process.send_many(requests, GetResponse))
+
     def sget(self, request: StaticGetRequest) -> GetResponse:
         return self._process.send(request, GetResponse)
 
@@ -397,6 +852,31 @@ class ProcessProvider(BaseProvider):
     def complete(self, request: CompleteRequest) -> CompleteResponse:
         return self._process.send(request, CompleteResponse)
 
+    def complete_deferred(self, request: CompleteRequest) -> None:
+        # Completing an async callback only settles its promise on the kernel's side,
+        # which can't call back into Python.
+        self._process.send_deferred(request, CompleteResponse)
+
+    def invoke_deferred(self, request: InvokeRequest) -> None:
+        self._process.send_deferred(request, InvokeResponse)
+
+    def set_deferred(self, request: SetRequest) -> None:
+        self._process.send_deferred(request, SetResponse)
+
+    def delete_deferred(self, request: DeleteRequest) -> None:
+        self._process.send_deferred(request, DeleteResponse)
+
+    def flush(self) -> None:
+        self._process.flush()
+
+    @property
+    def round_trips(self) -> int:
+        return self._process.round_trips
+
+    @property
+    def console(self) -> Optional[ConsoleRelay]:
+        return self._process.console
+
     def sync_complete(
         self, request: CompleteRequest, response_type: Type[KernelResponse]
     ) -> Union[InvokeResponse, GetResponse]:
@@ -409,16 +889,9 @@ class ProcessProvider(BaseProvider):
         return self._process.send(request, StatsResponse)
 
 
-def stderr_sink(reader: IO[AnyStr]) -> None:
+def stderr_sink(reader: IO[AnyStr], console: ConsoleRelay) -> None:
     # An empty string is used to signal EOF...
     for line in iter(reader.readline, b""):
         if line == b"":
             break
-        try:
-            console = json.loads(line)
-            if console.get("stderr") is not None:
-                sys.stderr.buffer.write(base64.b64decode(console["stderr"]))
-            if console.get("stdout") is not None:
-                sys.stdout.buffer.write(base64.b64decode(console["stdout"]))
-        except:
-            print(line, file=sys.stderr)
+        console.relay(line)  # type: ignore
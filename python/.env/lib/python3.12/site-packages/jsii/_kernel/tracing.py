@@ -0,0 +1,197 @@
+# Opt-in tracing of the requests sent to the kernel.
+#
+# Every request is recorded with its API (create, invoke, sget, ...), the jsii type and
+# member it targets, the Python code that caused it (the innermost frame that is not
+# part of jsii or of generated bindings), the size of its encoding, and how long it
+# took to get its response. Traces are written either in the Chrome trace format (for
+# chrome://tracing, Perfetto or speedscope), or as folded stacks (for flamegraph.pl),
+# weighted by the time spent waiting on the kernel.
+#
+# Enable it for a whole process with JSII_TRACE=<path> (folded stacks if the path ends
+# in .folded, a Chrome trace otherwise), or around some code with jsii.trace().
+import atexit
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import attr
+
+from .. import _submodules
+
+
+# How many Python frames are kept for each request (the innermost ones).
+_MAX_FRAMES = 32
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class TraceEvent:
+    api: str
+    # The jsii type, and member (if any) of the request, e.g. "constructs.Node.of"
+    target: str
+    # The Python frames that caused the request, as "function (file:line)", outermost
+    # first. The last one is the call site.
+    stack: Tuple[str, ...]
+    size: int
+    # In seconds, relative to the start of the trace
+    start: float
+    duration: float
+    # Requests queued by pipelining are recorded when they are queued, and cost nothing
+    # until they are flushed together with another request.
+    deferred: bool = False
+
+    @property
+    def call_site(self) -> str:
+        return self.stack[-1] if self.stack else "<unknown>"
+
+
+def _target(request: Any) -> str:
+    request = getattr(request, "complete", request)
+    fqn = getattr(request, "fqn", None)
+    if fqn is None:
+        objref = getattr(request, "objref", None)
+        if objref is not None:
+            fqn = objref.ref.rsplit("@", 1)[0]
+        else:
+            fqn = getattr(request, "name", None) or getattr(request, "cbid", "")
+    member = getattr(request, "method", None) or getattr(request, "property", None)
+    return f"{fqn}.{member}" if member else fqn
+
+
+def _is_binding(module: str) -> bool:
+    package = module.partition(".")[0]
+    return package == "jsii" or package in _submodules.assembly_packages()
+
+
+def _python_stack() -> Tuple[str, ...]:
+    frames: List[str] = []
+    frame: Any = sys._getframe(1)
+    while frame is not None and len(frames) < _MAX_FRAMES:
+        if not _is_binding(frame.f_globals.get("__name__", "")):
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.events: List[TraceEvent] = []
+        self._origin = time.perf_counter()
+        self._thread = threading.get_ident()
+
+    def record(
+        self,
+        api: str,
+        request: Any,
+        size: int,
+        start: float,
+        end: float,
+        deferred: bool = False,
+    ) -> None:
+        self.events.append(
+            TraceEvent(
+                api=api,
+                target=_target(request),
+                stack=_python_stack(),
+                size=size,
+                start=start - self._origin,
+                duration=end - start,
+                deferred=deferred,
+            )
+        )
+
+    def by_call_site(self) -> List[Tuple[str, int, float, int]]:
+        """Returns (call site, requests, seconds, bytes), the most expensive first."""
+        totals: Dict[str, List[Any]] = collections.defaultdict(lambda: [0, 0.0, 0])
+        for event in self.events:
+            total = totals[event.call_site]
+            total[0] += 1
+            total[1] += event.duration
+            total[2] += event.size
+        return sorted(
+            ((site, *total) for site, total in totals.items()),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": f"{event.api} {event.target}",
+                    "cat": event.api,
+                    "ph": "X",
+                    "ts": event.start * 1e6,
+                    "dur": event.duration * 1e6,
+                    "pid": pid,
+                    "tid": self._thread,
+                    "args": {
+                        "call_site": event.call_site,
+                        "stack": list(event.stack),
+                        "bytes": event.size,
+                        "deferred": event.deferred,
+                    },
+                }
+                for event in self.events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def folded_stacks(self) -> List[str]:
+        # Weighted in microseconds, as flamegraph.pl only accepts integer counts.
+        weights: Dict[str, int] = collections.Counter()
+        for event in self.events:
+            frames = [*event.stack, f"{event.api} {event.target}"]
+            weights[";".join(f.replace(";", ":") for f in frames)] += max(
+                1, round(event.duration * 1e6)
+            )
+        return [f"{stack} {weight}" for stack, weight in weights.items()]
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fp:
+            if path.endswith(".folded"):
+                fp.writelines(line + "\n" for line in self.folded_stacks())
+            else:
+                json.dump(self.chrome_trace(), fp)
+
+
+_active: Optional[Tracer] = None
+
+
+def current() -> Optional[Tracer]:
+    return _active
+
+
+def start(path: Optional[str] = None) -> Tracer:
+    """Starts recording kernel requests, and writes them to path at exit if given."""
+    global _active
+    tracer = _active = Tracer()
+    if path is not None:
+        atexit.register(tracer.write, path)
+    return tracer
+
+
+@contextlib.contextmanager
+def trace(path: Optional[str] = None) -> Iterator[Tracer]:
+    """Records the kernel requests made within this block.
+
+    :param path: where to write the trace to, when the block exits: folded stacks if
+                 it ends in .folded, a Chrome trace otherwise.
+    """
+    global _active
+    previous = _active
+    tracer = _active = Tracer()
+    try:
+        yield tracer
+    finally:
+        _active = previous
+        if path is not None:
+            tracer.write(path)
@@ -0,0 +1,86 @@
+# The public interface of generated modules.
+#
+# Generated modules only expose the names in their __all__, the rest of them being
+# implementation details. This used to be done by publication.publish(), which
+# replaces the module with a new one holding copies of the public names, and keeps the
+# original around as <module>._private. Instead, the module itself is made to hide its
+# private names, so nothing is copied: its class is switched to one on which each of
+# them is bound to a data descriptor that refuses to be read. Those take precedence
+# over the module's __dict__, so looking up a public name is still a plain dict lookup
+# in C, while the module's own code keeps using its globals (that same __dict__).
+import sys
+import types
+
+from typing import Any, List
+
+
+_PRIVATE = "_private"
+
+
+class _Hidden:
+    """Marks a name of a published module's class as hidden on the module."""
+
+    def __get__(self, module: Any, owner: type) -> Any:
+        if module is None:
+            return self
+        # Modules replace it with an error naming the attribute, once their own
+        # __getattr__, if any, doesn't find it either.
+        raise AttributeError
+
+    def __set__(self, module: Any, value: Any) -> None:
+        # Being a data descriptor is what gives it precedence over the module's
+        # __dict__, but the module's __setattr__ handles hidden names itself.
+        raise AttributeError
+
+
+# A single instance hides all of the names.
+_HIDDEN = _Hidden()
+
+
+class _PublishedModule(types.ModuleType):
+    @property
+    def _private(self) -> Any:
+        return sys.modules[f"{self.__name__}.{_PRIVATE}"]
+
+    # Names bound after the module was published are public, as they were with
+    # publication, unless they were hidden: those are rebound, and stay hidden.
+    def __setattr__(self, name: str, value: Any) -> None:
+        if _is_hidden(self, name):
+            self.__dict__[name] = value
+        else:
+            super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        if _is_hidden(self, name):
+            del self.__dict__[name]
+        else:
+            super().__delattr__(name)
+
+    def __dir__(self) -> List[str]:
+        # Honours the module's own __dir__, if any.
+        return [n for n in super().__dir__() if not _is_hidden(self, n)]
+
+
+def _is_hidden(module: types.ModuleType, name: str) -> bool:
+    return type(module).__dict__.get(name) is _HIDDEN
+
+
+class _PrivateNamespace:
+    """All of a published module's names, like publication's <module>._private."""
+
+    def __init__(self, module: types.ModuleType) -> None:
+        # Shares the module's namespace, rather than copying it.
+        self.__dict__ = vars(module)
+
+
+def publish(name: str) -> None:
+    """Hides the names of the given module that are not listed in its __all__.
+
+    Call it at the end of the module, with its __name__.
+    """
+    module = sys.modules[name]
+    names = vars(module)
+    public = frozenset(names["__all__"])
+    hidden = {n: _HIDDEN for n in names if not n.startswith("__") and n not in public}
+    module.__class__ = type("_PublishedModule", (_PublishedModule,), hidden)
+    sys.modules[f"{name}.{_PRIVATE}"] = _PrivateNamespace(module)  # type: ignore
@@ -1,8 +1,25 @@
 # This module exists to break an import cycle between jsii.runtime and jsii.kernel
+import bisect
+import gc
 import inspect
-
-from typing import Any, Iterable, List, Mapping, MutableMapping, Type
+import sys
+import weakref
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Set,
+    Tuple,
+    Type,
+)
+from . import _submodules
 from ._kernel.types import ObjRef
+from .errors import JSIIError
 
 
 _types = {}
@@ -27,22 +44,141 @@ def register_interface(iface: Any):
     _interfaces[iface.__jsii_type__] = iface
 
 
+def _is_registered(fqn: str) -> bool:
+    return (
+        fqn in _types or fqn in _data_types or fqn in _enums or fqn in _interfaces
+    )
+
+
 class _FakeReference:
     def __init__(self, ref: str) -> None:
         self.__jsii_ref__ = ref
 
 
+def _ref_serial(ref: str) -> int:
+    # Object references are "<fqn>@<serial>", with serials increasing over time
+    try:
+        return int(ref.rsplit("@", 1)[1])
+    except (IndexError, ValueError):
+        return -1
+
+
+def _weak_entry(obj: Any) -> Callable[[], Any]:
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        # Can't tell whether this is still in use, so it'll be kept.
+        return lambda: obj
+
+
+class _ReleaseScope:
+    def __init__(self, watermark: int) -> None:
+        # Only objects the kernel handed out after this serial belong to the scope.
+        self.watermark = watermark
+        # The Python objects that stand for each of the scope's references.
+        self.objects: Dict[str, List[Any]] = {}
+
+
 class _ReferenceMap:
     def __init__(self, types: Mapping[str, Type]) -> None:
         # We are using a real dictionary here instead of a WeakValueDictionary because
         # the nature of the JSII is such that we can never free the memory of JSII
         # objects ever, because we have no idea how many references exist on the *other*
-        # side.
+        # side. The only exception is when the user explicitly opts into releasing the
+        # objects of a scope, see Kernel.release_scope.
         self._refs: MutableMapping[str, Any] = {}
         self._types = types
 
+        self._scopes: List[_ReleaseScope] = []
+        self._high_watermark = -1
+        # References to objects that have overrides, which are never released, as the
+        # kernel may call back into them at any time.
+        self._pinned: Set[str] = set()
+        # The serials of the references that have been released, to report a
+        # meaningful error if the kernel hands any of them out again. They are kept as
+        # sorted, disjoint (first, last) ranges: the objects of a scope mostly have
+        # consecutive serials, so this stays small however many are released.
+        self._released: List[Tuple[int, int]] = []
+
+    def _track(self, ref: ObjRef, obj: Any) -> None:
+        serial = _ref_serial(ref.ref)
+        if serial > self._high_watermark:
+            self._high_watermark = serial
+        if self._scopes and serial > self._scopes[-1].watermark:
+            self._scopes[-1].objects.setdefault(ref.ref, []).append(_weak_entry(obj))
+
     def register(self, inst: Any) -> None:
-        self._refs[inst.__jsii_ref__.ref] = inst
+        ref = inst.__jsii_ref__
+        if self._refs.get(ref.ref) is not inst:
+            self._refs[ref.ref] = inst
+            self._track(ref, inst)
+
+    def pin(self, ref: ObjRef) -> None:
+        self._pinned.add(ref.ref)
+
+    def open_scope(self) -> None:
+        self._scopes.append(_ReleaseScope(self._high_watermark))
+
+    def close_scope(self) -> List[ObjRef]:
+        """Closes the innermost release scope, returning the references to release.
+
+        These are the references the kernel handed out during the scope, which are not
+        reachable from Python anymore (other than through this map), and don't have
+        overrides. Anything else is handed over to the enclosing scope, if any.
+        """
+        scope = self._scopes.pop()
+
+        # Drop our own strong references, and see which objects survive
+        held = {
+            ref: self._refs.pop(ref)
+            for ref in scope.objects
+            if ref in self._refs and ref not in self._pinned
+        }
+        weak = {ref: _weak_entry(obj) for ref, obj in held.items()}
+        held.clear()
+        gc.collect()
+
+        released: List[ObjRef] = []
+        for ref, entries in scope.objects.items():
+            if ref in self._pinned:
+                alive = True
+            elif ref in weak:
+                obj = weak[ref]()
+                alive = obj is not None
+                if alive:
+                    self._refs[ref] = obj
+            else:
+                alive = any(entry() is not None for entry in entries)
+
+            if not alive:
+                released.append(ObjRef(ref=ref))
+            elif self._scopes:
+                self._scopes[-1].objects.setdefault(ref, []).extend(entries)
+
+        if released:
+            # The references still in the map are never looked up in the released
+            # ones, so their serials may join two ranges of released serials up.
+            serials = [_ref_serial(ref.ref) for ref in released]
+            serials += [_ref_serial(ref) for ref in scope.objects if ref in self._refs]
+            self._add_released(serials)
+        return released
+
+    def _add_released(self, serials: Iterable[int]) -> None:
+        ranges = sorted(
+            [*self._released, *((serial, serial) for serial in serials if serial >= 0)]
+        )
+        merged: List[Tuple[int, int]] = []
+        for first, last in ranges:
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        self._released = merged
+
+    def _is_released(self, ref: str) -> bool:
+        serial = _ref_serial(ref)
+        index = bisect.bisect_right(self._released, (serial, sys.maxsize)) - 1
+        return index >= 0 and self._released[index][1] >= serial
 
     def resolve(self, kernel, ref):
         # First we need to check our reference map to see if we have any instance that
@@ -53,10 +189,28 @@ class _ReferenceMap:
         except KeyError:
             pass
 
+        if self._is_released(ref.ref):
+            raise JSIIError(
+                f"Object {ref.ref} was released at the end of a release scope, and "
+                "can no longer be used"
+            )
+
+        inst = self._resolve(kernel, ref)
+        self._track(ref, inst)
+        return inst
+
+    def _resolve(self, kernel, ref):
+
         # If we got to this point, then we didn't have a referene for this, in that case
         # we want to create a new instance, but we need to create it in such a way that
         # we don't try to recreate the type inside of the JSII interface.
         class_fqn = ref.ref.rsplit("@", 1)[0]
+
+        # The types may belong to submodules that were not imported yet.
+        for fqn in [class_fqn, *(ref.interfaces or [])]:
+            if fqn != "Object" and not _is_registered(fqn):
+                _submodules.load_type(fqn)
+
         if class_fqn in _types:
             klass = _types[class_fqn]
 
@@ -71,7 +225,7 @@ class _ReferenceMap:
             inst.__jsii_ref__ = ref
 
             if ref.interfaces is not None:
-                return InterfaceDynamicProxy(
+                return _interface_proxy(
                     [inst] + self.build_interface_proxies_for_ref(ref)
                 )
             else:
@@ -80,24 +234,7 @@ class _ReferenceMap:
         # Legacy code path - Kernel invariant ought to guarantee that class_fqn can't be Struct (they're interfaces)
         elif class_fqn in _data_types:
             # Data types have been serialized by-reference (see aws/jsii#400).
-            # We retrieve all of its properties right now and then construct a value
-            # object from it. This will be slow :(.
-
-            # Ugly delayed import here because I can't solve the cyclic
-            # package dependency right now :(.
-            from ._runtime import python_jsii_mapping
-
-            data_type = _data_types[class_fqn]
-            remote_struct = _FakeReference(ref)
-
-            python_props = {
-                python_name: kernel.get(remote_struct, jsii_name)
-                for python_name, jsii_name in (
-                    python_jsii_mapping(data_type) or {}
-                ).items()
-            }
-
-            return data_type(**python_props)
+            return _lazy_struct(_data_types[class_fqn], kernel, ref)
         elif class_fqn in _enums:
             return _enums[class_fqn]
         elif class_fqn == "Object":
@@ -105,28 +242,16 @@ class _ReferenceMap:
             if ref.interfaces is not None and any(
                 fqn in _data_types for fqn in ref.interfaces
             ):
-                # Ugly delayed import here because I can't solve the cyclic
-                # package dependency right now :(.
-                from ._runtime import python_jsii_mapping
-
                 structs = [_data_types[fqn] for fqn in ref.interfaces]
-                remote_struct = _FakeReference(ref)
 
                 if len(structs) == 1:
                     struct = structs[0]
                 else:
-                    struct = new_combined_struct(structs)
-
-                return struct(
-                    **{
-                        python_name: kernel.get(remote_struct, jsii_name)
-                        for python_name, jsii_name in (
-                            python_jsii_mapping(struct) or {}
-                        ).items()
-                    }
-                )
+                    struct = _combined_struct(tuple(structs))
+
+                return _lazy_struct(struct, kernel, ref)
             else:
-                return InterfaceDynamicProxy(self.build_interface_proxies_for_ref(ref))
+                return _interface_proxy(self.build_interface_proxies_for_ref(ref))
         else:
             raise ValueError(f"Unknown type: {class_fqn}")
 
@@ -159,19 +284,33 @@ class Opaque:
 
 
 class InterfaceDynamicProxy(object):
+    # The delegate each attribute resolves to, for the attributes their classes define.
+    # Only set on the classes made by _interface_proxy_class.
+    _owners: Mapping[str, int] = {}
+
     def __init__(self, delegates):
         self._delegates = delegates
 
+    @property
+    def __jsii_ref__(self) -> ObjRef:
+        # All delegates are bound to the same reference.
+        return self._delegates[0].__jsii_ref__
+
     def __getattr__(self, name):
         for delegate in self._delegates:
-            if hasattr(delegate, name):
+            try:
                 return getattr(delegate, name)
+            except AttributeError:
+                pass
         type_info = "+".join([str(delegate.__class__) for delegate in self._delegates])
         raise AttributeError(f"'%s' object has no attribute '%s'" % (type_info, name))
 
     def __setattr__(self, name, value):
         if name == "_delegates":
             return super().__setattr__(name, value)
+        owner = self._owners.get(name)
+        if owner is not None:
+            return setattr(self._delegates[owner], name, value)
         for delegate in self._delegates:
             if hasattr(delegate, name):
                 return setattr(delegate, name, value)
@@ -179,6 +318,164 @@ class InterfaceDynamicProxy(object):
         raise AttributeError(f"'%s' object has no attribute '%s'" % (type_info, name))
 
 
+class _Delegated:
+    """Reads an attribute of one of the delegates of an InterfaceDynamicProxy.
+
+    Raising AttributeError (as the delegate may) falls back to the proxy's
+    __getattr__, which tries the other delegates.
+    """
+
+    __slots__ = ("index", "name")
+
+    def __init__(self, index: int, name: str) -> None:
+        self.index = index
+        self.name = name
+
+    def __get__(self, inst: Any, owner: Type) -> Any:
+        if inst is None:
+            raise AttributeError(self.name)
+        return getattr(inst._delegates[self.index], self.name)
+
+
+_interface_proxy_classes: Dict[Tuple[Type, ...], Type] = {}
+
+
+def _interface_proxy_class(classes: Tuple[Type, ...]) -> Type:
+    """The InterfaceDynamicProxy subclass for delegates of the given classes.
+
+    Each attribute their classes define resolves to the first delegate that has it,
+    as InterfaceDynamicProxy.__getattr__ would, without probing them on every access.
+    Special names are left to __getattr__, so that the class itself looks the same.
+    """
+    try:
+        return _interface_proxy_classes[classes]
+    except KeyError:
+        pass
+
+    owners: Dict[str, int] = {}
+    for index, klass in enumerate(classes):
+        for name in dir(klass):
+            if name.startswith("__") and name.endswith("__"):
+                continue
+            if hasattr(InterfaceDynamicProxy, name):
+                continue
+            owners.setdefault(name, index)
+
+    namespace: Dict[str, Any] = {
+        name: _Delegated(index, name) for name, index in owners.items()
+    }
+    namespace["_owners"] = owners
+    klass = _interface_proxy_classes[classes] = type(
+        InterfaceDynamicProxy.__name__, (InterfaceDynamicProxy,), namespace
+    )
+    return klass
+
+
+def _interface_proxy(delegates: List[Any]) -> InterfaceDynamicProxy:
+    klass = _interface_proxy_class(tuple(type(delegate) for delegate in delegates))
+    return klass(delegates)
+
+
+class JSIIStruct:
+    """The base class of data types (structs).
+
+    Their fields are kept in a ``_values`` dict, keyed by their Python names, which
+    is all their instances hold: generated data types declare empty ``__slots__``,
+    so they don't get a ``__dict__`` of their own.
+    """
+
+    __slots__ = ("_values",)
+
+    def __eq__(self, rhs: Any) -> bool:
+        return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+    def __ne__(self, rhs: Any) -> bool:
+        return not (rhs == self)
+
+    def __repr__(self) -> str:
+        return "%s(%s)" % (
+            _data_type_name(type(self)),
+            ", ".join(k + "=" + repr(v) for k, v in self._values.items()),
+        )
+
+
+_data_type_names: Dict[Type, str] = {}
+
+
+def _data_type_name(cls: Type) -> str:
+    # Named after the data type, as generated, even in subclasses of it.
+    try:
+        return _data_type_names[cls]
+    except KeyError:
+        data_type = next((c for c in cls.__mro__ if "__jsii_type__" in vars(c)), cls)
+        name = _data_type_names[cls] = data_type.__name__
+        return name
+
+
+class _RemoteValues:
+    """The values of a struct the kernel returned by reference.
+
+    They are only retrieved (all at once) when first read. They then replace this
+    descriptor in the instance's __dict__, so later reads cost nothing.
+    """
+
+    def __get__(self, inst: Any, owner: Type) -> Any:
+        if inst is None:
+            return self
+
+        kernel, ref = inst.__dict__.pop("_remote_ref")
+        struct = owner.__jsii_remote_struct__
+        mapping = getattr(struct, "__jsii_name_mapping__", None) or {}
+        values = kernel.get_many(_FakeReference(ref), list(mapping.values()))
+
+        # Building the struct validates the values, as if they had been passed in.
+        values = struct(**dict(zip(mapping.keys(), values)))._values
+        inst.__dict__["_values"] = values
+        return values
+
+
+_lazy_struct_classes: Dict[Type, Type] = {}
+_combined_structs: Dict[Tuple[Type, ...], Type] = {}
+
+
+def _combined_struct(structs: Tuple[Type, ...]) -> Type:
+    # Lazy struct classes are kept per struct, so combinations must be reused too.
+    try:
+        return _combined_structs[structs]
+    except KeyError:
+        combined = _combined_structs[structs] = new_combined_struct(structs)
+        return combined
+
+
+def _lazy_struct(struct: Type, kernel: Any, ref: ObjRef) -> Any:
+    try:
+        klass = _lazy_struct_classes[struct]
+    except KeyError:
+
+        def __eq__(self, rhs: Any) -> bool:
+            return isinstance(rhs, struct) and rhs._values == self._values
+
+        def __ne__(self, rhs: Any) -> bool:
+            return not (self == rhs)
+
+        klass = _lazy_struct_classes[struct] = type(
+            struct.__name__,
+            (struct,),
+            {
+                "__module__": struct.__module__,
+                "__qualname__": struct.__qualname__,
+                "__jsii_remote_struct__": struct,
+                "_values": _RemoteValues(),
+                "__eq__": __eq__,
+                "__ne__": __ne__,
+            },
+        )
+
+    inst = klass.__new__(klass)
+    inst.__dict__["_remote_ref"] = (kernel, ref)
+    return inst
+
+
 def new_combined_struct(structs: Iterable[Type]) -> Type:
     label = " + ".join(struct.__name__ for struct in structs)
 
@@ -210,5 +507,8 @@ _refs = _ReferenceMap(_types)
 
 
 register_reference = _refs.register
+pin_reference = _refs.pin
+open_release_scope = _refs.open_scope
+close_release_scope = _refs.close_scope
 resolve_reference = _refs.resolve
 resolve_id = _refs.resolve_id
@@ -0,0 +1,199 @@
+# Rewrites installed generated packages in place, to use what the runtime provides.
+#
+# jsii-pacmak generates bindings that only rely on the runtime's stable API, and this
+# runtime offers faster ways to do some of what they do:
+#
+#   * arguments are checked with jsii.check_type(), which compiles each expected type
+#     into a predicate once, against the hints jsii.type_hints() caches per stub,
+#     rather than with typeguard on every call.
+#   * data types derive from jsii.JSIIStruct, which provides their __eq__, __ne__ and
+#     __repr__, and declare empty __slots__, so their instances only hold _values.
+#   * modules are published with jsii.publish(__name__), which hides their private
+#     names in place, rather than with publication.publish(), which copies them.
+#   * submodules are registered with jsii.lazy_submodules(), which imports each one
+#     when it is first used, rather than all of them along with their parent.
+#
+# The rewritten modules behave the same. Run this after every install or upgrade of
+# the packages, as pip puts back the generated form:
+#
+#     python -m jsii._rewrite aws_cdk constructs
+#
+# Each rewrite leaves alone what it already rewrote, so running it again is harmless.
+import argparse
+import importlib.util
+import os
+import re
+import textwrap
+
+from typing import Callable, List, Optional, Sequence
+
+
+_DATA_TYPE = re.compile(
+    # Data types may be nested in classes, and the decorator's arguments are indented
+    # further. Data types that extend others list them.
+    r"^([ \t]*)(@jsii\.data_type\(\n(?:\1[ \t].*\n)*\1\)\n)"
+    r"\1class (\w+)(\([^()]*\))?:\n",
+    re.MULTILINE,
+)
+
+_STRUCT_METHODS = """\
+def __eq__(self, rhs: typing.Any) -> builtins.bool:
+    return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+def __ne__(self, rhs: typing.Any) -> builtins.bool:
+    return not (rhs == self)
+
+def __repr__(self) -> str:
+    return "{name}(%s)" % ", ".join(
+        k + "=" + repr(v) for k, v in self._values.items()
+    )
+"""
+
+
+def rewrite_data_types(source: str) -> str:
+    parts: List[str] = []
+    position = 0
+    for match in _DATA_TYPE.finditer(source):
+        indent, decorator, name, bases = match.groups()
+        slots = f"{indent}    __slots__ = ()\n"
+        if source.startswith(slots, match.end()):
+            continue
+        parts.append(source[position : match.start()])
+        # The data types they extend were rewritten too.
+        bases = bases or "(jsii.JSIIStruct)"
+        parts.append(f"{indent}{decorator}{indent}class {name}{bases}:\n{slots}\n")
+        position = match.end()
+
+        # These come last in the class, and are the only ones to mention its name.
+        methods = textwrap.indent(_STRUCT_METHODS.format(name=name), indent + "    ")
+        end = source.find(methods, position)
+        if end != -1:
+            parts.append(source[position:end])
+            # Along with the blank line that separates them from what follows
+            position = end + len(methods)
+            if source.startswith("\n", position):
+                position += 1
+    parts.append(source[position:])
+    return "".join(parts)
+
+
+_PUBLISH = re.compile(r"^publication\.publish\(\)\n", re.MULTILINE)
+_IMPORT_PUBLICATION = re.compile(r"^import publication\n", re.MULTILINE)
+
+
+def rewrite_publication(source: str) -> str:
+    source, count = _PUBLISH.subn("jsii.publish(__name__)\n", source)
+    if count:
+        source = _IMPORT_PUBLICATION.sub("", source, count=1)
+    return source
+
+
+_SUBMODULE_IMPORTS = re.compile(
+    r"^# Loading modules to ensure their types are registered"
+    r" with the jsii runtime library\n"
+    r"((?:from \. import \w+\n)+)",
+    re.MULTILINE,
+)
+
+
+def _lazy_submodules(match: "re.Match[str]") -> str:
+    names = "".join(
+        f'    "{line[len("from . import ") :]}",\n'
+        for line in match.group(1).splitlines()
+    )
+    return (
+        "# Loading modules on first use,"
+        " which registers their types with the jsii runtime library\n"
+        f"jsii.lazy_submodules(__name__, [\n{names}])\n"
+    )
+
+
+def rewrite_submodules(source: str) -> str:
+    return _SUBMODULE_IMPORTS.sub(_lazy_submodules, source)
+
+
+# The shim over typeguard's API that the generated modules define, with a blank line.
+_TYPEGUARD_SHIM = """\
+import typeguard
+from importlib.metadata import version as _metadata_package_version
+TYPEGUARD_MAJOR_VERSION = int(_metadata_package_version('typeguard').split('.')[0])
+
+def check_type(argname: str, value: object, expected_type: typing.Any) -> typing.Any:
+    if TYPEGUARD_MAJOR_VERSION <= 2:
+        return typeguard.check_type(argname=argname, value=value, expected_type=expected_type) # type:ignore
+    else:
+        if isinstance(value, jsii._reference_map.InterfaceDynamicProxy): # pyright: ignore [reportAttributeAccessIssue]
+           pass
+        else:
+            if TYPEGUARD_MAJOR_VERSION == 3:
+                typeguard.config.collection_check_strategy = typeguard.CollectionCheckStrategy.ALL_ITEMS # type:ignore
+                typeguard.check_type(value=value, expected_type=expected_type) # type:ignore
+            else:
+                typeguard.check_type(value=value, expected_type=expected_type, collection_check_strategy=typeguard.CollectionCheckStrategy.ALL_ITEMS) # type:ignore
+
+"""
+
+
+def rewrite_type_checking(source: str) -> str:
+    source = source.replace(_TYPEGUARD_SHIM, "check_type = jsii.check_type\n\n", 1)
+    source = source.replace(
+        "\nfrom typeguard import check_type\n", "\nfrom jsii import check_type\n", 1
+    )
+    return source.replace(
+        "typing.get_type_hints(_typecheckingstub__",
+        "jsii.type_hints(_typecheckingstub__",
+    )
+
+
+_REWRITES: List[Callable[[str], str]] = [
+    rewrite_type_checking,
+    rewrite_data_types,
+    rewrite_publication,
+    rewrite_submodules,
+]
+
+
+def rewrite_source(source: str) -> str:
+    for rewrite in _REWRITES:
+        source = rewrite(source)
+    return source
+
+
+def rewrite_package(name: str) -> int:
+    """Rewrites the modules of an installed package, returns how many changed."""
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.submodule_search_locations:
+        raise ValueError(f"{name} is not an installed package")
+    source_root = list(spec.submodule_search_locations)[0]
+
+    modules = 0
+    for directory, dirnames, filenames in os.walk(source_root):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, encoding="utf-8") as fp:
+                source = fp.read()
+            rewritten = rewrite_source(source)
+            if rewritten != source:
+                with open(path, "w", encoding="utf-8") as fp:
+                    fp.write(rewritten)
+                modules += 1
+    return modules
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m jsii._rewrite",
+        description="Rewrite installed generated jsii packages in place.",
+    )
+    parser.add_argument("packages", nargs="+", help="packages to rewrite")
+    args = parser.parse_args(argv)
+
+    for name in args.packages:
+        print(f"{name}: {rewrite_package(name)} modules rewritten")
+
+
+if __name__ == "__main__":
+    main()
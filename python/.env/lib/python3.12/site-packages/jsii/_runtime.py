@@ -17,9 +17,9 @@ from typing import (
     TypeVar,
 )
 
-from . import _reference_map
+from . import _assembly_cache, _reference_map, _submodules
 from ._compat import importlib_resources
-from ._kernel import Kernel
+from ._kernel import Kernel, _invalidate_overrides
 from .python import _ClassPropertyMeta
 
 
@@ -42,6 +42,7 @@ class JSIIAssembly:
         # offer any functionality itself, besides this class method that will trigger
         # the loading of the given assembly in the JSII Kernel.
         assembly = cls(*args, **kwargs)
+        _submodules.register_assembly(assembly.name, assembly.module)
 
         # Actually load the assembly into the kernel, we're using the
         # importlib.resources API here instead of manually constructing the path, in
@@ -52,7 +53,12 @@ class JSIIAssembly:
                 assembly.filename
             )
         ) as assembly_path:
-            _kernel.load(assembly.name, assembly.version, os.fspath(assembly_path))
+            tarball = os.fspath(assembly_path)
+            if _assembly_cache.enabled():
+                tarball = _assembly_cache.snapshot(
+                    assembly.name, assembly.version, tarball
+                )
+            _kernel.load(assembly.name, assembly.version, tarball)
 
         # Give our record of the assembly back to the caller.
         return assembly
@@ -83,6 +89,9 @@ M = TypeVar("M")
 
 
 class JSIIMeta(_ClassPropertyMeta, type):
+    # Lets the kernel cache what it derives from these classes, see __setattr__.
+    __jsii_reports_mutations__ = True
+
     def __new__(
         cls: Type["JSIIMeta"],
         name: str,
@@ -111,6 +120,15 @@ class JSIIMeta(_ClassPropertyMeta, type):
 
         return cast("JSIIMeta", obj)
 
+    def __setattr__(cls, key: str, value: Any) -> None:
+        super().__setattr__(key, value)
+        # Any change to a class may change the overrides of its subclasses.
+        _invalidate_overrides()
+
+    def __delattr__(cls, key: str) -> None:
+        super().__delattr__(key)
+        _invalidate_overrides()
+
     def __call__(cls: Type[M], *args: Any, **kwargs) -> M:
         # There is no way to constrain the metaclass of a `Type[M]` hint today, so we have to
         # perform a `cast` trick here in order for MyPy to accept this code as valid... The implicit
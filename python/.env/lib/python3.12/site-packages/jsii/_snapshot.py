@@ -0,0 +1,307 @@
+# Import snapshots of generated packages.
+#
+# The generated bindings are mostly docstrings and type checking stubs, which Python
+# has to unmarshal (docstrings) and execute (stubs, whose annotations are evaluated
+# when they are defined) on every import. A snapshot is a copy of the packages where:
+#
+#   * docstrings are moved to a side file (<module>.jsii-docs.json), which is only
+#     read when a docstring is asked for. Classes get a __doc__ that reads it lazily,
+#     any other docstring is available through docstring().
+#   * type checking stubs are moved to an index (<module>.jsii-stubs.json), and each
+#     one is only compiled the first time its arguments are validated.
+#   * the resulting modules are compiled to bytecode ahead of time.
+#
+# Build one with:
+#
+#     python -m jsii._snapshot .jsii-snapshot aws_cdk constructs
+#
+# and put it in front of the original packages with PYTHONPATH=.jsii-snapshot. The
+# snapshot must be rebuilt whenever the packages are upgraded.
+import argparse
+import ast
+import compileall
+import importlib.util
+import json
+import os
+import shutil
+import sys
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, cast
+
+
+_STUB_PREFIX = "_typecheckingstub__"
+_DOCS_SUFFIX = ".jsii-docs.json"
+_STUBS_SUFFIX = ".jsii-stubs.json"
+_MANIFEST = "jsii-snapshot.json"
+
+
+class ModuleSnapshot:
+    """The side files of a snapshot module, loaded when first needed."""
+
+    def __init__(self, module_globals: Dict[str, Any]) -> None:
+        self._globals = module_globals
+        self._base = os.path.splitext(module_globals["__file__"])[0]
+        self._docs: Optional[Dict[str, str]] = None
+        self._stub_sources: Optional[Dict[str, str]] = None
+        self._stubs: Dict[str, Callable[..., None]] = {}
+
+    def docs(self) -> Dict[str, str]:
+        if self._docs is None:
+            with open(self._base + _DOCS_SUFFIX, encoding="utf-8") as fp:
+                self._docs = json.load(fp)
+        return self._docs
+
+    def doc(self, qualname: str) -> "_LazyDoc":
+        return _LazyDoc(self, qualname)
+
+    def stub(self, key: str) -> Callable[..., None]:
+        try:
+            return self._stubs[key]
+        except KeyError:
+            pass
+
+        if self._stub_sources is None:
+            with open(self._base + _STUBS_SUFFIX, encoding="utf-8") as fp:
+                self._stub_sources = json.load(fp)
+
+        # The stub is defined in its module's namespace, so its annotations resolve
+        # exactly as they would have in the original module.
+        namespace: Dict[str, Any] = {}
+        exec(self._stub_sources[key], self._globals, namespace)
+        stub = self._stubs[key] = namespace[_STUB_PREFIX + key]
+        return stub
+
+
+class _LazyDoc:
+    # Classes look __doc__ up through the descriptor protocol, so this can stand in
+    # for their docstring.
+    def __init__(self, snapshot: ModuleSnapshot, qualname: str) -> None:
+        self._snapshot = snapshot
+        self._qualname = qualname
+
+    def __get__(self, inst: Any, owner: Any = None) -> Optional[str]:
+        return self._snapshot.docs().get(self._qualname)
+
+
+def docstring(obj: Any) -> Optional[str]:
+    """Returns the docstring of obj, including those a snapshot moved aside."""
+    doc = getattr(obj, "__doc__", None)
+    if doc is not None:
+        return doc
+
+    module = sys.modules.get(getattr(obj, "__module__", None) or obj.__name__)
+    snapshot = vars(module).get("_jsii_snapshot") if module is not None else None
+    if snapshot is None:
+        return None
+    qualname = "" if obj is module else getattr(obj, "__qualname__", "")
+    return snapshot.docs().get(qualname)
+
+
+class _Stripper(ast.NodeTransformer):
+    def __init__(self) -> None:
+        self.docs: Dict[str, str] = {}
+        self.stubs: Dict[str, str] = {}
+        self._scope: List[str] = []
+        # The stubs referenced other than by a call that is rewritten to load them
+        self._referenced: Set[str] = set()
+
+    def _take_docstring(self, node: Any) -> Optional[str]:
+        doc = ast.get_docstring(node, clean=False)
+        if doc is not None:
+            del node.body[0]
+            self.docs[".".join(self._scope)] = doc
+        return doc
+
+    def _take_attribute_docstrings(self, body: List[ast.stmt]) -> List[ast.stmt]:
+        # Attributes (enum members, mostly) are documented by a string that follows
+        # them, which does nothing at runtime.
+        kept: List[ast.stmt] = []
+        for child in body:
+            if (
+                isinstance(child, ast.Expr)
+                and isinstance(child.value, ast.Constant)
+                and isinstance(child.value.value, str)
+            ):
+                previous = kept[-1] if kept else None
+                if isinstance(previous, ast.Assign) and len(previous.targets) == 1:
+                    target = previous.targets[0]
+                    if isinstance(target, ast.Name):
+                        name = ".".join([*self._scope, target.id])
+                        self.docs[name] = child.value.value
+                continue
+            kept.append(child)
+        return kept or [ast.Pass()]
+
+    def visit_Module(self, node: ast.Module) -> ast.Module:
+        self._take_docstring(node)
+        body = []
+        stubs = []
+        for child in node.body:
+            if isinstance(child, ast.FunctionDef) and child.name.startswith(
+                _STUB_PREFIX
+            ):
+                self.stubs[child.name[len(_STUB_PREFIX) :]] = ast.unparse(child)
+                stubs.append(child)
+            else:
+                body.append(self.visit(child))
+        # Stubs that are still referenced by name, other than through a call that was
+        # rewritten, are kept defined as well.
+        body += [stub for stub in stubs if stub.name in self._referenced]
+        node.body = self._take_attribute_docstrings(body)
+        return node
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.ClassDef:
+        self._scope.append(node.name)
+        try:
+            if self._take_docstring(node) is not None:
+                doc = f"__doc__ = _jsii_snapshot.doc({'.'.join(self._scope)!r})"
+                node.body.insert(0, _parse_statement(doc))
+            node.body = self._take_attribute_docstrings(node.body)
+            self.generic_visit(node)
+        finally:
+            self._scope.pop()
+        return node
+
+    def _visit_function(self, node: Any) -> Any:
+        self._scope.append(node.name)
+        try:
+            self._take_docstring(node)
+            if not node.body:
+                node.body.append(ast.Pass())
+            self.generic_visit(node)
+        finally:
+            self._scope.pop()
+        return node
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_Call(self, node: ast.Call) -> ast.Call:
+        # jsii.type_hints(_typecheckingstub__<key>) => ...(_jsii_snapshot.stub("<key>"))
+        # The modules that were not rewritten to use jsii.type_hints call
+        # typing.get_type_hints instead.
+        if (
+            isinstance(node.func, ast.Attribute)
+            and node.func.attr in ("type_hints", "get_type_hints")
+            and len(node.args) == 1
+            and isinstance(node.args[0], ast.Name)
+            and node.args[0].id.startswith(_STUB_PREFIX)
+        ):
+            key = node.args[0].id[len(_STUB_PREFIX) :]
+            stub = _parse_statement(f"_jsii_snapshot.stub({key!r})")
+            node.args[0] = cast(ast.Expr, stub).value
+            return node
+        self.generic_visit(node)
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        if node.id.startswith(_STUB_PREFIX):
+            self._referenced.add(node.id)
+        return node
+
+
+def _parse_statement(source: str) -> ast.stmt:
+    return ast.parse(source).body[0]
+
+
+def _strip_module(
+    source: str,
+) -> Tuple[Optional[str], Dict[str, str], Dict[str, str]]:
+    tree = ast.parse(source)
+    stripper = _Stripper()
+    tree = stripper.visit(tree)
+    if not stripper.docs and not stripper.stubs:
+        return None, {}, {}
+
+    # The side files are reached through this, right after any __future__ imports.
+    index = 0
+    while (
+        index < len(tree.body)
+        and isinstance(tree.body[index], ast.ImportFrom)
+        and tree.body[index].module == "__future__"  # type: ignore
+    ):
+        index += 1
+    tree.body[index:index] = ast.parse(
+        "from jsii._snapshot import ModuleSnapshot as _JsiiModuleSnapshot\n"
+        "_jsii_snapshot = _JsiiModuleSnapshot(globals())\n"
+    ).body
+    stripped = ast.unparse(ast.fix_missing_locations(tree)) + "\n"
+    return stripped, stripper.docs, stripper.stubs
+
+
+def _snapshot_package(name: str, output: str) -> int:
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.submodule_search_locations:
+        raise ValueError(f"{name} is not an installed package")
+    source_root = list(spec.submodule_search_locations)[0]
+    target_root = os.path.join(output, name)
+
+    modules = 0
+    for directory, dirnames, filenames in os.walk(source_root):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+        target_dir = os.path.join(target_root, os.path.relpath(directory, source_root))
+        os.makedirs(target_dir, exist_ok=True)
+
+        for filename in filenames:
+            source_path = os.path.join(directory, filename)
+            target_path = os.path.join(target_dir, filename)
+            if not filename.endswith(".py"):
+                # Assembly tarballs and such are used as they are.
+                _link_or_copy(source_path, target_path)
+                continue
+
+            with open(source_path, encoding="utf-8") as fp:
+                source = fp.read()
+            stripped, docs, stubs = _strip_module(source)
+            base = os.path.splitext(target_path)[0]
+            with open(target_path, "w", encoding="utf-8") as fp:
+                fp.write(source if stripped is None else stripped)
+            if stripped is not None:
+                with open(base + _DOCS_SUFFIX, "w", encoding="utf-8") as fp:
+                    json.dump(docs, fp)
+                with open(base + _STUBS_SUFFIX, "w", encoding="utf-8") as fp:
+                    json.dump(stubs, fp)
+            modules += 1
+
+    compileall.compile_dir(target_root, quiet=1)
+    return modules
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    if os.path.lexists(target):
+        os.unlink(target)
+    try:
+        os.symlink(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def build(output: str, packages: Sequence[str]) -> None:
+    """Writes a snapshot of the given generated packages into output."""
+    os.makedirs(output, exist_ok=True)
+    manifest: Dict[str, Any] = {"python": sys.version, "packages": {}}
+    for name in packages:
+        target = os.path.join(output, name)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        modules = _snapshot_package(name, output)
+        manifest["packages"][name] = {"modules": modules}
+
+    with open(os.path.join(output, _MANIFEST), "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=2)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m jsii._snapshot",
+        description="Build a startup-optimized copy of generated jsii packages.",
+    )
+    parser.add_argument("output", help="directory to write the snapshot into")
+    parser.add_argument("packages", nargs="+", help="packages to snapshot")
+    args = parser.parse_args(argv)
+
+    build(args.output, args.packages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Lazy loading of the submodules of generated packages.
+#
+# Generated packages used to import every one of their submodules up front, so that
+# all of their types were registered with the runtime before the kernel could hand
+# out any instance of them. Instead, submodules are now imported when they are first
+# accessed as attributes of their parent (PEP 562), or when the kernel refers to one
+# of their types. Set JSII_LAZY_SUBMODULES=0 to import all submodules eagerly again.
+import importlib
+import os
+import sys
+
+from typing import Any, Dict, List, Sequence, Set
+
+
+# The Python module of each loaded assembly.
+_assembly_modules: Dict[str, str] = {}
+
+
+def enabled() -> bool:
+    return os.environ.get("JSII_LAZY_SUBMODULES", "1") not in ("", "0")
+
+
+def register_assembly(name: str, module: str) -> None:
+    _assembly_modules[name] = module
+
+
+def assembly_packages() -> Set[str]:
+    """The top-level packages of the generated bindings loaded so far."""
+    return {module.partition(".")[0] for module in _assembly_modules.values()}
+
+
+def lazy_submodules(module_name: str, names: Sequence[str]) -> None:
+    """Makes the given submodules of a generated module importable on first access.
+
+    :param module_name: the name of the generated module.
+    :param names: the names of its submodules.
+    """
+    if not enabled():
+        for name in names:
+            importlib.import_module(f"{module_name}.{name}")
+        return
+
+    module = sys.modules[module_name]
+    submodules = frozenset(names)
+
+    def __getattr__(name: str) -> Any:
+        if name in submodules:
+            # Importing the submodule also binds it on its parent.
+            return importlib.import_module(f"{module_name}.{name}")
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+
+    def __dir__() -> List[str]:
+        return sorted(submodules.union(vars(module)))
+
+    setattr(module, "__getattr__", __getattr__)
+    setattr(module, "__dir__", __dir__)
+
+
+def load_type(fqn: str) -> None:
+    """Imports the submodule that declares the given jsii type, if it is not yet."""
+    for assembly, module in _assembly_modules.items():
+        if not fqn.startswith(f"{assembly}."):
+            continue
+
+        # Nested types are named after their parent type, which isn't a module, so
+        # the longest prefix of the namespace that is a module declares the type.
+        namespace = fqn[len(assembly) + 1 :].split(".")[:-1]
+        for end in range(len(namespace), 0, -1):
+            name = ".".join([module, *namespace[:end]])
+            try:
+                importlib.import_module(name)
+            except ModuleNotFoundError as exc:
+                if exc.name != name:
+                    raise
+                continue
+            return
+        return
@@ -0,0 +1,269 @@
+# Argument validation for the generated bindings.
+#
+# Every generated method validates its arguments against the hints of a type checking
+# stub. The hints of each stub are resolved once, and each expected type is compiled
+# once into a predicate that recognizes the common cases (primitives, jsii classes and
+# interfaces, optionals, lists and maps of those) without going through typeguard.
+# Anything the predicate does not accept is handed to typeguard, which either accepts
+# it anyway or produces the usual error message.
+#
+# How many calls are validated is controlled by a policy, set with JSII_TYPE_CHECKING
+# or configure_type_checking():
+#
+#   full            validate every call (the default)
+#   first-calls:N   validate the first N calls of each call site
+#   sample:R        validate a random fraction R (between 0 and 1) of the calls
+#   off             never validate
+#
+# How many arguments were validated or skipped, and the time that took, is only
+# collected with JSII_TYPE_CHECKING_STATS=1 (or configure_type_checking(stats=True)),
+# so that validating an argument costs nothing more than the check itself otherwise.
+import collections.abc
+import functools
+import os
+import random
+import sys
+import time
+import typing
+import warnings
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import attr
+
+from . import _reference_map
+
+
+_Predicate = Callable[[Any], bool]
+
+_type_hints: Dict[Callable[..., Any], Dict[str, Any]] = {}
+_predicates: Dict[Any, _Predicate] = {}
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class _Policy:
+    mode: str
+    limit: int = 0
+    rate: float = 1.0
+
+
+def _parse_policy(policy: str) -> _Policy:
+    mode, _, parameter = policy.strip().partition(":")
+    try:
+        if mode in ("full", "off") and not parameter:
+            return _Policy(mode)
+        elif mode == "first-calls" and int(parameter) >= 0:
+            return _Policy(mode, limit=int(parameter))
+        elif mode == "sample" and 0 <= float(parameter) <= 1:
+            return _Policy(mode, rate=float(parameter))
+    except ValueError:
+        pass
+    raise ValueError(
+        f"Invalid type checking policy: {policy!r} (expected full, off, "
+        "first-calls:<count> or sample:<rate>)"
+    )
+
+
+def _policy_from_env() -> _Policy:
+    policy = os.environ.get("JSII_TYPE_CHECKING", "full")
+    try:
+        return _parse_policy(policy)
+    except ValueError as e:
+        # Validating every call is always safe.
+        warnings.warn(f"{e}, ignoring JSII_TYPE_CHECKING")
+        return _Policy("full")
+
+
+_policy = _policy_from_env()
+_stats = os.environ.get("JSII_TYPE_CHECKING_STATS", "0") not in ("", "0")
+# How many times each call site (calling code, argument name) was validated.
+_call_counts: Dict[Tuple[Any, str], int] = {}
+
+
+@attr.s(auto_attribs=True, slots=True)
+class _Counters:
+    checked: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+
+_counters = _Counters()
+
+
+def configure_type_checking(
+    policy: Optional[str] = None, *, stats: Optional[bool] = None
+) -> None:
+    """Selects which calls of the generated bindings have their arguments validated.
+
+    :param policy: one of "full", "off", "first-calls:<count>" or "sample:<rate>".
+    :param stats: whether to count the validated arguments and time their checks.
+    """
+    global _policy, _stats
+    if policy is not None:
+        _policy = _parse_policy(policy)
+        _call_counts.clear()
+    if stats is not None:
+        _stats = stats
+
+
+def type_checking_stats() -> Tuple[int, int, float]:
+    """Returns how many arguments were validated, skipped, and the time it took.
+
+    These are only collected while stats are enabled, see configure_type_checking.
+    """
+    return _counters.checked, _counters.skipped, _counters.seconds
+
+
+def type_hints(stub: Callable[..., Any]) -> Dict[str, Any]:
+    try:
+        return _type_hints[stub]
+    except KeyError:
+        if not _stats:
+            hints = _type_hints[stub] = typing.get_type_hints(stub)
+            return hints
+        start = time.perf_counter()
+        hints = _type_hints[stub] = typing.get_type_hints(stub)
+        _counters.seconds += time.perf_counter() - start
+        return hints
+
+
+def check_type(argname: str, value: object, expected_type: Any) -> Any:
+    policy = _policy
+    if policy.mode != "full":
+        if policy.mode == "off":
+            skip = True
+        elif policy.mode == "first-calls":
+            key = (sys._getframe(1).f_code, argname)
+            count = _call_counts.get(key, 0)
+            skip = count >= policy.limit
+            if not skip:
+                _call_counts[key] = count + 1
+        else:
+            skip = random.random() >= policy.rate
+        if skip:
+            if _stats:
+                _counters.skipped += 1
+            return
+
+    if not _stats:
+        _check_type(argname, value, expected_type)
+        return
+
+    start = time.perf_counter()
+    try:
+        _check_type(argname, value, expected_type)
+    finally:
+        _counters.checked += 1
+        _counters.seconds += time.perf_counter() - start
+
+
+def _check_type(argname: str, value: object, expected_type: Any) -> None:
+    try:
+        predicate = _predicates[expected_type]
+    except KeyError:
+        predicate = _compile(expected_type)
+        try:
+            _predicates[expected_type] = predicate
+        except TypeError:
+            # Not hashable, so it'll have to be compiled again next time.
+            pass
+    except TypeError:
+        predicate = _compile(expected_type)
+
+    if not predicate(value):
+        _typeguard_check_type(argname, value, expected_type)
+
+
+def _never(value: Any) -> bool:
+    return False
+
+
+def _always(value: Any) -> bool:
+    return True
+
+
+def _is_none(value: Any) -> bool:
+    return value is None
+
+
+def _compile(expected_type: Any) -> _Predicate:
+    if expected_type is Any or expected_type is object:
+        return _always
+    if expected_type is type(None) or expected_type is None:
+        return _is_none
+
+    origin = typing.get_origin(expected_type)
+    if origin is None:
+        if isinstance(expected_type, type):
+            return _compile_class(expected_type)
+        return _never
+
+    args = typing.get_args(expected_type)
+    if origin is typing.Union:
+        alternatives = tuple(_compile(arg) for arg in args)
+        return lambda value: any(accepts(value) for accepts in alternatives)
+    if origin in (list, collections.abc.Sequence) and len(args) == 1:
+        item = _compile(args[0])
+        kinds = (list,) if origin is list else (list, tuple)
+        return lambda value: type(value) in kinds and all(item(i) for i in value)
+    if origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        item = _compile(args[0])
+        return lambda value: type(value) is tuple and all(item(i) for i in value)
+    if origin in (dict, collections.abc.Mapping) and len(args) == 2:
+        key, item = _compile(args[0]), _compile(args[1])
+        return lambda value: type(value) is dict and all(
+            key(k) and item(v) for k, v in value.items()
+        )
+    return _never
+
+
+def _compile_class(expected_type: type) -> _Predicate:
+    # Only nominal matches are recognized here. jsii interfaces are protocols, which
+    # do not support isinstance. Python classes declare them with @jsii.implements, and
+    # proxies only implement them by delegation.
+    def accepts(value: Any) -> bool:
+        if expected_type in type(value).__mro__:
+            return True
+        if any(
+            expected_type in iface.__mro__
+            for iface in getattr(type(value), "__jsii_ifaces__", ())
+        ):
+            return True
+        if isinstance(value, _reference_map.InterfaceDynamicProxy):
+            return any(
+                expected_type in type(delegate).__mro__
+                for delegate in value._delegates
+            )
+        return False
+
+    return accepts
+
+
+@functools.lru_cache(maxsize=None)
+def _typeguard_major_version() -> int:
+    from importlib.metadata import version
+
+    return int(version("typeguard").split(".")[0])
+
+
+def _typeguard_check_type(argname: str, value: object, expected_type: Any) -> None:
+    import typeguard
+
+    major_version = _typeguard_major_version()
+    if major_version <= 2:
+        typeguard.check_type(  # type: ignore
+            argname=argname, value=value, expected_type=expected_type
+        )
+    elif isinstance(value, _reference_map.InterfaceDynamicProxy):
+        pass
+    elif major_version == 3:
+        typeguard.config.collection_check_strategy = (  # type: ignore
+            typeguard.CollectionCheckStrategy.ALL_ITEMS  # type: ignore
+        )
+        typeguard.check_type(value=value, expected_type=expected_type)  # type: ignore
+    else:
+        typeguard.check_type(  # type: ignore
+            value=value,
+            expected_type=expected_type,
+            collection_check_strategy=typeguard.CollectionCheckStrategy.ALL_ITEMS,  # type: ignore
+        )
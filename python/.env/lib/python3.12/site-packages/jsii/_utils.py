@@ -1,4 +1,7 @@
 import functools
+import os
+import sys
+import tempfile
 
 from typing import Any, MutableMapping, Type
 
@@ -24,3 +27,17 @@ def memoized_property(fgetter):
         return stored[0]
 
     return property(wrapped)
+
+
+def default_cache_root(name: str) -> str:
+    # Caches sit next to the package cache the kernel maintains for extracted
+    # assemblies, which uses the same layout.
+    if sys.platform == "darwin" and os.environ.get("HOME"):
+        return os.path.join(
+            os.environ["HOME"], "Library", "Caches", "com.amazonaws.jsii", name
+        )
+    if sys.platform.startswith("linux") and os.environ.get("HOME"):
+        return os.path.join(os.environ["HOME"], ".cache", "aws", "jsii", name)
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        return os.path.join(os.environ["LOCALAPPDATA"], "AWS", "jsii", name)
+    return os.path.join(tempfile.gettempdir(), f"aws-jsii-{name}")
@@ -0,0 +1,49 @@
+"""Helpers shared by the benchmarks in this package.
+
+Every measurement runs in a fresh interpreter, since jsii keeps a single kernel
+(and node child process) per Python process.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synth_app(prepare=None) -> None:
+    """Synthesizes the app the same way ``app.py`` does, into a throwaway cdk.out.
+
+    ``prepare``, if given, is called with the app and its stack before synthesis.
+    """
+    from aws_cdk import App
+    from python.python_stack import WebAppStack
+
+    # Use the cached lookups, so no AWS credentials are needed to synthesize.
+    with open(os.path.join(PROJECT_DIR, "cdk.context.json")) as fp:
+        context = json.load(fp)
+
+    with tempfile.TemporaryDirectory() as outdir:
+        app = App(context=context, outdir=outdir)
+        stack = WebAppStack(app, "WebAppStack", env={
+            'account': '263293409914',
+            'region': os.getenv('CDK_DEFAULT_REGION', 'us-east-1')
+        })
+        if prepare is not None:
+            prepare(app, stack)
+        app.synth()
+
+
+def run_child(module: str, env=None, args=()) -> dict:
+    """Runs ``python3 -m <module> --child [args]`` and returns the JSON report it prints last."""
+    environ = dict(os.environ, **(env or {}))
+    result = subprocess.run(
+        [sys.executable, "-m", module, "--child", *args],
+        cwd=PROJECT_DIR,
+        env=environ,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,91 @@
+"""Cost of the kernel calling back into Python, with and without dispatch plans.
+
+Synthesizes the app with an aspect that visits every construct of
+``CONSTRUCTS`` extra ones, so that node calls back into Python once per
+construct. Callbacks are dispatched with the plan cached for each method
+(``jsii._kernel._handle_callback``), or, for comparison, the way they used to
+be, inspecting the method's signature on every call.
+
+    python3 -m benchmarks.callbacks
+"""
+import inspect
+import json
+import sys
+import time
+
+from ._synth import run_child, synth_app
+
+CONSTRUCTS = 2_000
+
+
+def _legacy_handle_callback(kernel, callback):
+    # _handle_callback as it was before dispatch plans, for invoke callbacks.
+    from jsii import _reference_map
+    from jsii._kernel import _recursize_dereference
+
+    obj = _reference_map.resolve_id(callback.invoke.objref.ref)
+    method = getattr(obj, callback.cookie)
+    hydrated_args = [_recursize_dereference(kernel, a) for a in callback.invoke.args or []]
+
+    kwargs = {}
+    params = inspect.signature(method).parameters
+    params_kwargs = [
+        name
+        for (name, param) in params.items()
+        if param.kind == inspect.Parameter.KEYWORD_ONLY
+    ]
+    if params_kwargs:
+        params_pos_count = len([
+            param
+            for param in params.values()
+            if param.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.POSITIONAL_ONLY)
+        ])
+        if len(hydrated_args) > params_pos_count:
+            struct = hydrated_args.pop()
+            kwargs = {name: getattr(struct, name) for name in params_kwargs if hasattr(struct, name)}
+
+    return method(*hydrated_args, **kwargs)
+
+
+def child() -> None:
+    import jsii
+    from aws_cdk import Aspects, IAspect
+    from constructs import Construct
+
+    if "--legacy" in sys.argv:
+        jsii._kernel._handle_callback = _legacy_handle_callback
+
+    @jsii.implements(IAspect)
+    class Visitor:
+        def __init__(self) -> None:
+            self.visits = 0
+
+        def visit(self, node) -> None:
+            self.visits += 1
+
+    visitor = Visitor()
+
+    def prepare(app, stack) -> None:
+        for i in range(CONSTRUCTS):
+            Construct(stack, f"Construct{i}")
+        Aspects.of(app).add(visitor)
+
+    start = time.perf_counter()
+    synth_app(prepare)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({"visits": visitor.visits, "seconds": elapsed}))
+
+
+def main() -> None:
+    for label, args in (("signature", ["--legacy"]), ("plan", [])):
+        report = run_child(__spec__.name, args=args)
+        per_visit = report["seconds"] / report["visits"] * 1e6
+        print(f"{label:>9}: {report['visits']} visits in {report['seconds']:.2f}s ({per_visit:.0f}us per visit)")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
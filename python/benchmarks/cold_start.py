@@ -0,0 +1,48 @@
+"""Cold-start time of the app, with and without the jsii assembly cache.
+
+Each run is a fresh interpreter, like ``python3 app.py``. The cache runs use an
+empty cache directory first (cold), then the populated one (warm).
+
+    python3 -m benchmarks.cold_start
+"""
+import json
+import sys
+import tempfile
+import time
+
+from ._synth import run_child, synth_app
+
+RUNS = 3
+
+
+def child() -> None:
+    start = time.perf_counter()
+    import aws_cdk  # noqa: F401 -- loads aws-cdk-lib into the kernel
+    loaded = time.perf_counter()
+    synth_app()
+    done = time.perf_counter()
+
+    print(json.dumps({"import": loaded - start, "total": done - start}))
+
+
+def _report(label: str, env: dict) -> None:
+    report = run_child(__spec__.name, env)
+    print(f"{label:>14}: import aws_cdk {report['import']:.2f}s, synth {report['total']:.2f}s")
+
+
+def main() -> None:
+    for _ in range(RUNS):
+        _report("no cache", {"JSII_ASSEMBLY_CACHE": "disabled"})
+
+    with tempfile.TemporaryDirectory() as cache_root:
+        env = {"JSII_ASSEMBLY_CACHE": "enabled", "JSII_ASSEMBLY_CACHE_ROOT": cache_root}
+        _report("cache (cold)", env)
+        for _ in range(RUNS):
+            _report("cache (warm)", env)
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
@@ -0,0 +1,62 @@
+"""Time and memory it takes to import the app's modules, per way of publishing them.
+
+The generated modules hide the names that are not in their ``__all__``. They
+used to do it with ``publication.publish()``, which copies their public names
+into a new module; ``jsii.publish()`` hides them in place instead. Each run is
+a fresh interpreter, which imports what ``app.py`` imports, and reports how
+long that took and its peak resident memory.
+
+    python3 -m benchmarks.import_memory
+"""
+import json
+import resource
+import sys
+import time
+
+from ._synth import run_child
+
+RUNS = 3
+MODES = ("publication", "jsii")
+
+
+def _publication_publish(name: str) -> None:
+    # publication.publish() reads __name__ and __all__ from its caller's locals.
+    import publication
+
+    module = sys.modules[name]
+    exec(
+        "publication.publish()",
+        {"publication": publication, "__name__": name, "__all__": module.__all__},
+    )
+
+
+def child() -> None:
+    if "--publication" in sys.argv:
+        import jsii
+
+        jsii.publish = _publication_publish
+
+    start = time.perf_counter()
+    from aws_cdk import App  # noqa: F401
+    from python.python_stack import WebAppStack  # noqa: F401
+    done = time.perf_counter()
+
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        maxrss //= 1024
+    print(json.dumps({"import": done - start, "maxrss": maxrss}))
+
+
+def main() -> None:
+    for mode in MODES:
+        for _ in range(RUNS):
+            report = run_child(__spec__.name, args=[f"--{mode}"])
+            print(f"{mode:>11}: {report['import']:.2f}s, {report['maxrss'] / 1024:.0f}MB peak RSS")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
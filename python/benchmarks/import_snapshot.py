@@ -0,0 +1,72 @@
+"""Per-module import time of the app, with and without a jsii import snapshot.
+
+Builds a snapshot of aws_cdk and constructs (see ``jsii._snapshot``) into a
+temporary directory, or reuses the one given with ``--snapshot``, then imports
+what ``app.py`` imports with ``python -X importtime`` both ways, and compares
+the time spent in each module.
+
+    python3 -m benchmarks.import_snapshot [--snapshot DIR]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, Optional
+
+from ._synth import PROJECT_DIR
+
+PACKAGES = ["aws_cdk", "constructs"]
+IMPORTS = "from aws_cdk import App; from python.python_stack import WebAppStack"
+TOP = 20
+
+
+def import_times(snapshot: Optional[str]) -> Dict[str, int]:
+    """Returns the time spent importing each module (excluding its own imports), in us."""
+    env = dict(os.environ)
+    if snapshot is not None:
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [snapshot, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORTS],
+        cwd=PROJECT_DIR,
+        env=env,
+        check=True,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.import_snapshot")
+    parser.add_argument("--snapshot", help="use this snapshot instead of building one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = args.snapshot
+        if snapshot is None:
+            snapshot = os.path.join(tmp, "snapshot")
+            subprocess.run(
+                [sys.executable, "-m", "jsii._snapshot", snapshot, *PACKAGES],
+                check=True,
+            )
+
+        original = import_times(None)
+        stripped = import_times(snapshot)
+
+    print(f"{'module':<50} {'original':>10} {'snapshot':>10}")
+    slowest = sorted(original, key=original.__getitem__, reverse=True)[:TOP]
+    for name in slowest:
+        print(f"{name:<50} {original[name] / 1000:>8.1f}ms {stripped.get(name, 0) / 1000:>8.1f}ms")
+    print(f"{'total':<50} {sum(original.values()) / 1000:>8.1f}ms {sum(stripped.values()) / 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Time it takes to import the app's modules, with and without lazy submodules.
+
+Each run is a fresh interpreter, which imports what ``app.py`` imports, and
+reports how long that took and how many ``aws_cdk`` modules ended up loaded.
+
+    python3 -m benchmarks.import_time
+"""
+import json
+import sys
+import time
+
+from ._synth import run_child
+
+RUNS = 3
+
+
+def child() -> None:
+    start = time.perf_counter()
+    from aws_cdk import App  # noqa: F401
+    from python.python_stack import WebAppStack  # noqa: F401
+    done = time.perf_counter()
+
+    modules = [name for name in sys.modules if name.split(".")[0] == "aws_cdk"]
+    print(json.dumps({"import": done - start, "modules": len(modules)}))
+
+
+def main() -> None:
+    for label, lazy in (("eager", "0"), ("lazy", "1")):
+        for _ in range(RUNS):
+            report = run_child(__spec__.name, {"JSII_LAZY_SUBMODULES": lazy})
+            print(f"{label:>5}: {report['import']:.2f}s, {report['modules']} aws_cdk modules")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
@@ -0,0 +1,74 @@
+"""Microbenchmark of the jsii kernel JSON codecs, over the traffic of a real synth.
+
+The traffic is recorded while synthesizing WebAppStack, then every available codec
+encodes all recorded requests and decodes all recorded responses.
+
+    python3 -m benchmarks.json_codec
+"""
+import time
+
+from ._synth import synth_app
+
+REPEAT = 20
+
+
+class _Recorder:
+    def __init__(self, codec):
+        self.codec = codec
+        self.sent = []
+        self.received = []
+
+    def dumps(self, obj):
+        self.sent.append(obj)
+        return self.codec.dumps(obj)
+
+    def loads(self, data):
+        self.received.append(data)
+        return self.codec.loads(data)
+
+
+def record_traffic(process):
+    # The kernel process is only started on the first request, so the recorder has
+    # to be in place before aws_cdk is imported.
+    recorder = _Recorder(process._StdlibCodec())
+    process._select_codec = lambda: recorder
+    synth_app()
+    return recorder.sent, recorder.received
+
+
+def available_codecs(process):
+    codecs = [process._StdlibCodec()]
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        codecs.append(process._OrjsonCodec(orjson))
+    return codecs
+
+
+def main() -> None:
+    from jsii._kernel.providers import process
+
+    sent, received = record_traffic(process)
+    size = sum(len(line) for line in received)
+    print(f"recorded {len(sent)} requests, {len(received)} responses ({size} bytes)")
+
+    for codec in available_codecs(process):
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            for obj in sent:
+                codec.dumps(obj)
+        encode = (time.perf_counter() - start) / REPEAT
+
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            for line in received:
+                codec.loads(line)
+        decode = (time.perf_counter() - start) / REPEAT
+
+        print(f"{codec.name:>8}: encode {encode * 1000:.2f}ms, decode {decode * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Synthesis time of an app with many stacks, on one kernel and sharded across processes.
+
+Builds ``STACKS`` copies of WebAppStack, either all in one App (one jsii
+kernel), or split into one shard per worker with
+``python.parallel_synth.synth``, whose assemblies are merged into one.
+
+    python3 -m benchmarks.parallel_synth
+"""
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+
+from ._synth import PROJECT_DIR, run_child
+
+STACKS = 8
+
+
+def _add_stacks(first: int, count: int, app) -> None:
+    from python.python_stack import WebAppStack
+
+    for index in range(first, first + count):
+        WebAppStack(app, f"WebAppStack{index}", env={
+            'account': '263293409914',
+            'region': os.getenv('CDK_DEFAULT_REGION', 'us-east-1')
+        })
+
+
+def child() -> None:
+    from python.parallel_synth import synth
+
+    workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    per_shard = -(-STACKS // workers)
+    shards = [
+        functools.partial(_add_stacks, first, min(per_shard, STACKS - first))
+        for first in range(0, STACKS, per_shard)
+    ]
+
+    # Use the cached lookups, so no AWS credentials are needed to synthesize.
+    with open(os.path.join(PROJECT_DIR, "cdk.context.json")) as fp:
+        context = json.load(fp)
+
+    with tempfile.TemporaryDirectory() as outdir:
+        start = time.perf_counter()
+        synth(shards, outdir=outdir, workers=workers, context=context)
+        elapsed = time.perf_counter() - start
+
+    print(json.dumps({"seconds": elapsed}))
+
+
+def main() -> None:
+    for workers in (1, 2, os.cpu_count() or 1):
+        report = run_child(__spec__.name, args=["--workers", str(workers)])
+        print(f"{workers:>2} worker(s): {STACKS} stacks in {report['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
@@ -0,0 +1,32 @@
+"""Kernel round-trips needed to synthesize WebAppStack, with and without pipelining.
+
+    python3 -m benchmarks.round_trips
+"""
+import json
+import sys
+import time
+
+from ._synth import run_child, synth_app
+
+
+def child() -> None:
+    import jsii
+
+    start = time.perf_counter()
+    synth_app()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({"round_trips": jsii.stats().round_trips, "seconds": elapsed}))
+
+
+def main() -> None:
+    for label, pipeline in (("synchronous", "0"), ("pipelined", "1")):
+        report = run_child(__spec__.name, {"JSII_PIPELINE": pipeline})
+        print(f"{label:>12}: {report['round_trips']:6d} round-trips, {report['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
@@ -0,0 +1,84 @@
+"""Memory and construction time of the props structs a large app builds.
+
+Data types (``InstanceProps``, ``DefaultStackSynthesizerProps``, ...) are
+built for every construct. They keep their fields in a ``_values`` dict and
+declare empty ``__slots__``, so that is all their instances hold. This builds
+many instances of the ones this app uses, both as they are and through a
+subclass without ``__slots__`` (which is how they used to be laid out), and
+compares their size and how long they take to build. The bindings must have been
+rewritten (``python3 -m jsii._rewrite aws_cdk constructs``) for the data types to
+have ``__slots__``.
+
+    python3 -m benchmarks.structs
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from ._synth import run_child
+
+COUNT = 20_000
+ROLE_ARN = "arn:aws:iam::263293409914:role/LabRole"
+
+
+def _cases():
+    from aws_cdk import DefaultStackSynthesizerProps, StackProps, aws_ec2 as ec2, aws_iam as iam
+
+    return [
+        (StackProps, dict(description="WebAppStack", termination_protection=False)),
+        (DefaultStackSynthesizerProps, dict(
+            file_assets_bucket_name="zamirpruebitacloud",
+            bucket_prefix="",
+            cloud_formation_execution_role=ROLE_ARN,
+            deploy_role_arn=ROLE_ARN,
+            file_asset_publishing_role_arn=ROLE_ARN,
+            image_asset_publishing_role_arn=ROLE_ARN,
+        )),
+        (iam.FromRoleArnOptions, dict(mutable=False, add_grants_to_resources=False)),
+        (ec2.LookupMachineImageProps, dict(
+            name="ubuntu/images/hvm-ssd/ubuntu-focal-20.04-amd64-server-*",
+            owners=["099720109477"],
+        )),
+        (ec2.VpcLookupOptions, dict(vpc_id="vpc-0248bf7539e16364c")),
+    ]
+
+
+def _measure(struct, kwargs):
+    tracemalloc.start()
+    instances = [struct(**kwargs) for _ in range(COUNT)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+
+    start = time.perf_counter()
+    for _ in range(COUNT):
+        struct(**kwargs)
+    elapsed = time.perf_counter() - start
+    return size / COUNT, elapsed / COUNT
+
+
+def child() -> None:
+    report = {}
+    for struct, kwargs in _cases():
+        unslotted = type(struct.__name__, (struct,), {})
+        report[struct.__name__] = [*_measure(unslotted, kwargs), *_measure(struct, kwargs)]
+    print(json.dumps(report))
+
+
+def main() -> None:
+    report = run_child(__spec__.name, {"JSII_TYPE_CHECKING": "off"})
+    print(f"{'struct':<32} {'dict':>16} {'slots':>16}")
+    for name, (dict_size, dict_time, slots_size, slots_time) in report.items():
+        print(
+            f"{name:<32}"
+            f" {dict_size:>5.0f}B {dict_time * 1e6:>6.2f}us"
+            f" {slots_size:>5.0f}B {slots_time * 1e6:>6.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
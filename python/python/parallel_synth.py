@@ -0,0 +1,122 @@
+"""Synthesizes independent stacks (or stages) in parallel, one jsii kernel per process.
+
+jsii keeps a single kernel, and node process, per Python process, so an app
+builds its constructs on one core however many stacks it has. ``synth`` takes
+one function per shard instead, each adding its stacks to the ``App`` it is
+given, and runs each shard in its own process (and kernel), into its own
+cloud assembly. These are then merged into one, in ``outdir``.
+
+Shards must not reference each other's constructs, as they are built in
+different processes. The functions are pickled to be sent to the workers, so
+they must be defined at module level, and the app's entry point must be guarded
+with ``if __name__ == "__main__":``, since workers import it again.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+
+MANIFEST = "manifest.json"
+TREE = "tree.json"
+
+
+def _synth_shard(
+    build: Callable[[Any], None], outdir: str, props: Dict[str, Any]
+) -> str:
+    from aws_cdk import App
+
+    app = App(outdir=outdir, **props)
+    build(app)
+    return app.synth().directory
+
+
+def _read_json(path: str) -> Any:
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def _write_json(path: str, value: Any) -> None:
+    with open(path, "w") as fp:
+        json.dump(value, fp, indent=2)
+
+
+def _merge_assembly(shard: str, outdir: str) -> None:
+    manifest_path = os.path.join(outdir, MANIFEST)
+    tree_path = os.path.join(outdir, TREE)
+    manifest = _read_json(manifest_path) if os.path.exists(manifest_path) else None
+    tree = _read_json(tree_path) if os.path.exists(tree_path) else None
+
+    # Templates and assets are named after their stack or their hash, so the shards
+    # only have the manifest and the construct tree in common.
+    shutil.copytree(shard, outdir, dirs_exist_ok=True)
+
+    shard_manifest = _read_json(os.path.join(shard, MANIFEST))
+    if manifest is not None:
+        manifest.setdefault("artifacts", {}).update(shard_manifest.get("artifacts", {}))
+        missing = manifest.setdefault("missing", [])
+        keys = {entry["key"] for entry in missing}
+        missing.extend(
+            entry
+            for entry in shard_manifest.get("missing", [])
+            if entry["key"] not in keys
+        )
+        if not missing:
+            del manifest["missing"]
+        _write_json(manifest_path, manifest)
+
+    shard_tree_path = os.path.join(shard, TREE)
+    if tree is not None and os.path.exists(shard_tree_path):
+        children = tree["tree"].setdefault("children", {})
+        children.update(_read_json(shard_tree_path)["tree"].get("children", {}))
+        _write_json(tree_path, tree)
+
+
+def synth(
+    shards: Sequence[Callable[[Any], None]],
+    outdir: Optional[str] = None,
+    workers: Optional[int] = None,
+    **props: Any,
+) -> str:
+    """Builds each shard into its own App, in parallel, and merges their assemblies.
+
+    :param shards: functions that add independent stacks or stages to the App they are
+                   passed.
+    :param outdir: where to write the merged cloud assembly. Defaults to the one the
+                   CDK CLI asked for (``CDK_OUTDIR``), or a temporary directory.
+    :param workers: how many processes to run at once. Defaults to one per CPU. With a
+                    single shard or worker, the app is synthesized in this process.
+    :param props: passed on to every ``App``, e.g. ``context``.
+    :returns: the directory of the merged cloud assembly.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(shards))
+    if workers <= 1:
+        from aws_cdk import App
+
+        app = App(outdir=outdir, **props)
+        for build in shards:
+            build(app)
+        return app.synth().directory
+
+    # Where App would write to.
+    outdir = outdir or os.environ.get("CDK_OUTDIR") or tempfile.mkdtemp()
+    os.makedirs(outdir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=outdir, prefix=".shards-") as root:
+        shard_dirs = [os.path.join(root, str(index)) for index in range(len(shards))]
+        # Forked workers would share this process' kernel, so they are spawned.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            assemblies = list(
+                pool.map(_synth_shard, shards, shard_dirs, [props] * len(shards))
+            )
+
+        for stale in (MANIFEST, TREE):
+            path = os.path.join(outdir, stale)
+            if os.path.exists(path):
+                os.remove(path)
+        for assembly in assemblies:
+            _merge_assembly(assembly, outdir)
+
+    return outdir
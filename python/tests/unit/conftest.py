@@ -0,0 +1,74 @@
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import textwrap
+
+import pytest
+
+# jsii runs a single kernel per process, so each of these tests runs its script in a
+# process of its own, with the kernel (and the environment) it needs.
+#
+# Roots are made by App in aws-cdk-lib; constructs alone needs a root whose scope is
+# null, which its assembly doesn't allow. The scripts load a copy of it that does,
+# before importing constructs, and can use Root() to make one, and round_trips() to
+# count the requests written to the kernel.
+_PRELUDE = """\
+import jsii
+jsii.kernel.load("constructs", {version!r}, {tarball!r})
+from constructs import Construct
+
+class Root(Construct):
+    def __init__(self):
+        jsii.create(Construct, self, [None, ""])
+
+def round_trips():
+    return jsii.kernel.provider.round_trips
+"""
+
+
+def _rootable_constructs(tmp_path):
+    import constructs
+
+    assemblies = os.path.join(os.path.dirname(constructs.__file__), "_jsii")
+    [original] = glob.glob(os.path.join(assemblies, "constructs@*.jsii.tgz"))
+    version = os.path.basename(original)[len("constructs@") : -len(".jsii.tgz")]
+    tarball = str(tmp_path / "constructs.tgz")
+    with tarfile.open(original) as source, tarfile.open(tarball, "w:gz") as target:
+        for member in source.getmembers():
+            data = source.extractfile(member) if member.isfile() else None
+            if member.name == "package/.jsii":
+                assembly = json.load(data)
+                initializer = assembly["types"]["constructs.Construct"]["initializer"]
+                initializer["parameters"][0]["optional"] = True
+                data = io.BytesIO(json.dumps(assembly).encode())
+                member.size = len(data.getvalue())
+            target.addfile(member, data)
+    return version, tarball
+
+
+@pytest.fixture
+def run_script(tmp_path):
+    """Runs a script in a new process and returns its stdout."""
+    version, tarball = _rootable_constructs(tmp_path)
+
+    def run(script, env=None, timeout=120):
+        path = tmp_path / "script.py"
+        path.write_text(
+            _PRELUDE.format(version=version, tarball=tarball)
+            + textwrap.dedent(script)
+        )
+        result = subprocess.run(
+            [sys.executable, str(path)],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path), **(env or {})},
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+
+    return run
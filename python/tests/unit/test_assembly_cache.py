@@ -0,0 +1,115 @@
+import gzip
+import io
+import json
+import os
+import tarfile
+
+import pytest
+
+from jsii import _assembly_cache
+
+ASSEMBLY = json.dumps({"name": "example", "types": {}}).encode()
+
+
+def _tarball(path, assembly=ASSEMBLY, compressed=True):
+    members = {"package/package.json": b'{"name": "example"}'}
+    if compressed:
+        redirect = {
+            "schema": "jsii/file-redirect",
+            "compression": "gzip",
+            "filename": ".jsii.gz",
+        }
+        members["package/.jsii"] = json.dumps(redirect).encode()
+        members["package/.jsii.gz"] = gzip.compress(assembly)
+    else:
+        members["package/.jsii"] = assembly
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+def _assembly(snapshot):
+    with tarfile.open(snapshot) as tar:
+        assert "package/.jsii.gz" not in tar.getnames()
+        return tar.extractfile("package/.jsii").read()
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    root = tmp_path / "assembly-cache"
+    monkeypatch.setenv("JSII_ASSEMBLY_CACHE_ROOT", str(root))
+    return root
+
+
+def _never(*args):
+    raise AssertionError("not expected to be called")
+
+
+def test_snapshot_is_made_once(tmp_path, cache_root, monkeypatch):
+    tarball = _tarball(tmp_path / "example.tgz")
+
+    snapshot = _assembly_cache.snapshot("example", "1.0.0", tarball)
+    assert os.path.dirname(snapshot) == str(cache_root)
+    assert _assembly(snapshot) == ASSEMBLY
+
+    # Found by the tarball's path, size and modification time, without reading it
+    monkeypatch.setattr(_assembly_cache, "_digest", _never)
+    monkeypatch.setattr(_assembly_cache, "_write_snapshot", _never)
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == snapshot
+
+
+def test_same_content_reuses_snapshot(tmp_path, cache_root, monkeypatch):
+    tarball = _tarball(tmp_path / "example.tgz")
+    snapshot = _assembly_cache.snapshot("example", "1.0.0", tarball)
+
+    # Reinstalled, or another copy: the tarball is hashed to find the snapshot.
+    os.utime(tarball, ns=(0, 0))
+    monkeypatch.setattr(_assembly_cache, "_write_snapshot", _never)
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == snapshot
+
+
+def test_other_content_gets_its_own_snapshot(tmp_path, cache_root):
+    tarball = _tarball(tmp_path / "example.tgz")
+    snapshot = _assembly_cache.snapshot("example", "1.0.0", tarball)
+
+    other = b'{"name": "example", "types": {"example.Other": {}}}'
+    _tarball(tarball, assembly=other)
+    os.utime(tarball, ns=(0, 0))
+    changed = _assembly_cache.snapshot("example", "1.0.0", tarball)
+    assert changed != snapshot
+    assert _assembly(changed) == other
+
+
+def test_damaged_snapshot_is_made_again(tmp_path, cache_root):
+    tarball = _tarball(tmp_path / "example.tgz")
+    snapshot = _assembly_cache.snapshot("example", "1.0.0", tarball)
+
+    with open(snapshot, "r+b") as fp:
+        fp.truncate(512)
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == snapshot
+    assert _assembly(snapshot) == ASSEMBLY
+
+    os.unlink(snapshot)
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == snapshot
+    assert _assembly(snapshot) == ASSEMBLY
+
+
+def test_uncompressed_assembly_is_loaded_as_is(tmp_path, cache_root, monkeypatch):
+    tarball = _tarball(tmp_path / "example.tgz", compressed=False)
+
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == tarball
+    assert not [name for name in os.listdir(cache_root) if name.endswith(".tar")]
+
+    monkeypatch.setattr(_assembly_cache, "_digest", _never)
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == tarball
+
+
+def test_unusable_cache(tmp_path, monkeypatch):
+    tarball = _tarball(tmp_path / "example.tgz")
+    (tmp_path / "file").write_text("")
+    monkeypatch.setenv("JSII_ASSEMBLY_CACHE_ROOT", str(tmp_path / "file" / "cache"))
+
+    assert _assembly_cache.snapshot("example", "1.0.0", tarball) == tarball
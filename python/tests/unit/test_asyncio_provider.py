@@ -0,0 +1,58 @@
+import pytest
+
+PROVIDERS = pytest.mark.parametrize("provider", ["", "asyncio"])
+
+
+@PROVIDERS
+def test_gathered_requests(run_script, provider):
+    output = run_script(
+        """
+        import asyncio
+
+        root = Root()
+        children = [Construct(root, f"child{index}") for index in range(20)]
+
+        async def paths():
+            nodes = await asyncio.gather(
+                *(jsii.get_async(child, "node") for child in children)
+            )
+            return await asyncio.gather(*(jsii.get_async(n, "path") for n in nodes))
+
+        print(asyncio.run(paths()) == [f"child{index}" for index in range(20)])
+        print(root.node.find_child("child3").node.path)
+        """,
+        env={"JSII_PROVIDER": provider},
+        timeout=60,
+    )
+
+    assert output.splitlines() == ["True", "child3"]
+
+
+@PROVIDERS
+def test_callback_calls_back_into_kernel(run_script, provider):
+    output = run_script(
+        """
+        from constructs import IValidation
+
+        @jsii.implements(IValidation)
+        class Validation:
+            def __init__(self, scope):
+                self.scope = scope
+
+            def validate(self):
+                node = self.scope.node
+                return [f"{node.path}:{len(node.children)}"]
+
+        root = Root()
+        child = Construct(root, "child")
+        Construct(child, "grandchild")
+        child.node.add_validation(Validation(child))
+        child.node.add_validation(Validation(root))
+        print(child.node.validate())
+        print(root.node.find_child("child").node.path)
+        """,
+        env={"JSII_PROVIDER": provider},
+        timeout=60,
+    )
+
+    assert output.splitlines() == ["['child:1', ':1']", "child"]
@@ -0,0 +1,152 @@
+import pytest
+
+from jsii import _reference_map
+from jsii._kernel import Kernel, _callback_plans, _handle_callback
+from jsii._kernel.providers import BaseProvider
+from jsii._kernel.types import Callback, GetResponse, InvokeRequest, ObjRef
+
+
+class _Props(_reference_map.JSIIStruct):
+    __slots__ = ()
+
+    def __init__(self, *, name, size=None):
+        self._values = {"name": name}
+        if size is not None:
+            self._values["size"] = size
+
+    @property
+    def name(self):
+        return self._values.get("name")
+
+    @property
+    def size(self):
+        return self._values.get("size")
+
+
+class _Options:
+    """Not a data type, yet passed where one is expected."""
+
+    name = "options"
+
+
+class _Handler:
+    def on_event(self, kind, *, name, size=None):
+        return (kind, name, size)
+
+    def on_change(self, before, after):
+        return (before, after)
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    handler = _Handler()
+    monkeypatch.setattr(_reference_map, "resolve_id", {"Handler@1": handler}.get)
+    return handler
+
+
+def _invoke(cookie, *args):
+    request = InvokeRequest(objref=ObjRef(ref="Handler@1"), method="", args=list(args))
+    return _handle_callback(None, Callback(cbid="cb", cookie=cookie, invoke=request))
+
+
+def test_trailing_struct_is_expanded_into_keywords(handler):
+    assert _invoke("on_event", "created", _Props(name="a", size=2)) == (
+        "created",
+        "a",
+        2,
+    )
+    assert _invoke("on_event", "created", _Props(name="b")) == ("created", "b", None)
+    assert _invoke("on_event", "created", _Options()) == ("created", "options", None)
+
+
+def test_positional_arguments_are_passed_as_they_are(handler):
+    props = _Props(name="a")
+
+    assert _invoke("on_change", props, None) == (props, None)
+
+
+def test_plans_are_remade_when_methods_change(handler):
+    _invoke("on_event", "created", _Props(name="a"))
+    plan = _callback_plans[(_Handler, "on_event")]
+    _invoke("on_event", "updated", _Props(name="b"))
+    assert _callback_plans[(_Handler, "on_event")] is plan
+
+    handler.on_event = lambda kind, name: (kind, name)
+    assert _invoke("on_event", "deleted", "a") == ("deleted", "a")
+    assert _callback_plans[(_Handler, "on_event")] is not plan
+
+
+def _unused(self, *args):
+    raise AssertionError("not expected to be called")
+
+
+class _QueuingProvider(BaseProvider):
+    """Writes deferred completions ahead of the next request, as ProcessProvider."""
+
+    load = getScriptCommand = invokeBinScript = create = set = sget = sset = _unused
+    invoke = sinvoke = complete = sync_complete = delete = begin = end = _unused
+    callbacks = stats = _unused
+
+    def __init__(self):
+        self.frames = []
+        self._pending = []
+
+    def _write(self, *requests):
+        self.frames.append(self._pending + list(requests))
+        self._pending = []
+
+    def complete_deferred(self, request):
+        self._pending.append(("complete", request.cbid, request.result, request.err))
+
+    def flush(self):
+        if self._pending:
+            self._write()
+
+    def get(self, request):
+        self._write(("get", request.property))
+        return GetResponse(value="value")
+
+
+class _AsyncHandler:
+    __jsii_ref__ = ObjRef(ref="Handler@1")
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+
+    def returns(self):
+        return "returned"
+
+    def reads(self):
+        return self.kernel.get(self, "name")
+
+    def fails(self):
+        raise ValueError("failed")
+
+
+def test_async_callbacks_are_completed_in_order(monkeypatch):
+    # The kernel is a singleton
+    kernel = Kernel()
+    monkeypatch.setattr(kernel, "provider", _QueuingProvider())
+    callbacks = kernel._callbacks
+    handler = _AsyncHandler(kernel)
+    monkeypatch.setattr(_reference_map, "resolve_id", {"Handler@1": handler}.get)
+    request = InvokeRequest(objref=handler.__jsii_ref__, method="", args=[])
+
+    kernel._complete_callbacks(
+        [
+            Callback(cbid=f"cb{index}", cookie=cookie, invoke=request)
+            for index, cookie in enumerate(["returns", "reads", "fails", "returns"])
+        ]
+    )
+
+    # Each callback is completed before the next one makes requests of its own, and
+    # the remaining completions are sent together.
+    assert kernel.provider.frames == [
+        [("complete", "cb0", "returned", None), ("get", "name")],
+        [
+            ("complete", "cb1", "value", None),
+            ("complete", "cb2", None, "failed"),
+            ("complete", "cb3", "returned", None),
+        ],
+    ]
+    assert kernel._callbacks - callbacks == 4
@@ -0,0 +1,81 @@
+import base64
+import sys
+
+import pytest
+
+from jsii._kernel.providers.console import ConsoleRelay, _max_buffer
+
+
+class _Stream:
+    """Records what is written to it, along with what is written to the other one."""
+
+    def __init__(self, name, writes):
+        self.name = name
+        self.writes = writes
+
+    def write(self, text):
+        self.writes.append((self.name, text))
+
+    def flush(self):
+        pass
+
+
+def _capture(monkeypatch):
+    # Patched from the test itself, as pytest replaces them again once its fixtures
+    # are set up.
+    writes = []
+    monkeypatch.setattr(sys, "stderr", _Stream("stderr", writes))
+    monkeypatch.setattr(sys, "stdout", _Stream("stdout", writes))
+    return writes
+
+
+def _line(stream, text):
+    return b'{"%s":"%s"}\n' % (stream.encode(), base64.b64encode(text.encode()))
+
+
+def test_streams_stay_interleaved(monkeypatch):
+    writes = _capture(monkeypatch)
+    relay = ConsoleRelay()
+    with relay._ready:
+        # Queued while the writer thread waits, so they are written in one batch.
+        for stream, text in [
+            ("stdout", "a\n"),
+            ("stdout", "b\n"),
+            ("stderr", "c\n"),
+            ("stdout", "d\n"),
+        ]:
+            relay.relay(_line(stream, text))
+    relay.close()
+
+    assert writes == [("stdout", "a\nb\n"), ("stderr", "c\n"), ("stdout", "d\n")]
+    assert (relay.lines, relay.stdout_bytes, relay.stderr_bytes) == (4, 6, 2)
+
+
+def test_drops_are_reported(monkeypatch):
+    writes = _capture(monkeypatch)
+    relay = ConsoleRelay(max_buffer=0)
+    relay.relay(_line("stdout", "dropped\n"))
+    relay.close()
+
+    assert writes == [
+        (
+            "stderr",
+            "[jsii] 8 bytes of console output were dropped, as they did not fit in "
+            "JSII_CONSOLE_BUFFER (0 bytes)\n",
+        )
+    ]
+    assert (relay.dropped_bytes, relay.relayed_bytes) == (8, 0)
+
+
+def test_max_buffer(monkeypatch):
+    monkeypatch.delenv("JSII_CONSOLE_BUFFER", raising=False)
+    assert _max_buffer() is None
+    monkeypatch.setenv("JSII_CONSOLE_BUFFER", "65536")
+    assert _max_buffer() == 65536
+
+
+@pytest.mark.parametrize("setting", ["64k", "-1"])
+def test_malformed_max_buffer_is_ignored(monkeypatch, setting):
+    monkeypatch.setenv("JSII_CONSOLE_BUFFER", setting)
+    with pytest.warns(UserWarning, match="Invalid JSII_CONSOLE_BUFFER"):
+        assert _max_buffer() is None
@@ -0,0 +1,43 @@
+import datetime
+
+import dateutil.parser
+import pytest
+
+from jsii._kernel.providers.process import _parse_date, ohook
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        # As written by Date.prototype.toISOString
+        "2024-01-02T03:04:05.678Z",
+        "1969-12-31T23:59:59.999Z",
+        # As written by datetime.isoformat, when sent back
+        "2024-01-02T03:04:05+00:00",
+        "2024-01-02T03:04:05.123456+02:00",
+        "2024-01-02T03:04:05-05:30",
+    ],
+)
+def test_parses_like_isoparse(value):
+    parsed = _parse_date(value)
+
+    assert parsed == dateutil.parser.isoparse(value)
+    assert parsed.utcoffset() == dateutil.parser.isoparse(value).utcoffset()
+
+
+def test_falls_back_to_isoparse():
+    # fromisoformat rejects the end of a day as 24:00.
+    assert _parse_date("2024-01-02T24:00:00Z") == datetime.datetime(
+        2024, 1, 3, tzinfo=datetime.timezone.utc
+    )
+
+
+def test_rejects_invalid_dates():
+    with pytest.raises(ValueError):
+        _parse_date("not a date")
+
+
+def test_decodes_date_wrappers():
+    assert ohook({"$jsii.date": "2024-01-02T03:04:05.678Z"}) == datetime.datetime(
+        2024, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc
+    )
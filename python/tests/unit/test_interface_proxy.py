@@ -0,0 +1,105 @@
+import pytest
+
+from jsii._reference_map import InterfaceDynamicProxy, _interface_proxy
+
+
+class _Base:
+    def __init__(self):
+        self.__jsii_ref__ = "ref"
+
+    def describe(self):
+        return "base"
+
+    @property
+    def size(self):
+        return 1
+
+
+class _Other:
+    def describe(self):
+        return "other"
+
+    @property
+    def missing(self):
+        raise AttributeError("missing")
+
+    @property
+    def color(self):
+        return "red"
+
+    @color.setter
+    def color(self, value):
+        self.painted = value
+
+
+class _Fallback:
+    missing = "fallback"
+
+
+def test_attributes_resolve_to_first_delegate_defining_them():
+    base, other = _Base(), _Other()
+    proxy = _interface_proxy([base, other, _Fallback()])
+
+    assert isinstance(proxy, InterfaceDynamicProxy)
+    assert proxy.describe() == "base"
+    assert proxy.size == 1
+    assert proxy.color == "red"
+    # The delegate raising AttributeError makes the next one be tried.
+    assert proxy.missing == "fallback"
+    assert proxy.__jsii_ref__ == "ref"
+
+    proxy.color = "blue"
+    assert other.painted == "blue"
+
+    with pytest.raises(AttributeError, match="has no attribute 'nope'"):
+        proxy.nope
+
+
+def test_proxy_classes_are_cached_per_delegate_classes():
+    first = _interface_proxy([_Base(), _Other()])
+    second = _interface_proxy([_Base(), _Other()])
+    reversed_ = _interface_proxy([_Other(), _Base()])
+
+    assert type(first) is type(second)
+    assert type(first).__name__ == "InterfaceDynamicProxy"
+    assert type(reversed_) is not type(first)
+    assert reversed_.describe() == "other"
+
+
+def test_kernel_object_behind_interfaces(run_script):
+    output = run_script(
+        """
+        from jsii import _reference_map
+        from jsii._kernel.types import ObjRef
+        from constructs import Dependable, Node
+
+        def proxy_of(construct):
+            # As if the kernel handed out an object Python had not seen, by the
+            # interfaces it implements.
+            ref = construct.__jsii_ref__.ref
+            del _reference_map._refs._refs[ref]
+            interfaces = ["constructs.IDependable", "constructs.IConstruct"]
+            return _reference_map._refs.resolve(
+                jsii.kernel, ObjRef(ref=ref, interfaces=interfaces)
+            )
+
+        root = Root()
+        first = proxy_of(Construct(root, "first"))
+        second = proxy_of(Construct(root, "second"))
+
+        print(type(first).__name__, type(second) is type(first))
+        print(first.node.path, second.node.id)
+        # Passed back to the kernel
+        print(Node.of(first).path)
+        Dependable.of(first)
+        first.node.add_dependency(second)
+        print([dependency.node.id for dependency in first.node.dependencies])
+        """
+    )
+
+    assert output.splitlines() == [
+        "InterfaceDynamicProxy True",
+        "first second",
+        "first",
+        "['second']",
+    ]
@@ -0,0 +1,175 @@
+import datetime
+import enum
+import json
+import sys
+
+import cattr
+import pytest
+
+from jsii._kernel import types
+from jsii._kernel.providers import process
+from jsii._kernel.types import EnumRef, ObjRef
+
+CODECS = [process._StdlibCodec()]
+try:
+    import orjson
+except ImportError:
+    pass
+else:
+    CODECS.append(process._OrjsonCodec(orjson))
+
+
+class _Referenced:
+    __jsii_ref__ = ObjRef(ref="test.Referenced@10000")
+
+
+MESSAGE = (
+    b'{"ok": {"result": [{"$jsii.byref": "test.A@10000"}, '
+    b'{"$jsii.byref": "test.B@10001", "$jsii.interfaces": ["test.IB"]}, '
+    b'{"$jsii.date": "2024-01-02T03:04:05.678Z"}, '
+    b'{"$jsii.enum": "test.Color/RED"}, '
+    b'{"$jsii.map": {"key": {"$jsii.byref": "test.C@10002"}}}, '
+    b'{"key": "value", "nested": {"$jsii.byref": "test.D@10003"}}, '
+    b'null, 1.5, "text"]}}'
+)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_decodes_wrappers(codec):
+    result = codec.loads(MESSAGE)["ok"]["result"]
+
+    assert result == [
+        ObjRef(ref="test.A@10000"),
+        ObjRef(ref="test.B@10001", interfaces=["test.IB"]),
+        datetime.datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+        EnumRef(ref=ObjRef(ref="test.Color@"), member="RED"),
+        {"key": ObjRef(ref="test.C@10002")},
+        {"key": "value", "nested": ObjRef(ref="test.D@10003")},
+        None,
+        1.5,
+        "text",
+    ]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_encodes_wrappers(codec):
+    # Enums are wrapped by the kernel before they are encoded.
+    date = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    data = codec.dumps(
+        {"args": [_Referenced(), ObjRef(ref="test.A@10000"), date], "api": "invoke"}
+    )
+
+    assert json.loads(data) == {
+        "args": [
+            {"$jsii.byref": "test.Referenced@10000"},
+            {"$jsii.byref": "test.A@10000"},
+            {"$jsii.date": "2024-01-02T03:04:05+00:00"},
+        ],
+        "api": "invoke",
+    }
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_rejects_naive_datetimes(codec):
+    with pytest.raises(TypeError):
+        codec.dumps({"value": datetime.datetime(2024, 1, 2)})
+
+
+def test_selects_codec(monkeypatch):
+    monkeypatch.setenv("JSII_JSON_CODEC", "json")
+    assert process._select_codec().name == "json"
+
+    monkeypatch.setenv("JSII_JSON_CODEC", "auto")
+    assert process._select_codec().name == CODECS[-1].name
+
+
+def test_requires_orjson_when_selected(monkeypatch):
+    monkeypatch.setenv("JSII_JSON_CODEC", "orjson")
+    # None in sys.modules makes the import fail.
+    monkeypatch.setitem(sys.modules, "orjson", None)
+
+    with pytest.raises(ImportError):
+        process._select_codec()
+
+
+class _Color(enum.Enum):
+    RED = "RED"
+
+
+_Color.__jsii_type__ = "test.Color"
+
+
+def _cattrs_converter():
+    # How requests were unstructured before they had compiled encoders.
+    converter = cattr.Converter()
+
+    def with_api_key(api_name):
+        def unstructure(value):
+            unstructured = converter.unstructure_attrs_asdict(value)
+            unstructured["api"] = api_name
+            return unstructured
+
+        return unstructure
+
+    converter.register_unstructure_hook(enum.Enum, process._unstructure_enum)
+    for request_type, api_name in process._API_NAMES.items():
+        converter.register_unstructure_hook(request_type, with_api_key(api_name))
+    converter.register_unstructure_hook(
+        types.Override, converter.unstructure_attrs_asdict
+    )
+    converter.register_unstructure_hook(ObjRef, process._unstructure_ref)
+    return converter
+
+
+_REF = ObjRef(ref="test.A@10000")
+_DATE = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+# Enums are wrapped by the kernel before they are encoded, orjson would write them
+# as their value otherwise.
+_ENUM = process._unstructure_enum(_Color.RED)
+_ARGS = [1, "a", None, _REF, _Referenced(), _ENUM, _DATE, {"key": [_REF]}]
+
+REQUESTS = [
+    types.LoadRequest(name="test", version="1.0.0", tarball="/tmp/test.tgz"),
+    types.GetScriptCommandRequest(assembly="test", script="bin", args=_ARGS),
+    types.InvokeScriptRequest(assembly="test", script="bin", args=_ARGS),
+    types.CreateRequest(
+        fqn="test.A",
+        args=_ARGS,
+        overrides=[
+            types.Override(method="render", cookie="render"),
+            types.Override(property="name"),
+        ],
+        interfaces=["test.IA"],
+    ),
+    types.DeleteRequest(objref=_REF),
+    types.GetRequest(objref=_REF, property="name"),
+    types.StaticGetRequest(fqn="test.A", property="name"),
+    types.SetRequest(objref=_REF, property="name", value=_Referenced()),
+    types.StaticSetRequest(fqn="test.A", property="name", value="a"),
+    types.InvokeRequest(objref=_REF, method="render", args=_ARGS),
+    types.StaticInvokeRequest(fqn="test.A", method="render", args=None),
+    types.BeginRequest(objref=_REF, method="render", args=_ARGS),
+    types.EndRequest(promiseid="promise-1"),
+    types.CallbacksRequest(),
+    types.CompleteRequest(cbid="cb-1", result=_ARGS),
+    types.StatsRequest(),
+    process._CompleteRequest(
+        complete=types.CompleteRequest(cbid="cb-1", result=_ENUM)
+    ),
+    process._CompleteRequest(complete=types.CompleteRequest(cbid="cb-2", err="no")),
+]
+
+
+def test_every_request_type_is_covered():
+    assert {type(request) for request in REQUESTS} == set(process._ENCODERS)
+
+
+@pytest.mark.parametrize("request_", REQUESTS, ids=lambda request: repr(request))
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_requests_are_encoded_like_cattrs(codec, request_):
+    expected = json.dumps(
+        _cattrs_converter().unstructure(request_), default=process.jdefault
+    )
+    encoded = codec.dumps(process._ENCODERS[type(request_)](request_))
+
+    assert json.loads(encoded) == json.loads(expected)
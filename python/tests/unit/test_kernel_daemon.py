@@ -0,0 +1,178 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from jsii._kernel.providers.daemon import DaemonSession, _WarmKernel
+
+
+def _serve_once(path, reply):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    def serve():
+        with server:
+            connection, _ = server.accept()
+            with connection:
+                connection.recv(64 * 1024)
+                reply(connection)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread
+
+
+def _open_fds():
+    return set(os.listdir("/proc/self/fd"))
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "jsii.sock")
+
+
+def _session(path):
+    return DaemonSession(path, ["node"], {}, os.getcwd())
+
+
+def test_closed_connection(socket_path):
+    thread = _serve_once(socket_path, lambda connection: None)
+
+    with pytest.raises(OSError, match="invalid reply"):
+        _session(socket_path)
+    thread.join()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_missing_fds_are_closed(socket_path):
+    def reply(connection):
+        read, write = os.pipe()
+        data = json.dumps({"pid": 1, "hello": "jsii-runtime@0.0.0"}).encode()
+        socket.send_fds(connection, [data], [read, write])
+        os.close(read)
+        os.close(write)
+
+    before = _open_fds()
+    thread = _serve_once(socket_path, reply)
+
+    with pytest.raises(OSError, match="2 file descriptors"):
+        _session(socket_path)
+    thread.join()
+    assert _open_fds() <= before
+
+
+def test_daemon_error(socket_path):
+    thread = _serve_once(
+        socket_path,
+        lambda connection: connection.sendall(b'{"error": "no node"}\n'),
+    )
+
+    with pytest.raises(OSError, match="no node"):
+        _session(socket_path)
+    thread.join()
+
+
+def test_kernel_starts_without_daemon(run_script, socket_path):
+    _serve_once(socket_path, lambda connection: connection.sendall(b"[]\n"))
+
+    output = run_script(
+        """
+        print(Construct(Root(), "child").node.path)
+        """,
+        env={"JSII_KERNEL_DAEMON": socket_path},
+    )
+
+    assert output == "child\n"
+
+
+# Stands in for the kernel: writes more to stderr than a pipe holds as it starts,
+# answers loads (failing those of "broken", and replying nonsense to those of
+# "confused"), and writes to stderr when asked for anything else.
+_FAKE_KERNEL = """
+import json, sys
+
+sys.stderr.write("warning\\n" * 20000)
+sys.stderr.flush()
+print(json.dumps({"hello": "fake@1.0.0"}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    if request["api"] != "load":
+        sys.stderr.write("requested\\n")
+        sys.stderr.flush()
+        response = {"ok": {}}
+    elif request["name"] == "broken":
+        response = {"error": "broken", "stack": "", "name": "@jsii/kernel.Fault"}
+    elif request["name"] == "confused":
+        response = {"ok": {"assembly": "other", "types": 0}}
+    else:
+        response = {"ok": {"assembly": request["name"], "types": 0}}
+    print(json.dumps(response), flush=True)
+"""
+
+
+def _warm_kernel(*names):
+    spec = {
+        "argv": [sys.executable, "-c", _FAKE_KERNEL],
+        "env": dict(os.environ),
+        "cwd": os.getcwd(),
+    }
+    loads = [{"name": name, "version": "1.0.0", "tarball": "x.tgz"} for name in names]
+    return _WarmKernel(spec, loads)
+
+
+def test_warm_kernel_is_handed_over_without_its_stderr():
+    kernel = _warm_kernel("constructs", "broken")
+    assert kernel.hello == "fake@1.0.0"
+    # The client loads those that failed itself.
+    assert [load["name"] for load in kernel.loads] == ["constructs"]
+
+    daemon_end, client_end = socket.socketpair()
+    with daemon_end, client_end:
+        kernel.hand_over(daemon_end)
+        _, fds, _, _ = socket.recv_fds(client_end, 1024, 3)
+    with os.fdopen(fds[0], "wb") as stdin, os.fdopen(fds[1], "rb") as stdout:
+        with os.fdopen(fds[2], "rb") as stderr:
+            stdin.write(b'{"api": "stats"}\n')
+            stdin.flush()
+            assert json.loads(stdout.readline()) == {"ok": {}}
+            assert stderr.readline() == b"requested\n"
+    assert kernel.reap() == 0
+
+
+def test_warm_kernel_with_unexpected_load_response_is_discarded():
+    with pytest.raises(OSError, match="unexpected response to loading confused"):
+        _warm_kernel("confused")
+
+
+@pytest.fixture
+def daemon(socket_path):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "jsii._kernel.providers.daemon", socket_path]
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield socket_path
+    process.send_signal(signal.SIGINT)
+    process.wait(timeout=30)
+
+
+def test_session_reports_exit_status(run_script, daemon):
+    output = run_script(
+        """
+        print(Construct(Root(), "child").node.path)
+        process = jsii.kernel.provider._process
+        process.stop()
+        print(type(process._process).__name__, process._process.returncode)
+        """,
+        env={"JSII_KERNEL_DAEMON": daemon},
+    )
+
+    assert output.splitlines() == ["child", "DaemonSession 0"]
@@ -0,0 +1,38 @@
+def test_struct_returned_by_reference_loads_on_first_read(run_script):
+    output = run_script(
+        """
+        from constructs import MetadataEntry
+
+        root = Root()
+        root.node.add_metadata("first", {"a": 1})
+        root.node.add_metadata("second", "value")
+
+        metadata = root.node.metadata
+        before = round_trips()
+        first, second = metadata
+        print("loaded", round_trips() - before)
+
+        print("isinstance", isinstance(first, MetadataEntry))
+        print("fields", first.type, first.data)
+        print("loaded", round_trips() - before)
+        print("again", first.type, round_trips() - before)
+
+        print("equal", first == MetadataEntry(type="first", data={"a": 1}))
+        print("equal", MetadataEntry(type="first", data={"a": 1}) == first)
+        print("equal", first == second)
+        print(repr(second))
+        """
+    )
+
+    assert output.splitlines() == [
+        "loaded 0",
+        "isinstance True",
+        "fields first {'a': 1}",
+        # All of its fields, at once
+        "loaded 1",
+        "again first 1",
+        "equal True",
+        "equal True",
+        "equal False",
+        "MetadataEntry(data='value', type='second')",
+    ]
@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+
+from constructs import ConstructOrder, MetadataEntry
+
+from jsii._kernel import _make_reference_for_native, _native_handlers
+from jsii._kernel.types import ObjRef
+from jsii.errors import JSIIError
+
+
+class _Kernel:
+    """Records the objects the kernel is asked to create."""
+
+    def __init__(self):
+        self.created = []
+
+    def create(self, klass, obj):
+        obj.__jsii_ref__ = ObjRef(ref=f"Object@{10000 + len(self.created)}")
+        self.created.append(obj)
+
+
+class _Name(str):
+    pass
+
+
+class _Object:
+    pass
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        1,
+        1.5,
+        True,
+        None,
+        "text",
+        _Name("subclass"),
+        datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc),
+    ],
+)
+def test_primitives_are_sent_as_they_are(value):
+    assert _make_reference_for_native(None, value) is value
+
+
+def test_collections_of_primitives_are_not_copied():
+    values = [1, "two", None]
+    mapping = {"a": 1, "b": "two"}
+
+    assert _make_reference_for_native(None, values) is values
+    assert _make_reference_for_native(None, mapping) == {"$jsii.map": mapping}
+    assert _make_reference_for_native(None, mapping)["$jsii.map"] is mapping
+
+
+def test_collections_are_translated_recursively():
+    order = {"$jsii.enum": "constructs.ConstructOrder/PREORDER"}
+
+    assert _make_reference_for_native(None, [1, ConstructOrder.PREORDER]) == [1, order]
+    assert _make_reference_for_native(None, [[ConstructOrder.PREORDER]]) == [[order]]
+    assert _make_reference_for_native(None, {"a": ConstructOrder.PREORDER}) == {
+        "$jsii.map": {"a": order}
+    }
+
+
+def test_structs():
+    entry = MetadataEntry(type="kind", data=[ConstructOrder.POSTORDER])
+
+    assert _make_reference_for_native(None, entry) == {
+        "$jsii.struct": {
+            "fqn": "constructs.MetadataEntry",
+            "data": {
+                "data": [{"$jsii.enum": "constructs.ConstructOrder/POSTORDER"}],
+                "type": "kind",
+                "trace": None,
+            },
+        }
+    }
+
+
+def test_functions_are_rejected():
+    with pytest.raises(JSIIError, match="Cannot pass function"):
+        _make_reference_for_native(None, lambda: None)
+    with pytest.raises(JSIIError, match="Cannot pass function"):
+        _make_reference_for_native(None, len)
+
+
+def test_other_objects_are_created_in_the_kernel():
+    kernel = _Kernel()
+    first, second = _Object(), _Object()
+
+    assert _make_reference_for_native(kernel, [first, second]) == [first, second]
+    assert kernel.created == [first, second]
+
+
+def test_handlers_are_looked_up_by_exact_type():
+    _make_reference_for_native(None, _Name("subclass"))
+    _make_reference_for_native(None, ConstructOrder.PREORDER)
+
+    assert _native_handlers[_Name] is _native_handlers[str]
+    assert ConstructOrder in _native_handlers
@@ -0,0 +1,91 @@
+import contextlib
+
+import pytest
+
+from jsii._kernel.providers import node_options
+from jsii._kernel.providers.node_options import _from_environ, read_peak_rss
+
+
+def test_default_options():
+    options = _from_environ({})
+
+    assert options.max_old_space_size == 4069
+    with contextlib.ExitStack() as ctx_stack:
+        assert options.apply({}, ctx_stack) == ["--max-old-space-size=4069"]
+
+
+def test_options_from_environ():
+    options = _from_environ(
+        {
+            "JSII_NODE_MAX_OLD_SPACE_SIZE": "8192",
+            "JSII_NODE_STACK_SIZE": "2048",
+            "JSII_NODE_FLAGS": "--trace-warnings --title 'jsii kernel'",
+            "JSII_NODE_REPORT_RSS": "1",
+        }
+    )
+
+    with contextlib.ExitStack() as ctx_stack:
+        assert options.apply({}, ctx_stack) == [
+            "--max-old-space-size=8192",
+            "--stack-size=2048",
+            "--trace-warnings",
+            "--title",
+            "jsii kernel",
+        ]
+    assert options.report_rss
+
+
+@pytest.mark.parametrize("size", ["0", "-1", "4GB"])
+def test_invalid_sizes_are_rejected(size):
+    with pytest.raises(ValueError, match="Invalid JSII_NODE_MAX_OLD_SPACE_SIZE"):
+        _from_environ({"JSII_NODE_MAX_OLD_SPACE_SIZE": size})
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    monkeypatch.setattr(node_options, "_PROC", str(tmp_path))
+
+    def process(pid, argv, peak_kb, children=()):
+        directory = tmp_path / str(pid)
+        (directory / "task" / str(pid)).mkdir(parents=True)
+        (directory / "task" / str(pid) / "children").write_text(
+            " ".join(str(child) for child in children)
+        )
+        (directory / "cmdline").write_bytes(b"\0".join(argv) + b"\0")
+        (directory / "status").write_text(f"Name:\tnode\nVmHWM:\t{peak_kb} kB\n")
+
+    return process
+
+
+def test_peak_rss_is_the_kernels(proc):
+    proc(10, [b"node", b"jsii-runtime.js"], 50000, children=[11])
+    proc(11, [b"node", b"/cache/lib/program.js"], 300000, children=[12])
+    # Started by the kernel, e.g. to bundle assets
+    proc(12, [b"docker", b"run"], 900000)
+
+    assert read_peak_rss(10) == 300000 * 1024
+
+
+def test_peak_rss_of_runtime_without_kernel_child(proc):
+    proc(10, [b"node", b"custom-runtime.js"], 50000, children=[12])
+    proc(12, [b"docker", b"run"], 900000)
+
+    assert read_peak_rss(10) == 50000 * 1024
+
+
+def test_peak_rss_is_unknown_without_proc(proc):
+    assert read_peak_rss(10) is None
+
+
+def test_peak_rss_of_running_kernel(run_script):
+    output = run_script(
+        """
+        from jsii._kernel.providers.node_options import _kernel_pid, read_peak_rss
+
+        Root()
+        pid = jsii.kernel.provider._process._process.pid
+        print(_kernel_pid(pid) != pid, read_peak_rss(pid) > 2**20)
+        """
+    )
+
+    assert output.splitlines() == ["True True"]
@@ -0,0 +1,56 @@
+from constructs import Construct
+
+from jsii._kernel import _get_overides, _overrides_cache
+from jsii._kernel.types import Override
+
+TO_STRING = Override(method="toString", cookie="to_string")
+
+
+def _overrides(klass):
+    return _get_overides(Construct, object.__new__(klass))
+
+
+def test_overrides_are_cached_per_class():
+    class Named(Construct):
+        def to_string(self):
+            return "named"
+
+        def helper(self):
+            return "not a jsii method"
+
+    assert _overrides(Named) == [TO_STRING]
+    assert _overrides_cache[(Construct, Named)] == [TO_STRING]
+    # Callers get a copy of the cached list.
+    _overrides(Named).clear()
+    assert _overrides(Named) == [TO_STRING]
+
+
+def test_class_mutations_invalidate_the_cache():
+    class Base(Construct):
+        pass
+
+    class Derived(Base):
+        pass
+
+    assert _overrides(Derived) == []
+
+    Base.to_string = lambda self: "base"
+    assert _overrides(Derived) == [TO_STRING]
+
+    del Base.to_string
+    assert _overrides(Derived) == []
+
+
+def test_plain_classes_are_not_cached():
+    class Mixin:
+        pass
+
+    class Mixed(Mixin, Construct):
+        pass
+
+    assert _overrides(Mixed) == []
+    assert (Construct, Mixed) not in _overrides_cache
+
+    # Nothing tells the kernel about this one.
+    Mixin.to_string = lambda self: "mixed"
+    assert _overrides(Mixed) == [TO_STRING]
@@ -0,0 +1,150 @@
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+
+from python import parallel_synth
+
+# aws-cdk-lib's App, reduced to what parallel_synth relies on: each stack gets a
+# template, an artifact in the manifest and a node in the construct tree, and may
+# report context lookups it is missing.
+FAKE_AWS_CDK = textwrap.dedent(
+    """
+    import json
+    import os
+    import tempfile
+
+
+    class _Assembly:
+        def __init__(self, directory):
+            self.directory = directory
+
+
+    class App:
+        def __init__(self, outdir=None, context=None):
+            self.outdir = outdir or tempfile.mkdtemp()
+            self.context = context or {}
+            self.stacks = []
+
+        def synth(self):
+            os.makedirs(self.outdir, exist_ok=True)
+            artifacts = {"Tree": {"type": "cdk:tree"}}
+            children = {"Tree": {"id": "Tree", "path": "Tree"}}
+            missing = []
+            for name, lookups in self.stacks:
+                template = f"{name}.template.json"
+                with open(os.path.join(self.outdir, template), "w") as fp:
+                    json.dump({"Resources": {}, "Context": self.context}, fp)
+                artifacts[name] = {
+                    "type": "aws:cloudformation:stack",
+                    "properties": {"templateFile": template},
+                }
+                children[name] = {"id": name, "path": name}
+                missing += [
+                    {"key": key, "provider": "vpc-provider", "props": {}}
+                    for key in lookups
+                    if key not in [entry["key"] for entry in missing]
+                ]
+            manifest = {"version": "36.0.0", "artifacts": artifacts}
+            if missing:
+                manifest["missing"] = missing
+            with open(os.path.join(self.outdir, "manifest.json"), "w") as fp:
+                json.dump(manifest, fp)
+            with open(os.path.join(self.outdir, "tree.json"), "w") as fp:
+                tree = {"id": "App", "children": children}
+                json.dump({"version": "tree-0.1", "tree": tree}, fp)
+            return _Assembly(self.outdir)
+    """
+)
+
+
+@pytest.fixture(autouse=True)
+def fake_aws_cdk(tmp_path, monkeypatch):
+    # Spawned workers get the same sys.path, and so the same App.
+    package = tmp_path / "fake" / "aws_cdk"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text(FAKE_AWS_CDK)
+    monkeypatch.syspath_prepend(str(package.parent))
+    monkeypatch.delitem(sys.modules, "aws_cdk", raising=False)
+
+
+# Shards are pickled, so they are defined at module level.
+def _web_stacks(app):
+    app.stacks.append(("WebAppStack1", ["vpc:1"]))
+    app.stacks.append(("WebAppStack2", ["vpc:1"]))
+
+
+def _data_stacks(app):
+    app.stacks.append(("DataStack", ["vpc:1", "vpc:2"]))
+
+
+def _all_stacks(app):
+    _web_stacks(app)
+    _data_stacks(app)
+
+
+def _read(outdir):
+    files = {}
+    for directory, _, filenames in os.walk(outdir):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            with open(path) as fp:
+                files[os.path.relpath(path, outdir)] = json.load(fp)
+    return files
+
+
+def test_shards_match_serial_synth(tmp_path):
+    context = {"env": "test"}
+    serial = parallel_synth.synth(
+        [_all_stacks], outdir=str(tmp_path / "serial"), context=context
+    )
+    parallel = parallel_synth.synth(
+        [_web_stacks, _data_stacks],
+        outdir=str(tmp_path / "parallel"),
+        workers=2,
+        context=context,
+    )
+
+    assert parallel == str(tmp_path / "parallel")
+    assert _read(parallel) == _read(serial)
+
+
+def test_missing_context_is_listed_once(tmp_path):
+    outdir = parallel_synth.synth(
+        [_web_stacks, _data_stacks], outdir=str(tmp_path / "out"), workers=2
+    )
+
+    manifest = _read(outdir)["manifest.json"]
+    assert [entry["key"] for entry in manifest["missing"]] == ["vpc:1", "vpc:2"]
+
+
+def test_stale_assembly_is_replaced(tmp_path):
+    outdir = tmp_path / "out"
+    outdir.mkdir()
+    stale_children = {"OldStack": {"id": "OldStack", "path": "OldStack"}}
+    (outdir / "manifest.json").write_text(
+        json.dumps(
+            {
+                "version": "36.0.0",
+                "artifacts": {"OldStack": {"type": "aws:cloudformation:stack"}},
+                "missing": [{"key": "vpc:old", "provider": "vpc-provider"}],
+            }
+        )
+    )
+    (outdir / "tree.json").write_text(
+        json.dumps({"version": "tree-0.1", "tree": {"children": stale_children}})
+    )
+
+    parallel_synth.synth([_web_stacks, _data_stacks], outdir=str(outdir), workers=2)
+
+    files = _read(str(outdir))
+    assert set(files["manifest.json"]["artifacts"]) == {
+        "Tree",
+        "WebAppStack1",
+        "WebAppStack2",
+        "DataStack",
+    }
+    assert "vpc:old" not in [e["key"] for e in files["manifest.json"]["missing"]]
+    assert "OldStack" not in files["tree.json"]["tree"]["children"]
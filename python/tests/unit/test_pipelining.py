@@ -0,0 +1,166 @@
+import pytest
+
+PIPELINES = pytest.mark.parametrize("provider", ["", "asyncio"])
+
+
+@PIPELINES
+def test_deferred_error_is_raised_by_next_call(run_script, provider):
+    output = run_script(
+        """
+        root = Root()
+        Construct(root, "child")
+        # Void, so it is deferred; it fails because root has children already.
+        root.node.set_context("key", "value")
+        print("deferred")
+        try:
+            root.node.id
+        except RuntimeError as e:
+            print("raised:", "set context" in str(e).lower())
+        print(repr(root.node.id))
+        """,
+        env={"JSII_PIPELINE": "1", "JSII_PROVIDER": provider},
+    )
+
+    assert output.splitlines() == ["deferred", "raised: True", "''"]
+
+
+def test_deferred_error_is_raised_by_pipelined_exit(run_script):
+    output = run_script(
+        """
+        root = Root()
+        Construct(root, "child")
+        try:
+            with jsii.pipelined():
+                root.node.set_context("key", "value")
+                print("deferred")
+        except RuntimeError:
+            print("raised")
+        """
+    )
+
+    assert output.splitlines() == ["deferred", "raised"]
+
+
+def test_overrides_turn_deferral_off(run_script):
+    output = run_script(
+        """
+        class Named(Construct):
+            def to_string(self):
+                return "named"
+
+        def set_context(root):
+            try:
+                with jsii.pipelined():
+                    root.node.set_context("key", "value")
+                    print("returned")
+            except RuntimeError:
+                print("raised")
+
+        root = Root()
+        Construct(root, "child")
+        set_context(root)
+        # The kernel may now call back into Python, which a deferred call can't.
+        Named(root, "named")
+        set_context(root)
+        """
+    )
+
+    assert output.splitlines() == ["returned", "raised", "raised"]
+
+
+@PIPELINES
+def test_callback_of_deferred_request_is_failed(run_script, provider):
+    output = run_script(
+        """
+        from constructs import IValidation
+        from jsii._kernel.types import InvokeRequest
+
+        @jsii.implements(IValidation)
+        class Validation:
+            def validate(self):
+                print("validated")
+                return []
+
+        root = Root()
+        node = root.node
+        node.add_validation(Validation())
+        # Validating the node calls back into Python, which a deferred call can't.
+        jsii.kernel.provider.invoke_deferred(
+            InvokeRequest(objref=node.__jsii_ref__, method="validate", args=[])
+        )
+        try:
+            node.id
+        except jsii.errors.JSIIError as e:
+            print("raised:", "triggered a callback (validate)" in str(e))
+        # The responses are still read in the right order, and callbacks still work.
+        print(repr(node.id), node.path == node.id)
+        print(node.validate())
+        """,
+        env={"JSII_PROVIDER": provider},
+    )
+
+    assert output.splitlines() == [
+        "raised: True",
+        "'' True",
+        "validated",
+        "[]",
+    ]
+
+
+def test_providers_without_pipelining(run_script):
+    output = run_script(
+        """
+        from constructs import IValidation
+        from jsii._kernel.providers import BaseProvider
+        from jsii._kernel.types import GetRequest, InvokeRequest
+
+        # Only implements what providers must, by sending each request right away.
+        def delegate(name):
+            return lambda self, *args, **kwargs: getattr(self.inner, name)(
+                *args, **kwargs
+            )
+
+        SyncProvider = type(
+            "SyncProvider",
+            (BaseProvider,),
+            {n: delegate(n) for n in BaseProvider.__abstractmethods__},
+        )
+        provider = SyncProvider()
+        provider.inner = jsii.kernel.provider
+        jsii.kernel.provider = provider
+
+        @jsii.implements(IValidation)
+        class Validation:
+            def validate(self):
+                print("validated")
+                return []
+
+        root = Root()
+        baseline = jsii.stats().object_count
+        with jsii.release_scope():
+            Construct(Construct(root, "stage"), "child")
+        print("objects", jsii.stats().object_count - baseline)
+
+        node = root.node
+        ref = node.__jsii_ref__
+        responses = provider.get_many(
+            [GetRequest(objref=ref, property=p) for p in ("id", "path")]
+        )
+        print([r.value for r in responses])
+
+        node.add_validation(Validation())
+        try:
+            provider.invoke_deferred(InvokeRequest(objref=ref, method="validate"))
+        except jsii.errors.JSIIError as e:
+            print("raised:", "triggered a callback (validate)" in str(e))
+        print(repr(node.id), node.validate())
+        """
+    )
+
+    assert output.splitlines() == [
+        "objects 0",
+        "['', '']",
+        "raised: True",
+        "validated",
+        "'' []",
+    ]
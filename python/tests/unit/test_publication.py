@@ -0,0 +1,94 @@
+import sys
+import textwrap
+import types
+import typing
+
+import pytest
+
+import jsii
+
+SOURCE = textwrap.dedent(
+    """
+    import typing
+
+    import jsii
+
+
+    def _helper():
+        return "helper"
+
+
+    def public():
+        # Uses the module's private names, as generated code does.
+        return typing.cast(str, _helper())
+
+
+    __all__ = ["public"]
+
+    jsii.publish(__name__)
+    """
+)
+
+
+@pytest.fixture
+def module(monkeypatch):
+    name = "published_module"
+    module = types.ModuleType(name)
+    monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, f"{name}._private", raising=False)
+    exec(SOURCE, vars(module))
+    return module
+
+
+def test_hides_private_names(module):
+    assert module.public() == "helper"
+    for name in ("typing", "jsii", "_helper"):
+        assert not hasattr(module, name)
+    message = "module 'published_module' has no attribute 'typing'"
+    with pytest.raises(AttributeError, match=message):
+        module.typing
+    with pytest.raises(AttributeError, match="has no attribute 'missing'"):
+        module.missing
+
+
+def test_private_names_are_in_private(module):
+    assert module._private.typing is typing
+    assert module._private._helper() == "helper"
+    assert module._private.public is module.public
+    assert sys.modules["published_module._private"] is module._private
+
+
+def test_names_bound_after_publishing(module):
+    module.later = "later"
+    assert module.later == "later"
+    assert "later" in dir(module)
+
+    # Hidden names stay hidden when rebound, and their new value is used.
+    module._helper = lambda: "rebound"
+    assert not hasattr(module, "_helper")
+    assert module.public() == "rebound"
+    del module._helper
+    assert "_helper" not in vars(module)
+
+    del module.later
+    assert not hasattr(module, "later")
+
+
+def test_dir_only_lists_public_names(module):
+    names = dir(module)
+    assert "public" in names
+    assert "__name__" in names
+    assert "typing" not in names and "_helper" not in names
+
+
+def test_dir_honours_module_dir(module):
+    # As lazy_submodules() sets it
+    module.__dir__ = lambda: ["public", "submodule", "typing"]
+    assert dir(module) == ["public", "submodule"]
+
+
+def test_public_names_are_module_attributes(module):
+    # Public names are looked up in the module's __dict__, not through Python code.
+    assert type(module).__getattribute__ is types.ModuleType.__getattribute__
+    assert "__getattr__" not in vars(type(module))
+
@@ -0,0 +1,85 @@
+from jsii._kernel.types import ObjRef
+from jsii._reference_map import _ReferenceMap
+
+
+def test_release_scope(run_script):
+    output = run_script(
+        """
+        from jsii import _reference_map
+
+        class Named(Construct):
+            def to_string(self):
+                return "named"
+
+        app = Root()
+        baseline = jsii.stats().object_count
+        for index in range(10):
+            with jsii.release_scope():
+                stage = Construct(app, f"Stage{index}")
+                for child in range(20):
+                    Construct(stage, f"Child{child}")
+                kept = Construct(app, f"Kept{index}")
+                # Never released, as the kernel may call back into it.
+                Named(app, f"Named{index}")
+                del stage
+
+        print("objects", jsii.stats().object_count - baseline)
+        print("kept", kept.node.id)
+        print("ranges", len(_reference_map._refs._released))
+
+        print("named", type(app.node.find_child("Named0")).__name__)
+        try:
+            app.node.find_child("Stage0").node.id
+        except RuntimeError:
+            print("released")
+        """
+    )
+
+    assert output.splitlines() == [
+        # Each round keeps its Named, which is pinned, and Kept, which was still
+        # referenced when the scope ended.
+        "objects 20",
+        "kept Kept9",
+        "ranges 1",
+        "named Named",
+        "released",
+    ]
+
+
+class _Object:
+    def __init__(self, ref):
+        self.__jsii_ref__ = ObjRef(ref=ref)
+
+
+class _Slotted:
+    __slots__ = ("__jsii_ref__",)
+
+    def __init__(self, ref):
+        self.__jsii_ref__ = ObjRef(ref=ref)
+
+
+def test_close_scope_keeps_objects_it_cannot_track():
+    refs = _ReferenceMap({})
+    refs.open_scope()
+    for serial in range(10000, 10004):
+        refs.register(_Object(f"constructs.Construct@{serial}"))
+    # Not weakly referenceable, so it can't tell whether this one is still in use.
+    slotted = _Slotted("constructs.Construct@10004")
+    refs.register(slotted)
+    del slotted
+    kept = _Object("constructs.Construct@10005")
+    refs.register(kept)
+    refs.register(_Object("constructs.Construct@10006"))
+
+    released = refs.close_scope()
+
+    assert sorted(ref.ref for ref in released) == [
+        f"constructs.Construct@{serial}"
+        for serial in (10000, 10001, 10002, 10003, 10006)
+    ]
+    # The objects still in use join the released ones up into a single range.
+    assert refs._released == [(10000, 10006)]
+    assert refs._is_released("constructs.Construct@10002")
+    assert not refs._is_released("constructs.Construct@10007")
+    kept_ref = ObjRef(ref="constructs.Construct@10004")
+    assert type(refs.resolve(None, kept_ref)) is _Slotted
@@ -0,0 +1,319 @@
+import importlib.util
+import sys
+import textwrap
+import typing
+
+import pytest
+
+from jsii import JSIIStruct, _reference_map, _rewrite
+
+# A module in the form jsii-pacmak generates it.
+GENERATED = textwrap.dedent(
+    '''
+    import builtins
+    import typing
+
+    import jsii
+    import publication
+
+    import typeguard
+    from importlib.metadata import version as _metadata_package_version
+    TYPEGUARD_MAJOR_VERSION = int(_metadata_package_version('typeguard').split('.')[0])
+
+    def check_type(argname: str, value: object, expected_type: typing.Any) -> typing.Any:
+        if TYPEGUARD_MAJOR_VERSION <= 2:
+            return typeguard.check_type(argname=argname, value=value, expected_type=expected_type) # type:ignore
+        else:
+            if isinstance(value, jsii._reference_map.InterfaceDynamicProxy): # pyright: ignore [reportAttributeAccessIssue]
+               pass
+            else:
+                if TYPEGUARD_MAJOR_VERSION == 3:
+                    typeguard.config.collection_check_strategy = typeguard.CollectionCheckStrategy.ALL_ITEMS # type:ignore
+                    typeguard.check_type(value=value, expected_type=expected_type) # type:ignore
+                else:
+                    typeguard.check_type(value=value, expected_type=expected_type, collection_check_strategy=typeguard.CollectionCheckStrategy.ALL_ITEMS) # type:ignore
+
+    @jsii.data_type(
+        jsii_type="test.Options",
+        jsii_struct_bases=[],
+        name_mapping={"name": "name"},
+    )
+    class Options:
+        def __init__(self, *, name: builtins.str) -> None:
+            """Options.
+
+            Example::
+
+                options = Options(name="name")
+            """
+            if __debug__:
+                type_hints = typing.get_type_hints(_typecheckingstub__0ac1)
+                check_type(argname="argument name", value=name, expected_type=type_hints["name"])
+            self._values: typing.Dict[builtins.str, typing.Any] = {
+                "name": name,
+            }
+
+        @builtins.property
+        def name(self) -> builtins.str:
+            result = self._values.get("name")
+            return typing.cast(builtins.str, result)
+
+        def __eq__(self, rhs: typing.Any) -> builtins.bool:
+            return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+        def __ne__(self, rhs: typing.Any) -> builtins.bool:
+            return not (rhs == self)
+
+        def __repr__(self) -> str:
+            return "Options(%s)" % ", ".join(
+                k + "=" + repr(v) for k, v in self._values.items()
+            )
+
+
+    @jsii.data_type(
+        jsii_type="test.ExtendedOptions",
+        jsii_struct_bases=[Options],
+        name_mapping={"name": "name", "size": "size"},
+    )
+    class ExtendedOptions(Options):
+        def __init__(self, *, name: builtins.str, size: builtins.int) -> None:
+            self._values: typing.Dict[builtins.str, typing.Any] = {
+                "name": name,
+                "size": size,
+            }
+
+        def __eq__(self, rhs: typing.Any) -> builtins.bool:
+            return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+        def __ne__(self, rhs: typing.Any) -> builtins.bool:
+            return not (rhs == self)
+
+        def __repr__(self) -> str:
+            return "ExtendedOptions(%s)" % ", ".join(
+                k + "=" + repr(v) for k, v in self._values.items()
+            )
+
+
+    @jsii.data_type(
+        jsii_type="test.Tags",
+        jsii_struct_bases=[],
+        name_mapping={"tags": "tags"},
+    )
+    class Tags:
+        def __init__(self, *, tags: typing.Mapping[builtins.str, builtins.str]) -> None:
+            self._values: typing.Dict[builtins.str, typing.Any] = {
+                "tags": tags,
+            }
+
+        def __eq__(self, rhs: typing.Any) -> builtins.bool:
+            return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+        def __ne__(self, rhs: typing.Any) -> builtins.bool:
+            return not (rhs == self)
+
+        def __repr__(self) -> str:
+            return "Tags(%s)" % ", ".join(
+                k + "=" + repr(v) for k, v in self._values.items()
+            )
+
+
+    @jsii.data_type(
+        jsii_type="test.TaggedOptions",
+        jsii_struct_bases=[Options, Tags],
+        name_mapping={"name": "name", "tags": "tags", "options": "options"},
+    )
+    class TaggedOptions(Options, Tags):
+        def __init__(
+            self,
+            *,
+            name: builtins.str,
+            tags: typing.Mapping[builtins.str, builtins.str],
+            options: typing.Optional[Options] = None,
+        ) -> None:
+            self._values: typing.Dict[builtins.str, typing.Any] = {
+                "name": name,
+                "tags": tags,
+            }
+            if options is not None:
+                self._values["options"] = options
+
+        def __eq__(self, rhs: typing.Any) -> builtins.bool:
+            return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+        def __ne__(self, rhs: typing.Any) -> builtins.bool:
+            return not (rhs == self)
+
+        def __repr__(self) -> str:
+            return "TaggedOptions(%s)" % ", ".join(
+                k + "=" + repr(v) for k, v in self._values.items()
+            )
+
+
+    class Resource:
+        @jsii.data_type(
+            jsii_type="test.Resource.PropsProperty",
+            jsii_struct_bases=[],
+            name_mapping={"name": "name"},
+        )
+        class PropsProperty:
+            def __init__(self, *, name: builtins.str) -> None:
+                self._values: typing.Dict[builtins.str, typing.Any] = {
+                    "name": name,
+                }
+
+            def __eq__(self, rhs: typing.Any) -> builtins.bool:
+                return isinstance(rhs, self.__class__) and rhs._values == self._values
+
+            def __ne__(self, rhs: typing.Any) -> builtins.bool:
+                return not (rhs == self)
+
+            def __repr__(self) -> str:
+                return "PropsProperty(%s)" % ", ".join(
+                    k + "=" + repr(v) for k, v in self._values.items()
+                )
+
+
+    __all__ = [
+        "ExtendedOptions",
+        "Options",
+        "Resource",
+        "TaggedOptions",
+        "Tags",
+    ]
+
+    publication.publish()
+
+    # Loading modules to ensure their types are registered with the jsii runtime library
+    from . import submodule
+
+    def _typecheckingstub__0ac1(
+        *,
+        name: builtins.str,
+    ) -> None:
+        """Type checking stubs"""
+        pass
+    '''
+)
+
+
+def _import(monkeypatch, path, name):
+    spec = importlib.util.spec_from_file_location(
+        name, path, submodule_search_locations=[str(path.parent)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, f"{name}._private", raising=False)
+    monkeypatch.delitem(sys.modules, f"{name}.submodule", raising=False)
+    spec.loader.exec_module(module)
+    # As published
+    return sys.modules[name]
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "generated_package"
+    root.mkdir()
+    (root / "__init__.py").write_text(GENERATED)
+    (root / "submodule.py").write_text("import jsii\n")
+    (root / "_jsii").mkdir()
+    (root / "_jsii" / "__init__.py").write_text("import jsii\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return root
+
+
+def test_rewrites_package_in_place(package):
+    assert _rewrite.rewrite_package("generated_package") == 1
+
+    source = (package / "__init__.py").read_text()
+    assert "class Options(jsii.JSIIStruct):\n    __slots__ = ()\n" in source
+    assert "class ExtendedOptions(Options):\n    __slots__ = ()\n" in source
+    assert "class TaggedOptions(Options, Tags):\n    __slots__ = ()\n" in source
+    nested = "    class PropsProperty(jsii.JSIIStruct):\n        __slots__ = ()\n"
+    assert nested in source
+    assert "__eq__" not in source and "__repr__" not in source
+    assert 'options = Options(name="name")' in source
+    assert "publication" not in source
+    assert "\njsii.publish(__name__)\n" in source
+    assert "from . import" not in source
+    assert 'jsii.lazy_submodules(__name__, [\n    "submodule",\n])\n' in source
+    assert "typeguard" not in source
+    assert "\ncheck_type = jsii.check_type\n\n" in source
+    assert "type_hints = jsii.type_hints(_typecheckingstub__0ac1)" in source
+
+    # Nothing is left to rewrite.
+    assert _rewrite.rewrite_package("generated_package") == 0
+    assert (package / "__init__.py").read_text() == source
+
+
+def _struct_behavior(module):
+    """The repr of a few instances of the module's data types, and how they compare."""
+
+    class LocalOptions(module.Options):
+        pass
+
+    # As the kernel makes them for values of several data types
+    Combined = _reference_map.new_combined_struct((module.Options, module.Tags))
+
+    instances = [
+        module.Options(name="a"),
+        module.Options(name="b"),
+        LocalOptions(name="a"),
+        module.ExtendedOptions(name="a", size=1),
+        module.Tags(tags={"a": "b"}),
+        module.TaggedOptions(name="a", tags={"a": "b"}),
+        module.TaggedOptions(
+            name="a", tags={"a": "b"}, options=module.Options(name="c")
+        ),
+        module.Resource.PropsProperty(name="a"),
+        Combined(name="a", tags={"a": "b"}),
+    ]
+    return (
+        [repr(instance) for instance in instances],
+        [[lhs == rhs for rhs in instances] for lhs in instances],
+        [[lhs != rhs for rhs in instances] for lhs in instances],
+    )
+
+
+def test_rewritten_modules_behave_the_same(package, monkeypatch):
+    generated = _import(monkeypatch, package / "__init__.py", "generated_before")
+    _rewrite.main(["generated_package"])
+    rewritten = _import(monkeypatch, package / "__init__.py", "generated_after")
+    # Only the generated module imports its submodules up front.
+    assert "generated_before.submodule" in sys.modules
+    assert "generated_after.submodule" not in sys.modules
+
+    assert _struct_behavior(generated) == _struct_behavior(rewritten)
+
+    for module in (generated, rewritten):
+        options = module.Options(name="a")
+        extended = module.ExtendedOptions(name="a", size=1)
+        props = module.Resource.PropsProperty(name="a")
+        assert repr(options) == "Options(name='a')"
+        assert repr(extended) == "ExtendedOptions(name='a', size=1)"
+        assert repr(props) == "PropsProperty(name='a')"
+        assert options == module.Options(name="a")
+        assert options != module.Options(name="b")
+        assert options != extended and extended != options
+        assert props != options
+        with pytest.raises(TypeError):
+            module.Options(name=1)
+
+        assert not hasattr(module, "typing")
+        assert module._private.typing is typing
+        assert sorted(name for name in dir(module) if not name.startswith("_")) == [
+            "ExtendedOptions",
+            "Options",
+            "Resource",
+            "TaggedOptions",
+            "Tags",
+            "submodule",
+        ]
+        assert module.submodule is sys.modules[f"{module.__name__}.submodule"]
+
+    assert isinstance(rewritten.ExtendedOptions(name="a", size=1), JSIIStruct)
+    assert not hasattr(rewritten.Options(name="a"), "__dict__")
+
+
+def test_requires_installed_package():
+    with pytest.raises(ValueError, match="not an installed package"):
+        _rewrite.rewrite_package("no_such_generated_package")
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from jsii._kernel.providers import process
+
+CONTENTS = {"bin/runtime.js": b"runtime", "lib/program.js": b"program"}
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    root = tmp_path / "runtime-cache"
+    monkeypatch.setenv("JSII_RUNTIME_CACHE_ROOT", str(root))
+    return root
+
+
+def test_extracts_runtime_once(cache_root):
+    directory = process._cached_runtime_directory(CONTENTS)
+
+    assert os.path.dirname(directory) == str(cache_root)
+    assert os.path.basename(directory).startswith(process.__jsii_runtime_version__)
+    with open(os.path.join(directory, "lib", "program.js"), "rb") as fp:
+        assert fp.read() == b"program"
+
+    # An entry that exists is used as-is.
+    with open(os.path.join(directory, "lib", "program.js"), "wb") as fp:
+        fp.write(b"changed")
+    assert process._cached_runtime_directory(CONTENTS) == directory
+    with open(os.path.join(directory, "lib", "program.js"), "rb") as fp:
+        assert fp.read() == b"changed"
+    assert os.listdir(cache_root) == [os.path.basename(directory)]
+
+
+def test_other_contents_get_their_own_entry(cache_root):
+    directory = process._cached_runtime_directory(CONTENTS)
+    other = process._cached_runtime_directory({**CONTENTS, "lib/program.js": b"v2"})
+
+    assert other != directory
+    assert sorted(os.listdir(cache_root)) == sorted(
+        os.path.basename(path) for path in (directory, other)
+    )
+
+
+def test_unusable_cache_raises(tmp_path, monkeypatch):
+    root = tmp_path / "file"
+    root.write_text("")
+    monkeypatch.setenv("JSII_RUNTIME_CACHE_ROOT", str(root))
+
+    with pytest.raises(OSError):
+        process._cached_runtime_directory(CONTENTS)
+
+
+def test_kernel_starts_without_cache(run_script, tmp_path):
+    root = tmp_path / "file"
+    root.write_text("")
+
+    output = run_script(
+        """
+        print(Construct(Root(), "child").node.path)
+        """,
+        env={"JSII_RUNTIME_CACHE_ROOT": str(root)},
+    )
+
+    assert output == "child\n"
@@ -0,0 +1,110 @@
+import importlib.util
+import json
+import sys
+import textwrap
+import typing
+
+from jsii import _snapshot
+
+# The form jsii-pacmak generates modules in, before they are rewritten to call
+# jsii.type_hints.
+GENERATED = textwrap.dedent(
+    '''
+    import typing
+
+    class Bucket:
+        """A bucket."""
+
+        def __init__(self, name: str, versioned: typing.Optional[bool] = None) -> None:
+            """Makes a bucket."""
+            if __debug__:
+                type_hints = typing.get_type_hints(_typecheckingstub__0a1b)
+            self.hints = type_hints
+
+    def stubs():
+        return [_typecheckingstub__2c3d]
+
+    def _typecheckingstub__0a1b(
+        name: str,
+        versioned: typing.Optional[bool] = None,
+    ) -> None:
+        """Type checking stubs"""
+        pass
+
+    def _typecheckingstub__2c3d(count: int) -> None:
+        """Type checking stubs"""
+        pass
+    '''
+)
+
+# The same module, once rewritten to call jsii.type_hints.
+REWRITTEN = textwrap.dedent(
+    '''
+    import typing
+
+    import jsii
+
+    class Bucket:
+        """A bucket."""
+
+        def __init__(self, name: str, versioned: typing.Optional[bool] = None) -> None:
+            """Makes a bucket."""
+            if __debug__:
+                type_hints = jsii.type_hints(_typecheckingstub__0a1b)
+            self.hints = type_hints
+
+    def _typecheckingstub__0a1b(
+        name: str,
+        versioned: typing.Optional[bool] = None,
+    ) -> None:
+        """Type checking stubs"""
+        pass
+    '''
+)
+
+
+def _load(tmp_path, monkeypatch, name, source):
+    stripped, docs, stubs = _snapshot._strip_module(source)
+    path = tmp_path / f"{name}.py"
+    path.write_text(stripped)
+    (tmp_path / f"{name}{_snapshot._DOCS_SUFFIX}").write_text(json.dumps(docs))
+    (tmp_path / f"{name}{_snapshot._STUBS_SUFFIX}").write_text(json.dumps(stubs))
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, name, module)
+    spec.loader.exec_module(module)
+    return stripped, module
+
+
+def test_strips_generated_module(tmp_path, monkeypatch):
+    stripped, module = _load(tmp_path, monkeypatch, "generated", GENERATED)
+
+    assert "def _typecheckingstub__0a1b" not in stripped
+    assert "_jsii_snapshot.stub('0a1b')" in stripped
+    assert module.Bucket("b").hints == {
+        "name": str,
+        "versioned": typing.Optional[bool],
+        "return": type(None),
+    }
+    assert module.Bucket.__doc__ == "A bucket."
+    assert _snapshot.docstring(module.Bucket.__init__) == "Makes a bucket."
+
+
+def test_keeps_stubs_referenced_otherwise(tmp_path, monkeypatch):
+    stripped, module = _load(tmp_path, monkeypatch, "referenced", GENERATED)
+
+    assert "def _typecheckingstub__2c3d" in stripped
+    assert module.stubs()[0].__annotations__ == {"count": int, "return": None}
+
+
+def test_strips_rewritten_module(tmp_path, monkeypatch):
+    stripped, module = _load(tmp_path, monkeypatch, "rewritten", REWRITTEN)
+
+    assert "def _typecheckingstub__0a1b" not in stripped
+    assert "jsii.type_hints(_jsii_snapshot.stub('0a1b'))" in stripped
+    assert module.Bucket("b").hints == {
+        "name": str,
+        "versioned": typing.Optional[bool],
+        "return": type(None),
+    }
@@ -0,0 +1,112 @@
+import importlib
+import sys
+import textwrap
+
+import pytest
+
+from jsii import _reference_map, _submodules
+from jsii._kernel.types import ObjRef
+from jsii._reference_map import _ReferenceMap
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """A generated package with a submodule, which it registers lazily."""
+    root = tmp_path / "lazy_package"
+    (root / "services").mkdir(parents=True)
+    (root / "broken").mkdir()
+    (root / "__init__.py").write_text(
+        textwrap.dedent(
+            """\
+            import jsii
+
+            VERSION = "1.0.0"
+
+            jsii.lazy_submodules(__name__, [
+                "services",
+            ])
+            """
+        )
+    )
+    (root / "services" / "__init__.py").write_text(
+        textwrap.dedent(
+            """\
+            import jsii
+
+            class Bucket(metaclass=jsii.JSIIMeta, jsii_type="lazy.services.Bucket"):
+                pass
+            """
+        )
+    )
+    # A submodule with a missing dependency
+    (root / "broken" / "__init__.py").write_text("import no_such_dependency\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(_submodules, "_assembly_modules", {})
+    monkeypatch.delenv("JSII_LAZY_SUBMODULES", raising=False)
+
+    yield root
+
+    for name in [name for name in sys.modules if name.startswith("lazy_package")]:
+        del sys.modules[name]
+    _reference_map._types.pop("lazy.services.Bucket", None)
+
+
+def test_submodules_are_imported_on_first_access(package):
+    import lazy_package
+
+    assert "lazy_package.services" not in sys.modules
+    assert lazy_package.services.Bucket.__jsii_type__ == "lazy.services.Bucket"
+    assert lazy_package.services is sys.modules["lazy_package.services"]
+
+    with pytest.raises(AttributeError, match="has no attribute 'missing'"):
+        lazy_package.missing
+
+
+def test_dir_lists_submodules_without_importing_them(package):
+    import lazy_package
+
+    names = dir(lazy_package)
+
+    assert {"VERSION", "services"} <= set(names)
+    assert names == sorted(names)
+    assert "lazy_package.services" not in sys.modules
+
+
+def test_from_import(package):
+    from lazy_package import services
+
+    assert services is sys.modules["lazy_package.services"]
+
+
+def test_submodules_are_imported_eagerly_when_disabled(package, monkeypatch):
+    monkeypatch.setenv("JSII_LAZY_SUBMODULES", "0")
+    import lazy_package
+
+    assert "lazy_package.services" in sys.modules
+    assert "services" in vars(lazy_package)
+
+
+def test_load_type_imports_its_submodule(package):
+    _submodules.register_assembly("lazy", "lazy_package")
+
+    # Another assembly's
+    _submodules.load_type("other.services.Bucket")
+    assert "lazy_package.services" not in sys.modules
+
+    # Nested types are declared in the module of their parent type.
+    _submodules.load_type("lazy.services.Bucket.PropsProperty")
+    assert "lazy_package.services" in sys.modules
+    assert "lazy.services.Bucket" in _reference_map._types
+
+    with pytest.raises(ModuleNotFoundError, match="no_such_dependency"):
+        _submodules.load_type("lazy.broken.Thing")
+
+
+def test_references_to_types_of_unloaded_submodules_resolve(package):
+    _submodules.register_assembly("lazy", "lazy_package")
+    importlib.import_module("lazy_package")
+
+    bucket = _ReferenceMap({}).resolve(None, ObjRef(ref="lazy.services.Bucket@10000"))
+
+    assert type(bucket) is sys.modules["lazy_package.services"].Bucket
+    assert bucket.__jsii_ref__ == ObjRef(ref="lazy.services.Bucket@10000")
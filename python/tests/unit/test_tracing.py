@@ -0,0 +1,71 @@
+import json
+
+from jsii._kernel import tracing
+from jsii._kernel.types import CreateRequest, GetRequest, InvokeRequest, ObjRef
+
+
+def _request_here(tracer, request, size, duration):
+    tracer.record("invoke", request, size, 1.0, 1.0 + duration)
+
+
+def _other_request(tracer, request, size, duration):
+    tracer.record("invoke", request, size, 1.0, 1.0 + duration)
+
+
+def test_records_requests_per_call_site():
+    tracer = tracing.Tracer()
+    node = ObjRef(ref="constructs.Node@10000")
+    _request_here(tracer, InvokeRequest(objref=node, method="addMetadata"), 10, 0.5)
+    _request_here(tracer, GetRequest(objref=node, property="path"), 20, 0.5)
+    _other_request(tracer, CreateRequest(fqn="constructs.Construct"), 5, 2.0)
+
+    assert [event.target for event in tracer.events] == [
+        "constructs.Node.addMetadata",
+        "constructs.Node.path",
+        "constructs.Construct",
+    ]
+    [(first, *first_totals), (second, *second_totals)] = tracer.by_call_site()
+    assert first.startswith("_other_request (") and first_totals == [1, 2.0, 5]
+    assert second.startswith("_request_here (") and second_totals == [2, 1.0, 30]
+
+
+def test_writes_folded_stacks(tmp_path):
+    tracer = tracing.Tracer()
+    for _ in range(2):
+        _request_here(tracer, CreateRequest(fqn="constructs.Construct"), 5, 0.25)
+    tracer.write(str(tmp_path / "trace.folded"))
+
+    [line] = (tmp_path / "trace.folded").read_text().splitlines()
+    stack, weight = line.rsplit(" ", 1)
+    assert stack.endswith(";invoke constructs.Construct")
+    assert weight == "500000"
+
+
+def test_traces_kernel_requests(run_script, tmp_path):
+    path = tmp_path / "trace.json"
+
+    output = run_script(
+        """
+        root = Root()
+        with jsii.trace() as tracer:
+            Construct(root, "child").node.path
+        for event in tracer.events:
+            print(event.api, event.target, event.call_site.split(" ")[0])
+        """,
+        env={"JSII_TRACE": str(path)},
+    )
+
+    assert output.splitlines() == [
+        "create constructs.Construct <module>",
+        "get constructs.Construct.node <module>",
+        "get constructs.Node.path <module>",
+    ]
+    # The requests traced by the block are left out of the trace of the process.
+    events = json.loads(path.read_text())["traceEvents"]
+    # The prelude loads constructs before importing it, which loads it again.
+    assert [event["name"] for event in events] == [
+        "load constructs",
+        "load constructs",
+        "create constructs.Construct",
+    ]
+    assert events[-1]["args"]["call_site"].startswith("__init__ (")
@@ -0,0 +1,242 @@
+import types
+import typing
+
+import pytest
+import typeguard
+
+from jsii import _reference_map, _type_checking
+from jsii._type_checking import _Policy, _compile, _parse_policy, _policy_from_env
+
+
+# typeguard 3 and later raise their own error.
+_ERRORS = (TypeError, getattr(typeguard, "TypeCheckError", TypeError))
+
+
+class _Props(_reference_map.JSIIStruct):
+    __slots__ = ()
+
+    def __init__(self, *, name):
+        self._values = {"name": name}
+
+
+class _OtherProps(_reference_map.JSIIStruct):
+    __slots__ = ()
+
+    def __init__(self):
+        self._values = {}
+
+
+class _Base:
+    pass
+
+
+class _Derived(_Base):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def configuration(monkeypatch):
+    # Whatever a test configures is undone afterwards.
+    monkeypatch.setattr(_type_checking, "_policy", _Policy("full"))
+    monkeypatch.setattr(_type_checking, "_stats", False)
+    monkeypatch.setattr(_type_checking, "_counters", _type_checking._Counters())
+    monkeypatch.setattr(_type_checking, "_call_counts", {})
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        ("full", _Policy("full")),
+        ("off", _Policy("off")),
+        (" off ", _Policy("off")),
+        ("first-calls:0", _Policy("first-calls", limit=0)),
+        ("first-calls:10", _Policy("first-calls", limit=10)),
+        ("sample:0.25", _Policy("sample", rate=0.25)),
+        ("sample:1", _Policy("sample", rate=1.0)),
+    ],
+)
+def test_parse_policy(policy, expected):
+    assert _parse_policy(policy) == expected
+
+
+@pytest.mark.parametrize(
+    "policy",
+    ["", "all", "off:1", "full:2", "first-calls", "first-calls:-1", "first-calls:x"]
+    + ["sample", "sample:1.5", "sample:-0.1", "sample:often"],
+)
+def test_parse_policy_rejects_malformed_policies(policy):
+    with pytest.raises(ValueError, match="Invalid type checking policy"):
+        _parse_policy(policy)
+
+
+def test_policy_from_env(monkeypatch):
+    monkeypatch.setenv("JSII_TYPE_CHECKING", "first-calls:3")
+    assert _policy_from_env() == _Policy("first-calls", limit=3)
+    monkeypatch.delenv("JSII_TYPE_CHECKING")
+    assert _policy_from_env() == _Policy("full")
+
+
+def test_malformed_env_policy_is_ignored(monkeypatch):
+    monkeypatch.setenv("JSII_TYPE_CHECKING", "sometimes")
+    with pytest.warns(UserWarning, match="'sometimes'.*ignoring JSII_TYPE_CHECKING"):
+        assert _policy_from_env() == _Policy("full")
+
+
+def _check(value):
+    _type_checking.check_type("value", value, str)
+
+
+def test_first_calls_policy_counts_each_call_site():
+    _type_checking.configure_type_checking("first-calls:2", stats=True)
+    with pytest.raises(_ERRORS):
+        _check(1)
+    with pytest.raises(_ERRORS):
+        _check(1)
+    # That call site is not validated anymore, unlike another one.
+    _check(1)
+    with pytest.raises(_ERRORS):
+        _type_checking.check_type("value", 1, str)
+
+    checked, skipped, _ = _type_checking.type_checking_stats()
+    assert (checked, skipped) == (3, 1)
+
+
+def test_sample_and_off_policies():
+    _type_checking.configure_type_checking("sample:0", stats=True)
+    _check(1)
+    _type_checking.configure_type_checking("sample:1")
+    with pytest.raises(_ERRORS):
+        _check(1)
+    _type_checking.configure_type_checking("off")
+    _check(1)
+
+    checked, skipped, _ = _type_checking.type_checking_stats()
+    assert (checked, skipped) == (1, 2)
+
+
+def test_stats_are_only_collected_when_enabled():
+    _check("a")
+    _type_checking.configure_type_checking("off")
+    _check(1)
+    assert _type_checking.type_checking_stats() == (0, 0, 0.0)
+
+    _type_checking.configure_type_checking("full", stats=True)
+    _check("a")
+    checked, skipped, seconds = _type_checking.type_checking_stats()
+    assert (checked, skipped) == (1, 0)
+    assert seconds > 0
+
+
+# The predicates compiled for each type accept and reject the same values as
+# typeguard, so they can stand in for it.
+_CASES = [
+    (int, [1, True], ["1", 1.5, None]),
+    (str, ["a"], [1, b"a", None]),
+    (typing.Any, [1, None, object()], []),
+    (type(None), [None], [0, ""]),
+    (typing.Union[int, str], [1, "a"], [1.5, None, ["a"]]),
+    (typing.Optional[str], [None, "a"], [1, ["a"]]),
+    (typing.Optional[typing.Union[int, str]], [None, 1, "a"], [1.5]),
+    (typing.List[str], [[], ["a", "b"]], [["a", 1], [None], 1, None, {"a": "b"}]),
+    (typing.Sequence[int], [[], [1, 2], (1, 2)], [[1, "2"], (1, None), 1]),
+    (typing.Sequence[typing.Optional[int]], [[1, None]], [[1, "2"]]),
+    (typing.Tuple[int, ...], [(), (1, 2)], [(1, "2"), 1]),
+    (typing.Mapping[str, int], [{}, {"a": 1}], [[("a", 1)], None]),
+    (typing.Dict[str, typing.List[str]], [{"a": ["b"]}], [{"a": "b"}, {"a": [1]}]),
+    (_Props, [_Props(name="a")], [_OtherProps(), {"name": "a"}, None]),
+    (typing.Optional[_Props], [None, _Props(name="a")], [_OtherProps()]),
+    (typing.Sequence[_Props], [[_Props(name="a")]], [[_Props(name="a"), None]]),
+    (_Base, [_Base(), _Derived()], [object(), _Base]),
+    (typing.Union[_Props, _Base], [_Props(name="a"), _Derived()], [_OtherProps()]),
+]
+
+
+def _typeguard_accepts(value, expected_type):
+    try:
+        _type_checking._typeguard_check_type("value", value, expected_type)
+    except _ERRORS:
+        return False
+    return True
+
+
+@pytest.mark.parametrize(
+    "expected_type, value, accepted",
+    [
+        pytest.param(expected_type, value, accepted, id=f"{expected_type}-{value!r}")
+        for expected_type, accepts, rejects in _CASES
+        for values, accepted in ((accepts, True), (rejects, False))
+        for value in values
+    ],
+)
+def test_predicates_agree_with_typeguard(expected_type, value, accepted):
+    assert _typeguard_accepts(value, expected_type) is accepted
+    assert _compile(expected_type)(value) is accepted
+    if accepted:
+        _type_checking.check_type("value", value, expected_type)
+    else:
+        with pytest.raises(_ERRORS):
+            _type_checking.check_type("value", value, expected_type)
+
+
+@pytest.mark.parametrize(
+    "expected_type, value",
+    [
+        # A string is a sequence of strings.
+        (typing.Sequence[str], "ab"),
+        # Other mappings than dictionaries
+        (typing.Mapping[str, int], types.MappingProxyType({"a": 1})),
+        # typeguard 2 doesn't check the items of a Mapping, unlike later versions.
+        (typing.Mapping[str, int], {"a": "1"}),
+        (typing.Mapping[str, int], {1: 1}),
+    ],
+)
+def test_typeguard_decides_what_predicates_do_not_accept(expected_type, value):
+    assert not _compile(expected_type)(value)
+    if _typeguard_accepts(value, expected_type):
+        _type_checking.check_type("value", value, expected_type)
+    else:
+        with pytest.raises(_ERRORS):
+            _type_checking.check_type("value", value, expected_type)
+
+
+def _typecheckingstub__construct(
+    scope: _Base,
+    id: str,
+    *,
+    props: typing.Optional[typing.Union[_Props, typing.Dict[str, typing.Any]]] = None,
+    tags: typing.Optional[typing.Mapping[str, str]] = None,
+    items: typing.Optional[typing.Sequence[typing.Union[int, "_Props"]]] = None,
+) -> None:
+    """Like the type checking stubs of the generated bindings."""
+
+
+_ARGUMENTS = [
+    ("scope", [_Derived()], [None, "scope"]),
+    ("id", ["id"], [None, 1]),
+    ("props", [None, _Props(name="a"), {"name": "a"}], [_OtherProps(), ["a"]]),
+    ("tags", [None, {}, {"a": "b"}], [["a"], "a"]),
+    ("items", [None, [], [1, _Props(name="a")], (1,)], [[1, "a"], [None], 1]),
+]
+
+
+@pytest.mark.parametrize(
+    "argname, value, accepted",
+    [
+        pytest.param(argname, value, accepted, id=f"{argname}-{value!r}")
+        for argname, accepts, rejects in _ARGUMENTS
+        for values, accepted in ((accepts, True), (rejects, False))
+        for value in values
+    ],
+)
+def test_stub_hints_agree_with_typeguard(argname, value, accepted):
+    hints = _type_checking.type_hints(_typecheckingstub__construct)
+    assert _type_checking.type_hints(_typecheckingstub__construct) is hints
+    expected_type = hints[argname]
+
+    assert _typeguard_accepts(value, expected_type) is accepted
+    assert _compile(expected_type)(value) is accepted
+    if accepted:
+        _type_checking.check_type(argname, value, expected_type)
+    else:
+        with pytest.raises(_ERRORS, match=argname):
+            _type_checking.check_type(argname, value, expected_type)